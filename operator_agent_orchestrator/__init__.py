@@ -5,7 +5,7 @@ subpackage of the same name so that users can import it as
 ``from operator_agent_orchestrator import Orchestrator``.
 """
 
-from .operator_agent_orchestrator import Orchestrator  # noqa: F401
+from .operator_agent_orchestrator import Orchestrator, RunResult  # noqa: F401
 
 # Re‑export nested examples to make ``operator_agent_orchestrator.examples``
 # available.  Without this alias, the examples package lives at
@@ -13,4 +13,4 @@ from .operator_agent_orchestrator import Orchestrator  # noqa: F401
 # is inconvenient to import from user code.  See the README for usage.
 from .operator_agent_orchestrator import examples  # noqa: F401
 
-__all__ = ["Orchestrator", "examples"]
\ No newline at end of file
+__all__ = ["Orchestrator", "RunResult", "examples"]
\ No newline at end of file
@@ -4,6 +4,6 @@ This package exposes the public API for building and running workflows.
 See the module docstrings in :mod:`orchestrator` for details.
 """
 
-from .orchestrator import Orchestrator
+from .orchestrator import Orchestrator, RunResult
 
-__all__ = ["Orchestrator"]
\ No newline at end of file
+__all__ = ["Orchestrator", "RunResult"]
\ No newline at end of file
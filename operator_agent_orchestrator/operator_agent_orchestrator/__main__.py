@@ -5,16 +5,25 @@ operator_agent_orchestrator``.  It uses the `click` library to provide
 subcommands.
 """
 
+import asyncio
 import importlib.resources as resources
 import json
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import click
 
-from .orchestrator import Orchestrator
+from . import bench as benchmarks
+from .columnar import ColumnarCache
+from .distributed import TOKEN_ENV, run_worker
+from .history import HISTORY_FILE, KEEP_RUNS, RunHistory, format_runs, format_task_stats
+from .orchestrator import Orchestrator, load_workflow
+from .plans import PLAN_SUFFIX, write_plan
 from .plugins import PLUGINS
+from .runlog import LEVELS
+from .server import WARM_MODULES, WorkflowServer, preload_modules, request
+from .tracing import TRACE_FILE, format_report, load_trace
 
 
 @click.group()
@@ -26,27 +35,553 @@ def app() -> None:
     """
 
 
+def _parse_capacities(resource: Tuple[str, ...]) -> Dict[str, float]:
+    capacities: Dict[str, float] = {}
+    for item in resource:
+        name, sep, amount = item.partition("=")
+        try:
+            capacities[name] = float(amount)
+        except ValueError:
+            sep = ""
+        if not sep or not name:
+            raise click.BadParameter(f"expected NAME=AMOUNT, got '{item}'", param_hint="--resource")
+    return capacities
+
+
+_log_options = [
+    click.option("--log-level", type=click.Choice(sorted(LEVELS, key=LEVELS.get)), default="info", show_default=True, help="Minimum level written to run.log and events.jsonl."),
+    click.option("--quiet", "-q", is_flag=True, default=False, help="Only print warnings and errors to the console."),
+]
+
+
+def _with_log_options(command: Any) -> Any:
+    for option in reversed(_log_options):
+        command = option(command)
+    return command
+
+
+def _log_levels(log_level: str, quiet: bool) -> Dict[str, Any]:
+    level = LEVELS[log_level]
+    return {"log_level": level, "console_level": max(level, LEVELS["warning"]) if quiet else level}
+
+
+_broker_options = [
+    click.option("--broker", default="127.0.0.1:0", show_default=True, metavar="HOST:PORT", help="Address the broker for tasks with 'executor: remote' listens on.  Port 0 picks a free port."),
+    click.option("--broker-token", envvar=TOKEN_ENV, default=None, help=f"Secret remote workers must present.  Defaults to ${TOKEN_ENV} or a random token, printed when the broker starts."),
+    click.option("--workers", type=click.IntRange(min=0), default=0, help="Number of remote workers to start on this machine."),
+    click.option("--worker-slots", type=click.IntRange(min=1), default=1, show_default=True, help="Tasks each local remote worker runs at once."),
+]
+
+
+def _parse_memory(ctx: click.Context, param: click.Parameter, value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return benchmarks.parse_size(value)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc)) from exc
+
+
+_artifact_memory_option = click.option(
+    "--artifact-memory",
+    metavar="SIZE",
+    default=None,
+    callback=_parse_memory,
+    help="Memory for DataFrames published by tasks, e.g. 4GB, before the largest are spilled to disk.  Defaults to a quarter of physical memory.",
+)
+
+_no_checkpoint_option = click.option(
+    "--no-checkpoint",
+    is_flag=True,
+    default=False,
+    help="Do not checkpoint finished tasks; the run cannot be resumed without running them again.",
+)
+
+_history_keep_option = click.option(
+    "--history-keep",
+    type=click.IntRange(min=1),
+    default=KEEP_RUNS,
+    show_default=True,
+    help="Runs of each workflow kept in the run history; older runs are pruned.",
+)
+
+
+def _broker_announcer(broker: str, broker_token: Optional[str]) -> Optional[Callable[[str, str], None]]:
+    # Workers on other machines cannot guess a generated token or port
+    if broker_token and not broker.endswith(":0"):
+        return None
+
+    def announce(address: str, token: str) -> None:
+        command = f"{TOKEN_ENV}={token} oprun worker --connect {address}"
+        click.echo(f"Broker listening on {address}; connect workers with {command}", err=True)
+
+    return announce
+
+
+def _with_broker_options(command: Any) -> Any:
+    for option in reversed(_broker_options):
+        command = option(command)
+    return command
+
+
 @app.command()
 @click.argument("workflow_path", type=click.Path(exists=True, dir_okay=False))
 @click.option("--log-dir", type=click.Path(file_okay=False), default=None, help="Directory where logs will be written.  Defaults to ./logs")
-def run(workflow_path: str, log_dir: Optional[str]) -> None:
+@click.option("--cache-dir", type=click.Path(file_okay=False), default=None, help="Directory of the task result cache.  Defaults to <log-dir>/cache")
+@click.option("--no-cache", is_flag=True, default=False, help="Ignore cached task results and do not store new ones.")
+@click.option("--clear-cache", is_flag=True, default=False, help="Delete all cached task results before running.")
+@click.option("--process-workers", type=int, default=None, help="Size of the process pool for tasks with 'executor: process'.  Defaults to the CPU count.")
+@click.option("--max-parallel", type=click.IntRange(min=1), default=None, help="Maximum number of tasks running at once.  Overrides the workflow setting.")
+@click.option("--resource", multiple=True, metavar="NAME=AMOUNT", help="Host capacity for a resource tag, e.g. memory_gb=32.  Repeatable.")
+@click.option("--profile", is_flag=True, default=False, help="Profile every task with cProfile and save the statistics in the run directory.")
+@_artifact_memory_option
+@click.option("--compact-summary", is_flag=True, default=False, help="Write summary.json without indentation, which is faster for large summaries.")
+@click.option("--no-history", is_flag=True, default=False, help="Do not record the run in the run history or use it to order tasks.")
+@_history_keep_option
+@_no_checkpoint_option
+@_with_broker_options
+@_with_log_options
+def run(
+    workflow_path: str,
+    log_dir: Optional[str],
+    cache_dir: Optional[str],
+    no_cache: bool,
+    clear_cache: bool,
+    process_workers: Optional[int],
+    max_parallel: Optional[int],
+    resource: Tuple[str, ...],
+    profile: bool,
+    artifact_memory: Optional[int],
+    compact_summary: bool,
+    no_history: bool,
+    history_keep: int,
+    no_checkpoint: bool,
+    broker: str,
+    broker_token: Optional[str],
+    workers: int,
+    worker_slots: int,
+    log_level: str,
+    quiet: bool,
+) -> None:
     """Execute a workflow defined in a YAML file.
 
-    ``WORKFLOW_PATH`` must point to a valid YAML file describing the tasks.
+    ``WORKFLOW_PATH`` must point to a valid YAML file describing the tasks,
+    or to a plan compiled from one with ``oprun compile``.
     If ``--log-dir`` is provided, logs and results are written into that
     directory; otherwise a `logs/` directory is created relative to the
-    current working directory.
+    current working directory.  Tasks marked ``cache: true`` reuse results
+    from earlier runs unless ``--no-cache`` is given.  A per‑task trace is
+    written next to the results; inspect it with ``oprun report``.
+    Tasks with ``executor: remote`` are run by ``oprun worker`` processes
+    connected to ``--broker``; ``--workers`` starts some on this machine.
     """
-    orchestrator = Orchestrator(log_root=log_dir)
-    orchestrator.run_workflow(workflow_path)
+    capacities = _parse_capacities(resource)
+    orchestrator = Orchestrator(
+        log_root=log_dir,
+        cache_dir=cache_dir,
+        use_cache=not no_cache,
+        process_workers=process_workers,
+        max_parallel=max_parallel,
+        resources=capacities,
+        profile=profile,
+        artifact_memory=artifact_memory,
+        compact_summary=compact_summary,
+        history=not no_history,
+        history_keep=history_keep,
+        checkpoint=not no_checkpoint,
+        broker=broker,
+        broker_token=broker_token,
+        workers=workers,
+        worker_slots=worker_slots,
+        on_broker_start=_broker_announcer(broker, broker_token),
+        **_log_levels(log_level, quiet),
+    )
+    if clear_cache:
+        orchestrator.cache.clear()
+    try:
+        orchestrator.run_workflow(workflow_path)
+    finally:
+        orchestrator.close()
+
+
+@app.command()
+@click.argument("run_dir", type=click.Path(exists=True, file_okay=False))
+@click.option("--cache-dir", type=click.Path(file_okay=False), default=None, help="Directory of the task result cache.  Defaults to the cache next to RUN_DIR")
+@click.option("--no-cache", is_flag=True, default=False, help="Ignore cached task results and do not store new ones.")
+@click.option("--process-workers", type=int, default=None, help="Size of the process pool for tasks with 'executor: process'.  Defaults to the CPU count.")
+@click.option("--max-parallel", type=click.IntRange(min=1), default=None, help="Maximum number of tasks running at once.  Overrides the workflow setting.")
+@click.option("--resource", multiple=True, metavar="NAME=AMOUNT", help="Host capacity for a resource tag, e.g. memory_gb=32.  Repeatable.")
+@click.option("--profile", is_flag=True, default=False, help="Profile every task with cProfile and save the statistics in the run directory.")
+@_artifact_memory_option
+@click.option("--compact-summary", is_flag=True, default=False, help="Write summary.json without indentation, which is faster for large summaries.")
+@click.option("--no-history", is_flag=True, default=False, help="Do not record the run in the run history or use it to order tasks.")
+@_history_keep_option
+@_no_checkpoint_option
+@_with_broker_options
+@_with_log_options
+def resume(
+    run_dir: str,
+    cache_dir: Optional[str],
+    no_cache: bool,
+    process_workers: Optional[int],
+    max_parallel: Optional[int],
+    resource: Tuple[str, ...],
+    profile: bool,
+    artifact_memory: Optional[int],
+    compact_summary: bool,
+    no_history: bool,
+    history_keep: int,
+    no_checkpoint: bool,
+    broker: str,
+    broker_token: Optional[str],
+    workers: int,
+    worker_slots: int,
+    log_level: str,
+    quiet: bool,
+) -> None:
+    """Continue the interrupted or failed run in RUN_DIR.
+
+    Tasks that finished successfully are restored from the run's
+    checkpoints and only the remaining tasks are executed, in the same run
+    directory.
+    """
+    capacities = _parse_capacities(resource)
+    orchestrator = Orchestrator(
+        log_root=str(Path(run_dir).parent),
+        cache_dir=cache_dir,
+        use_cache=not no_cache,
+        process_workers=process_workers,
+        max_parallel=max_parallel,
+        resources=capacities,
+        profile=profile,
+        artifact_memory=artifact_memory,
+        compact_summary=compact_summary,
+        history=not no_history,
+        history_keep=history_keep,
+        checkpoint=not no_checkpoint,
+        broker=broker,
+        broker_token=broker_token,
+        workers=workers,
+        worker_slots=worker_slots,
+        on_broker_start=_broker_announcer(broker, broker_token),
+        **_log_levels(log_level, quiet),
+    )
+    try:
+        orchestrator.resume(run_dir)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    finally:
+        orchestrator.close()
+
+
+@app.command()
+@click.option("--connect", "address", required=True, metavar="HOST:PORT", help="Address of the broker of a running orchestrator.")
+@click.option("--token", envvar=TOKEN_ENV, required=True, help=f"The broker's secret token.  Defaults to ${TOKEN_ENV}.")
+@click.option("--slots", type=click.IntRange(min=1), default=1, show_default=True, help="Number of tasks run at once.")
+@click.option("--name", default=None, help="Worker name shown in logs and traces.  Defaults to HOST:PID.")
+def worker(address: str, token: str, slots: int, name: Optional[str]) -> None:
+    """Run tasks with ``executor: remote`` for an orchestrator's broker.
+
+    The worker connects to the broker, runs the tasks it is handed and
+    sends back their results and log records until the orchestrator shuts
+    the broker down.  Plugins used by remote tasks must be importable on
+    the worker's machine.
+    """
+    try:
+        run_worker(address, token, slots=slots, name=name)
+    except (ConnectionError, ValueError) as exc:
+        raise click.ClickException(str(exc)) from exc
+
+
+@app.command(name="compile")
+@click.argument("workflow_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output", "-o", type=click.Path(dir_okay=False, writable=True), default=None, help=f"Plan file to write.  Defaults to WORKFLOW_PATH with a {PLAN_SUFFIX} suffix.")
+def compile_(workflow_path: str, output: Optional[str]) -> None:
+    """Validate WORKFLOW_PATH and write it as a compiled plan.
+
+    The plan holds the validated, topologically ordered workflow and loads
+    in a fraction of the time needed to parse the YAML.  Pass it to
+    ``oprun run`` instead of the YAML file.  ``oprun run`` also caches
+    plans automatically, keyed on the workflow file's contents.
+    """
+    try:
+        workflow = load_workflow(workflow_path)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    path = write_plan(workflow, output or Path(workflow_path).with_suffix(PLAN_SUFFIX))
+    click.echo(f"Compiled {len(workflow['tasks'])} tasks to {path}")
+
+
+@app.command()
+@click.argument("run_dir", type=click.Path(exists=True, file_okay=False))
+@click.option("--top", type=click.IntRange(min=1), default=10, help="Number of tasks listed by duration.")
+def report(run_dir: str, top: int) -> None:
+    """Summarise the trace of the run in RUN_DIR.
+
+    Prints the critical path (the chain of dependent tasks that determined
+    the wall‑clock time) and the tasks that took longest.
+    """
+    if not (Path(run_dir) / TRACE_FILE).exists():
+        raise click.UsageError(f"No {TRACE_FILE} found in {run_dir}")
+    click.echo(format_report(load_trace(Path(run_dir)), top=top))
+
+
+@app.command()
+@click.option("--log-dir", type=click.Path(file_okay=False), default=None, help="Log directory holding the history.  Defaults to ./logs")
+@click.option("--workflow", default=None, help="Only show runs of this workflow.")
+@click.option("--limit", type=click.IntRange(min=1), default=20, show_default=True, help="Number of runs listed.")
+@click.option("--tasks", "show_tasks", is_flag=True, default=False, help="Show duration statistics per task instead of runs.")
+@click.option("--task", default=None, help="Only show statistics of this task.  Implies --tasks.")
+@click.option("--json", "as_json", is_flag=True, default=False, help="Print the rows as JSON.")
+def history(
+    log_dir: Optional[str],
+    workflow: Optional[str],
+    limit: int,
+    show_tasks: bool,
+    task: Optional[str],
+    as_json: bool,
+) -> None:
+    """List recent runs, or per‑task statistics, from the run history.
+
+    Every run records its tasks' status, duration, CPU time and memory use
+    in ``history.sqlite`` in the log directory.
+    """
+    path = Path(log_dir or "logs") / HISTORY_FILE
+    if not path.exists():
+        raise click.UsageError(f"No run history found at {path}")
+    index = RunHistory(path)
+    try:
+        if show_tasks or task is not None:
+            rows = index.task_stats(workflow=workflow, task=task)
+            text = format_task_stats(rows)
+        else:
+            rows = index.runs(workflow=workflow, limit=limit)
+            text = format_runs(rows)
+    finally:
+        index.close()
+    click.echo(json.dumps(rows, indent=2) if as_json else text)
+
+
+@app.command()
+@click.option("--suite", type=click.Choice(sorted(benchmarks.SUITES)), default="quick", show_default=True, help="Predefined set of DAG and CSV sizes.")
+@click.option("--only", multiple=True, metavar="PATTERN", help="Only run cases matching this glob, e.g. 'scheduler/*'.  Repeatable.")
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True, help="Timed repetitions per case.")
+@click.option("--tasks", "task_counts", type=click.IntRange(min=1), multiple=True, help="DAG size to benchmark instead of the suite's.  Repeatable.")
+@click.option("--csv-size", "csv_sizes", multiple=True, metavar="SIZE", help="CSV size such as 100MB instead of the suite's.  Repeatable.")
+@click.option("--data-dir", type=click.Path(file_okay=False), default=None, help="Keep generated CSV files here and reuse them across runs.")
+@click.option("--output", type=click.Path(dir_okay=False, writable=True), default=None, help="Write the results as JSON to this file.")
+@click.option("--compare", "baseline_path", type=click.Path(exists=True, dir_okay=False), default=None, help="JSON results of an earlier run to compare against.")
+def bench(
+    suite: str,
+    only: Tuple[str, ...],
+    repeat: int,
+    task_counts: Tuple[int, ...],
+    csv_sizes: Tuple[str, ...],
+    data_dir: Optional[str],
+    output: Optional[str],
+    baseline_path: Optional[str],
+) -> None:
+    """Measure scheduler overhead and plugin throughput.
+
+    Runs synthetic DAGs of no‑op tasks in several shapes, and CSV ingest
+    and metrics on generated files.  The median time and best throughput
+    of every case are printed; ``--output`` saves all timings as JSON for
+    later ``--compare`` runs.
+    """
+    for size in csv_sizes:
+        try:
+            benchmarks.parse_size(size)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc), param_hint="--csv-size")
+    results = benchmarks.run_benchmarks(
+        suite=suite,
+        only=only,
+        repeat=repeat,
+        task_counts=task_counts or None,
+        csv_sizes=csv_sizes or None,
+        data_dir=Path(data_dir) if data_dir else None,
+        progress=lambda result: click.echo(benchmarks.format_result(result)),
+    )
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        click.echo(f"Results written to {output}")
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        click.echo("")
+        click.echo(benchmarks.format_comparison(benchmarks.compare(baseline, results)))
+
+
+@app.command()
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), default=None, help="Unix socket to listen on.  Defaults to $OPRUN_SOCKET or a per-user socket.")
+@click.option("--port", type=click.IntRange(min=0, max=65535), default=None, help="Listen on this TCP port on 127.0.0.1 instead of a Unix socket.")
+@click.option("--max-runs", type=click.IntRange(min=1), default=None, help="Maximum number of workflows running at once.")
+@click.option("--preload", multiple=True, metavar="MODULE", help="Import this module at start-up and in process workers.  Repeatable.")
+@click.option("--log-dir", type=click.Path(file_okay=False), default=None, help="Directory where logs will be written.  Defaults to ./logs")
+@click.option("--cache-dir", type=click.Path(file_okay=False), default=None, help="Directory of the task result cache.  Defaults to <log-dir>/cache")
+@click.option("--no-cache", is_flag=True, default=False, help="Ignore cached task results and do not store new ones.")
+@click.option("--process-workers", type=int, default=None, help="Start a process pool of this size for tasks with 'executor: process'.")
+@click.option("--max-parallel", type=click.IntRange(min=1), default=None, help="Maximum number of tasks running at once in each workflow.")
+@click.option("--max-tasks", type=click.IntRange(min=1), default=None, help="Maximum number of tasks running at once across all workflows, shared round-robin between runs.")
+@click.option("--resource", multiple=True, metavar="NAME=AMOUNT", help="Host capacity for a resource tag, e.g. memory_gb=32.  Repeatable.")
+@click.option("--profile", is_flag=True, default=False, help="Profile every task with cProfile and save the statistics in the run directory.")
+@_artifact_memory_option
+@click.option("--compact-summary", is_flag=True, default=False, help="Write summary.json without indentation, which is faster for large summaries.")
+@click.option("--no-history", is_flag=True, default=False, help="Do not record runs in the run history or use it to order tasks.")
+@_history_keep_option
+@_no_checkpoint_option
+@_with_broker_options
+@_with_log_options
+def serve(
+    socket_path: Optional[str],
+    port: Optional[int],
+    max_runs: Optional[int],
+    preload: Tuple[str, ...],
+    log_dir: Optional[str],
+    cache_dir: Optional[str],
+    no_cache: bool,
+    process_workers: Optional[int],
+    max_parallel: Optional[int],
+    max_tasks: Optional[int],
+    resource: Tuple[str, ...],
+    profile: bool,
+    artifact_memory: Optional[int],
+    compact_summary: bool,
+    no_history: bool,
+    history_keep: int,
+    no_checkpoint: bool,
+    broker: str,
+    broker_token: Optional[str],
+    workers: int,
+    worker_slots: int,
+    log_level: str,
+    quiet: bool,
+) -> None:
+    """Run a daemon that executes submitted workflows.
+
+    Modules, plugins and the executor pool are loaded once and shared by
+    every workflow submitted with ``oprun submit``.  With
+    ``--process-workers`` the worker processes are started immediately.
+    Submitted runs accept the same profiling, history, checkpoint and
+    remote worker options as ``oprun run``.
+    """
+    capacities = _parse_capacities(resource)
+    preload_modules(WARM_MODULES + preload)
+    orchestrator = Orchestrator(
+        log_root=log_dir,
+        cache_dir=cache_dir,
+        use_cache=not no_cache,
+        process_workers=process_workers,
+        max_parallel=max_parallel,
+        resources=capacities,
+        preload=preload,
+        profile=profile,
+        artifact_memory=artifact_memory,
+        compact_summary=compact_summary,
+        history=not no_history,
+        history_keep=history_keep,
+        checkpoint=not no_checkpoint,
+        broker=broker,
+        broker_token=broker_token,
+        workers=workers,
+        worker_slots=worker_slots,
+        on_broker_start=_broker_announcer(broker, broker_token),
+        **_log_levels(log_level, quiet),
+    )
+    try:
+        if process_workers:
+            orchestrator.executors.warm()
+        server = WorkflowServer(orchestrator, max_runs=max_runs, max_parallel=max_tasks)
+        try:
+            asyncio.run(
+                server.serve(
+                    socket_path=socket_path,
+                    port=port,
+                    ready=lambda address: click.echo(f"oprun server listening on {address}"),
+                )
+            )
+        except RuntimeError as exc:
+            raise click.ClickException(str(exc))
+    finally:
+        orchestrator.close()
+
+
+def _request(message: Dict[str, Any], socket_path: Optional[str], port: Optional[int]) -> Dict[str, Any]:
+    try:
+        response = request(message, socket_path=socket_path, port=port)
+    except ConnectionError as exc:
+        raise click.ClickException(str(exc))
+    if not response.get("ok"):
+        raise click.ClickException(response.get("error", "request failed"))
+    return response
+
+
+def _echo_run(run: Dict[str, Any]) -> None:
+    line = f"{run['id']}  {run['status']:<9}  {run['workflow']}"
+    if run.get("run_dir"):
+        line += f"  -> {run['run_dir']}"
+    click.echo(line)
+    if run.get("error"):
+        click.echo(f"  error: {run['error']}")
+
+
+_server_options = [
+    click.option("--socket", "socket_path", type=click.Path(dir_okay=False), default=None, help="Unix socket of the server.  Defaults to $OPRUN_SOCKET or a per-user socket."),
+    click.option("--port", type=click.IntRange(min=1, max=65535), default=None, help="Connect to a server listening on this TCP port on 127.0.0.1."),
+]
+
+
+def _with_server_options(command: Any) -> Any:
+    for option in reversed(_server_options):
+        command = option(command)
+    return command
+
+
+@app.command()
+@click.argument("workflow_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--wait", is_flag=True, default=False, help="Wait for the run to finish and exit non-zero if it failed.")
+@_with_server_options
+def submit(workflow_path: str, wait: bool, socket_path: Optional[str], port: Optional[int]) -> None:
+    """Submit WORKFLOW_PATH to a running ``oprun serve`` daemon."""
+    message = {"op": "submit", "workflow": os.path.abspath(workflow_path), "wait": wait}
+    run = _request(message, socket_path, port)["run"]
+    _echo_run(run)
+    if wait and run["status"] != "succeeded":
+        raise SystemExit(1)
+
+
+@app.command()
+@click.argument("run_id", required=False)
+@_with_server_options
+def status(run_id: Optional[str], socket_path: Optional[str], port: Optional[int]) -> None:
+    """Show the runs known to the daemon, or only RUN_ID."""
+    response = _request({"op": "status", "run_id": run_id}, socket_path, port)
+    for run in [response["run"]] if run_id else response["runs"]:
+        _echo_run(run)
+
+
+@app.command()
+@_with_server_options
+def shutdown(socket_path: Optional[str], port: Optional[int]) -> None:
+    """Stop the daemon once its running workflows have finished."""
+    _request({"op": "shutdown"}, socket_path, port)
+    click.echo("oprun server is shutting down")
 
 
 @app.command(name="list-plugins")
-def list_plugins() -> None:
-    """List all built‑in plugins available to workflows."""
+@click.option("--verbose", "-v", is_flag=True, default=False, help="Also show where each plugin is imported from.")
+def list_plugins(verbose: bool) -> None:
+    """List the built‑in and installed plugins available to workflows.
+
+    Plugins are not imported, so this does not load their dependencies.
+    """
     click.echo("Available plugins:")
-    for name in sorted(PLUGINS):
-        click.echo(f"- {name}")
+    for name, spec in sorted(PLUGINS.specs().items()):
+        if verbose:
+            click.echo(f"- {name}  {spec.target}  ({spec.source})")
+        else:
+            click.echo(f"- {name}")
 
 
 @app.command(name="copy-example")
@@ -67,5 +602,44 @@ def copy_example(destination: str) -> None:
     click.echo(f"Example workflow copied to {dest}")
 
 
+@app.group(name="csv-cache")
+def csv_cache() -> None:
+    """Manage the columnar sidecar cache used by ``csv_ingest``."""
+
+
+@csv_cache.command(name="warm")
+@click.argument("workflow_paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+def csv_cache_warm(workflow_paths: Tuple[str, ...]) -> None:
+    """Parse the CSV inputs of WORKFLOW_PATHS into the columnar cache.
+
+    Every ``csv_ingest`` task configured with ``columnar_cache: true`` is
+    ingested once with exactly its workflow options, so the next run of
+    the workflow maps the parsed columns instead of reading the CSV.
+    """
+    from .plugins import CSVIngestPlugin
+
+    plugin = CSVIngestPlugin()
+    for workflow_path in workflow_paths:
+        for tid, task in load_workflow(workflow_path)["tasks"].items():
+            if task["plugin"] != CSVIngestPlugin.name or not task["config"].get("columnar_cache"):
+                continue
+            result = plugin.run(task["config"], {})
+            click.echo(f"{tid}: {result['columnar_cache']} ({result['rows']} rows, {result['seconds']:.2f}s)")
+
+
+@csv_cache.command(name="prune")
+@click.option("--cache-dir", type=click.Path(file_okay=False), default=None, help="Cache directory.  Defaults to $OPRUN_COLUMNAR_CACHE or the user cache directory.")
+@click.option("--older-than", type=float, default=None, metavar="DAYS", help="Also remove entries not used for this many days.")
+@click.option("--all", "remove_all", is_flag=True, default=False, help="Remove every entry.")
+def csv_cache_prune(cache_dir: Optional[str], older_than: Optional[float], remove_all: bool) -> None:
+    """Remove cache entries whose source CSV changed or disappeared."""
+    cache = ColumnarCache(cache_dir)
+    removed = cache.prune(
+        remove_all=remove_all,
+        older_than=older_than * 86400 if older_than is not None else None,
+    )
+    click.echo(f"Removed {removed} entries from {cache.root}")
+
+
 if __name__ == "__main__":
     app(prog_name="oprun")
\ No newline at end of file
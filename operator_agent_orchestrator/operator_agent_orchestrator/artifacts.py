@@ -0,0 +1,385 @@
+"""Namespaced store of the values tasks publish during a run.
+
+Plugins publish intermediate values by writing to their ``context``, for
+example ``context["dataframe"] = df``.  Each write is stored as an
+*artifact* keyed by the writing task's ID and the output name, so two
+tasks publishing the same name no longer overwrite each other.  A task
+reading ``context["dataframe"]`` gets the ``dataframe`` output of its
+first dependency that published one; outputs of other tasks are reached
+with a qualified key, ``context["<task>/<name>"]``.  For compatibility
+with workflows written for the flat context, a name no dependency
+published falls back to the most recent task that did, and a task ID
+still returns that task's result.
+
+Each attempt at running a task writes under an attempt token from
+:meth:`ArtifactStore.begin_attempt`.  Once an attempt is abandoned, for
+example because it timed out and is being retried, writes carrying its
+token are dropped, so a thread that is still running cannot overwrite
+what a later attempt published.
+
+The store counts the tasks that depend on each producer.  Once all of
+them have finished, the producer's artifacts are freed.  Artifacts of
+tasks that nothing depends on are kept until the run ends.
+
+DataFrames are handed to readers as read‑only views that share the
+stored data; writing into a view raises instead of changing what other
+tasks see.  Every read gets its own view, so adding, replacing or
+deleting columns only changes that reader's frame.  When the DataFrames and arrays held in memory exceed
+``memory_limit`` bytes, the largest are written to memory‑mapped files
+(see :class:`~operator_agent_orchestrator.executors.FrameHandle`) and
+dropped from memory.  Later readers map them back without reading them
+into memory.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import shutil
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional, Sequence, Tuple
+
+from .executors import FrameHandle
+
+
+def default_memory_limit() -> Optional[int]:
+    """A quarter of physical memory, or None if it cannot be determined."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 4
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _nbytes(value: Any) -> int:
+    # Only frames and arrays are counted; other values are assumed small
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    return 0
+
+
+class _FrameData:
+    """Read‑only columns of a DataFrame, wrapped anew for every reader."""
+
+    __slots__ = ("data", "columns", "index")
+
+    def __init__(self, data: Dict[int, Any], columns: Any, index: Any) -> None:
+        self.data = data
+        self.columns = columns
+        self.index = index
+
+
+def _readonly_data(value: Any) -> Any:
+    # The part of a view that can be shared between readers
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    pd = sys.modules.get("pandas")
+    if pd is None or not isinstance(value, pd.DataFrame):
+        return value
+    data: Dict[int, Any] = {}
+    for pos in range(value.shape[1]):
+        series = value.iloc[:, pos]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM":
+            array = series.to_numpy(copy=False).view()
+            array.flags.writeable = False
+            data[pos] = array
+        else:
+            data[pos] = series
+    return _FrameData(data, value.columns, value.index)
+
+
+def _wrap(shared: Any) -> Any:
+    # A reader's own object around the shared read-only data
+    if isinstance(shared, _FrameData):
+        pd = sys.modules["pandas"]
+        view = pd.DataFrame(shared.data, copy=False)
+        view.columns = shared.columns
+        view.index = shared.index
+        return view
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(shared, np.ndarray):
+        return shared.view()
+    return shared
+
+
+def readonly_view(value: Any) -> Any:
+    """Return a read‑only view of a DataFrame or array sharing its data.
+
+    Other values are returned unchanged.
+    """
+    return _wrap(_readonly_data(value))
+
+
+class _Artifact:
+    __slots__ = ("value", "view", "handle", "nbytes")
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+        self.view: Any = None
+        self.handle: Optional[FrameHandle] = None
+        self.nbytes = _nbytes(value)
+
+
+class ArtifactStore:
+    """Artifacts of one run keyed by task ID and output name.
+
+    Safe to use from several threads at once.
+
+    Parameters
+    ----------
+    spill_dir:
+        Directory receiving spilled artifacts.  Created on first spill and
+        removed by :meth:`close`.
+    memory_limit:
+        Bytes of DataFrames and arrays kept in memory before the largest
+        are spilled.  None disables spilling.
+    """
+
+    def __init__(self, spill_dir: Path, memory_limit: Optional[int] = None) -> None:
+        self.spill_dir = Path(spill_dir)
+        self.memory_limit = memory_limit
+        self.in_memory = 0
+        self.spilled = 0
+        self._artifacts: Dict[Tuple[str, str], _Artifact] = {}
+        self._names: Dict[str, Dict[str, None]] = {}
+        self._latest: Dict[str, str] = {}
+        self._consumers: Dict[str, int] = {}
+        # Current attempt of each task running under an attempt token
+        self._attempts: Dict[str, int] = {}
+        self._tokens = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def begin_attempt(self, task_id: str) -> int:
+        """Start a new attempt of ``task_id`` and return its token.
+
+        Outputs left by earlier attempts are dropped, and so are later
+        writes made with their tokens.
+        """
+        with self._lock:
+            for name in list(self._names.get(task_id, ())):
+                self.delete(task_id, name)
+            token = self._attempts[task_id] = next(self._tokens)
+            return token
+
+    def end_attempt(self, task_id: str, token: int) -> None:
+        """Drop further writes of the attempt ``token`` of ``task_id``."""
+        with self._lock:
+            if self._attempts.get(task_id) == token:
+                del self._attempts[task_id]
+
+    def _superseded(self, task_id: str, attempt: Optional[int]) -> bool:
+        return attempt is not None and self._attempts.get(task_id) != attempt
+
+    def retain(self, task_id: str, consumers: int) -> None:
+        """Keep the artifacts of ``task_id`` until ``consumers`` tasks release them."""
+        with self._lock:
+            self._consumers[task_id] = consumers
+
+    def release(self, task_id: str) -> None:
+        """Record that one consumer of ``task_id`` finished."""
+        with self._lock:
+            left = self._consumers.get(task_id)
+            if left is None:
+                return
+            if left > 1:
+                self._consumers[task_id] = left - 1
+                return
+            del self._consumers[task_id]
+            for name in list(self._names.get(task_id, ())):
+                self._free(task_id, name)
+            self._names.pop(task_id, None)
+
+    def put(self, task_id: str, name: str, value: Any, attempt: Optional[int] = None) -> None:
+        """Store ``value`` as output ``name`` of ``task_id``.
+
+        Ignored if ``attempt`` is a token that is no longer the task's
+        current attempt.
+        """
+        with self._lock:
+            if self._superseded(task_id, attempt):
+                return
+            if (task_id, name) in self._artifacts:
+                self._free(task_id, name)
+            artifact = _Artifact(value)
+            self._artifacts[(task_id, name)] = artifact
+            self._names.setdefault(task_id, {})[name] = None
+            self._latest[name] = task_id
+            self.in_memory += artifact.nbytes
+            if self.memory_limit is not None and self.in_memory > self.memory_limit:
+                self._spill()
+
+    def publish(self, task_id: str, values: Dict[str, Any]) -> None:
+        """Store every entry of ``values`` as an output of ``task_id``."""
+        for name, value in values.items():
+            self.put(task_id, name, value)
+
+    def delete(self, task_id: str, name: str, attempt: Optional[int] = None) -> None:
+        """Remove output ``name`` of ``task_id``, unless ``attempt`` is superseded."""
+        with self._lock:
+            if self._superseded(task_id, attempt):
+                return
+            if (task_id, name) not in self._artifacts:
+                raise KeyError(name)
+            self._free(task_id, name)
+            self._names.get(task_id, {}).pop(name, None)
+
+    def has(self, task_id: str, name: str) -> bool:
+        """Whether ``task_id`` has an output ``name`` that is still held."""
+        return (task_id, name) in self._artifacts
+
+    def get(self, task_id: str, name: str) -> Any:
+        """Return a read‑only view of output ``name`` of ``task_id``.
+
+        Raises
+        ------
+        KeyError
+            If the task has no such output, or it was freed.
+        """
+        with self._lock:
+            artifact = self._artifacts[(task_id, name)]
+            if artifact.view is None:
+                value = artifact.value if artifact.handle is None else artifact.handle.load()
+                artifact.view = _readonly_data(value)
+            return _wrap(artifact.view)
+
+    def names(self, task_id: str) -> List[str]:
+        """Output names of ``task_id`` still held."""
+        return list(self._names.get(task_id, ()))
+
+    def outputs(self, task_id: str) -> Dict[str, Any]:
+        """All outputs of ``task_id`` as read‑only views."""
+        return {name: self.get(task_id, name) for name in self.names(task_id)}
+
+    def latest(self, name: str) -> Optional[str]:
+        """The task that most recently published ``name``, if still held."""
+        return self._latest.get(name)
+
+    def published_names(self) -> List[str]:
+        """Every output name held for any task."""
+        with self._lock:
+            names: Dict[str, None] = {}
+            for outputs in self._names.values():
+                names.update(outputs)
+            return list(names)
+
+    def close(self) -> None:
+        """Drop every artifact and remove spilled files."""
+        with self._lock:
+            self._artifacts.clear()
+            self._names.clear()
+            self._latest.clear()
+            self.in_memory = 0
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _free(self, task_id: str, name: str) -> None:
+        artifact = self._artifacts.pop((task_id, name))
+        if artifact.handle is None:
+            self.in_memory -= artifact.nbytes
+        else:
+            # Live views keep their mappings valid after the files go
+            shutil.rmtree(artifact.handle.directory, ignore_errors=True)
+        if self._latest.get(name) == task_id:
+            del self._latest[name]
+
+    def _spill(self) -> None:
+        pd = sys.modules.get("pandas")
+        if pd is None:
+            return
+        candidates = sorted(
+            (
+                artifact
+                for artifact in self._artifacts.values()
+                if artifact.handle is None and isinstance(artifact.value, pd.DataFrame) and artifact.nbytes
+            ),
+            key=lambda artifact: artifact.nbytes,
+            reverse=True,
+        )
+        for artifact in candidates:
+            if self.in_memory <= self.memory_limit:
+                break
+            artifact.handle = FrameHandle.export(artifact.value, self.spill_dir / uuid.uuid4().hex)
+            self.in_memory -= artifact.nbytes
+            self.spilled += 1
+            artifact.value = None
+            artifact.view = None
+
+
+class ArtifactView(MutableMapping):
+    """The context a task sees, backed by an :class:`ArtifactStore`.
+
+    Parameters
+    ----------
+    store:
+        The run's artifacts.
+    task_id:
+        Task whose writes are stored.
+    depends_on:
+        Tasks whose outputs are found by their bare names, in order of
+        precedence.
+    results:
+        Results of finished tasks, found by task ID.
+    attempt:
+        Token of the attempt writing through this view, from
+        :meth:`ArtifactStore.begin_attempt`.  Its writes are dropped once
+        the attempt is superseded.
+    """
+
+    def __init__(
+        self,
+        store: ArtifactStore,
+        task_id: str,
+        depends_on: Sequence[str],
+        results: Dict[str, Any],
+        attempt: Optional[int] = None,
+    ) -> None:
+        self._store = store
+        self._task_id = task_id
+        self._depends_on = depends_on
+        self._results = results
+        self._attempt = attempt
+
+    def __getitem__(self, key: str) -> Any:
+        store = self._store
+        owner, sep, name = key.partition("/")
+        if sep and store.has(owner, name):
+            return store.get(owner, name)
+        for dep in self._depends_on:
+            if store.has(dep, key):
+                return store.get(dep, key)
+        if key in self._results:
+            return self._results[key]
+        if store.has(self._task_id, key):
+            return store.get(self._task_id, key)
+        latest = store.latest(key)
+        if latest is not None:
+            try:
+                return store.get(latest, key)
+            except KeyError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._store.put(self._task_id, key, value, attempt=self._attempt)
+
+    def __delitem__(self, key: str) -> None:
+        self._store.delete(self._task_id, key, attempt=self._attempt)
+
+    def _keys(self) -> Dict[str, None]:
+        keys: Dict[str, None] = dict.fromkeys(self._results)
+        keys.update(dict.fromkeys(self._store.published_names()))
+        return keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
@@ -0,0 +1,489 @@
+"""Benchmarks for scheduler overhead and plugin throughput.
+
+``oprun bench`` runs a suite of benchmarks and reports how long each case
+took.  The results can be written as JSON and compared against the output
+of an earlier release with ``--compare``.
+
+Cases are named ``<group>/<variant>/<size>``:
+
+``startup/<command>``
+    Running an ``oprun`` subcommand in a fresh interpreter.  The result's
+    ``params`` also record the total import time measured with
+    ``python -X importtime``, the number of modules imported and whether
+    pandas was among them.
+``scheduler/<shape>/<tasks>``
+    :func:`~operator_agent_orchestrator.orchestrator._dispatch` over a
+    synthetic DAG whose tasks do nothing, isolating the cost of dependency
+    tracking and dispatch.
+``load/<shape>/<tasks>``
+    Parsing, validating and sorting a generated workflow file.
+``plan/<shape>/<tasks>``
+    Loading the same workflow file through a warm
+    :class:`~operator_agent_orchestrator.plans.PlanCache`.
+``workflow/<shape>/<tasks>``
+    A full :class:`~operator_agent_orchestrator.Orchestrator` run of the
+    generated workflow using the ``noop`` plugin, including logging to the
+    run directory (but not the console), tracing and writing the summary.
+``csv_ingest/<mode>/<size>`` and ``metrics/<mode>/<size>``
+    Reading a synthetic CSV file of the given size eagerly or in
+    partitions, and summarising it with the ``metrics`` plugin.
+
+DAG shapes are generated by :func:`generate_dag`: ``wide`` (one root with
+every other task depending on it), ``deep`` (a single chain), ``diamond``
+(a chain of fan‑out/fan‑in blocks) and ``random`` (each task depends on
+up to three earlier tasks).  CSV files are generated once into the data
+directory and reused by later runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .orchestrator import Orchestrator, _dispatch, load_workflow
+from .plans import PlanCache
+
+#: DAG shapes understood by :func:`generate_dag`.
+SHAPES = ("wide", "deep", "diamond", "random")
+
+#: Task counts and CSV sizes of the predefined suites.
+SUITES: Dict[str, Dict[str, Tuple[Any, ...]]] = {
+    "quick": {"tasks": (100, 1000), "csv_sizes": ("1MB",)},
+    "full": {"tasks": (1000, 10000, 50000), "csv_sizes": ("1MB", "100MB", "1GB")},
+}
+
+#: Subcommands whose start‑up time is measured, by case name.
+STARTUP_COMMANDS: Dict[str, Tuple[str, ...]] = {
+    "help": ("--help",),
+    "list-plugins": ("list-plugins",),
+    "run-help": ("run", "--help"),
+}
+
+#: Files larger than this are only benchmarked in partitions.
+EAGER_LIMIT = 256 * 1024 * 1024
+
+#: Rows per partition for the partitioned CSV cases.
+CHUNK_ROWS = 1_000_000
+
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+
+def parse_size(text: str) -> int:
+    """Convert a size such as ``100MB`` or ``1GB`` to bytes."""
+    value = text.strip().upper()
+    for unit in ("KB", "MB", "GB", "B"):
+        if value.endswith(unit):
+            number = value[: -len(unit)].strip()
+            try:
+                return int(float(number) * _UNITS[unit])
+            except ValueError:
+                break
+    raise ValueError(f"Invalid size '{text}'; expected a number followed by B, KB, MB or GB")
+
+
+def generate_dag(
+    shape: str,
+    n: int,
+    seed: int = 0,
+    plugin: str = "noop",
+    executor: str = "inline",
+) -> Dict[str, Dict[str, Any]]:
+    """Generate ``n`` tasks forming a DAG of the given ``shape``.
+
+    The tasks use the normalised form returned by
+    :func:`~operator_agent_orchestrator.orchestrator.load_workflow` and are
+    listed in topological order.  ``seed`` only affects the ``random``
+    shape.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown DAG shape '{shape}'; expected one of {', '.join(SHAPES)}")
+    deps: List[List[int]] = []
+    if shape == "wide":
+        deps = [[]] + [[0] for _ in range(n - 1)]
+    elif shape == "deep":
+        deps = [[]] + [[i - 1] for i in range(1, n)]
+    elif shape == "diamond":
+        width = 8
+        join = 0
+        middle: List[int] = []
+        for i in range(n):
+            if i == 0:
+                deps.append([])
+            elif len(middle) < width:
+                deps.append([join])
+                middle.append(i)
+            else:
+                deps.append(middle)
+                join, middle = i, []
+    else:
+        rng = random.Random(seed)
+        for i in range(n):
+            deps.append(sorted(rng.sample(range(i), rng.randint(0, min(3, i)))))
+    return {
+        f"t{i}": {
+            "plugin": plugin,
+            "executor": executor,
+            "config": {},
+            "depends_on": [f"t{d}" for d in task_deps],
+            "cache": False,
+            "resources": {},
+        }
+        for i, task_deps in enumerate(deps[:n])
+    }
+
+
+def write_workflow(tasks: Dict[str, Dict[str, Any]], path: Path, name: str = "bench") -> None:
+    """Write generated ``tasks`` as a workflow file."""
+    definition = {
+        "name": name,
+        "tasks": [
+            {"id": tid, "plugin": t["plugin"], "executor": t["executor"], "depends_on": t["depends_on"]}
+            for tid, t in tasks.items()
+        ],
+    }
+    # JSON is valid YAML and much faster to write for large workflows
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(definition, f)
+
+
+def make_csv(path: Path, nbytes: int, seed: int = 0) -> int:
+    """Create a CSV file of at least ``nbytes`` unless it already exists.
+
+    Returns the number of data rows in the file.
+    """
+    import numpy as np  # type: ignore
+    import pandas as pd  # type: ignore
+
+    rows_file = path.with_suffix(".rows")
+    if path.exists() and rows_file.exists() and path.stat().st_size >= nbytes:
+        return int(rows_file.read_text())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    regions = np.array(["north", "south", "east", "west", "central", "online", "export", "other"])
+    tmp = path.with_suffix(".tmp")
+    rows = 0
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write("id,amount,quantity,score,region\n")
+        while f.tell() < nbytes:
+            # Rows take a little over 30 bytes; avoid overshooting small files
+            size = max(1000, min(100_000, (nbytes - f.tell()) // 30 + 1))
+            chunk = pd.DataFrame(
+                {
+                    "id": np.arange(rows, rows + size),
+                    "amount": rng.gamma(2.0, 50.0, size).round(2),
+                    "quantity": rng.integers(1, 100, size),
+                    "score": rng.normal(0.0, 1.0, size).round(4),
+                    "region": regions[rng.integers(0, len(regions), size)],
+                }
+            )
+            chunk.to_csv(f, header=False, index=False)
+            rows += size
+    os.replace(tmp, path)
+    rows_file.write_text(str(rows))
+    return rows
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _result(group: str, params: Dict[str, Any], times: List[float], amount: float, unit: str) -> Dict[str, Any]:
+    best = min(times)
+    return {
+        "group": group,
+        "params": params,
+        "repeat": len(times),
+        "times": times,
+        "min": best,
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "throughput": amount / best if best > 0 else None,
+        "unit": unit,
+    }
+
+
+def _cli_command(args: Iterable[str], *options: str) -> Tuple[List[str], Dict[str, str]]:
+    # Make this copy of the package importable in the child interpreter
+    root = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    return [sys.executable, *options, "-m", __package__, *args], env
+
+
+def import_profile(args: Iterable[str]) -> Dict[str, Any]:
+    """Run ``oprun <args>`` under ``-X importtime`` and summarise its imports.
+
+    Returns the total import time in seconds, the number of modules
+    imported and the sorted names of the top‑level packages.
+    """
+    command, env = _cli_command(args, "-X", "importtime")
+    completed = subprocess.run(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+    total_us = 0
+    modules: List[str] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = [part.strip() for part in line[len("import time:"):].split("|")]
+        total_us += int(self_us)
+        modules.append(module)
+    return {
+        "seconds": total_us / 1e6,
+        "modules": len(modules),
+        "packages": sorted({module.split(".")[0] for module in modules}),
+    }
+
+
+def bench_startup(name: str, repeat: int) -> Dict[str, Any]:
+    args = STARTUP_COMMANDS[name]
+    command, env = _cli_command(args)
+    times = _timed(
+        lambda: subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True), repeat
+    )
+    imports = import_profile(args)
+    params = {
+        "command": " ".join(args),
+        "import_seconds": imports["seconds"],
+        "modules": imports["modules"],
+        "pandas": "pandas" in imports["packages"],
+    }
+    return _result("startup", params, times, 1, "runs/s")
+
+
+def bench_scheduler(shape: str, n: int, repeat: int) -> Dict[str, Any]:
+    tasks = generate_dag(shape, n)
+
+    async def run_task(task_id: str) -> None:
+        return None
+
+    async def measure() -> List[float]:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await _dispatch(tasks, run_task)
+            times.append(time.perf_counter() - start)
+        return times
+
+    return _result("scheduler", {"shape": shape, "tasks": n}, asyncio.run(measure()), n, "tasks/s")
+
+
+def bench_load(shape: str, n: int, repeat: int, workdir: Path) -> Dict[str, Any]:
+    path = workdir / f"{shape}-{n}.yaml"
+    write_workflow(generate_dag(shape, n), path)
+    times = _timed(lambda: load_workflow(str(path)), repeat)
+    return _result("load", {"shape": shape, "tasks": n}, times, n, "tasks/s")
+
+
+def bench_plan(shape: str, n: int, repeat: int, workdir: Path) -> Dict[str, Any]:
+    path = workdir / f"{shape}-{n}.yaml"
+    write_workflow(generate_dag(shape, n), path)
+    plans = PlanCache(workdir / "plans")
+    load_workflow(str(path), plan_cache=plans)
+    times = _timed(lambda: load_workflow(str(path), plan_cache=plans), repeat)
+    return _result("plan", {"shape": shape, "tasks": n}, times, n, "tasks/s")
+
+
+def bench_workflow(shape: str, n: int, repeat: int, workdir: Path) -> Dict[str, Any]:
+    path = workdir / f"{shape}-{n}.yaml"
+    write_workflow(generate_dag(shape, n), path)
+    log_root = workdir / "logs"
+
+    def run() -> None:
+        orchestrator = Orchestrator(log_root=str(log_root), use_cache=False, console_level=None)
+        try:
+            orchestrator.run_workflow(str(path))
+        finally:
+            orchestrator.close()
+            shutil.rmtree(log_root, ignore_errors=True)
+
+    times = _timed(run, repeat)
+    return _result("workflow", {"shape": shape, "tasks": n}, times, n, "tasks/s")
+
+
+def bench_csv(
+    label: str, nbytes: int, chunked: bool, repeat: int, data_dir: Path
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Benchmark ``csv_ingest`` followed by ``metrics`` on one file size."""
+    from .plugins import CSVIngestPlugin, MetricsPlugin
+
+    path = data_dir / f"bench-{label}.csv"
+    rows = make_csv(path, nbytes)
+    size_mb = path.stat().st_size / 1024**2
+    mode = "chunked" if chunked else "eager"
+    config: Dict[str, Any] = {"path": str(path)}
+    if chunked:
+        config["chunksize"] = CHUNK_ROWS
+    context: Dict[str, Any] = {}
+    ingest_times = _timed(lambda: CSVIngestPlugin().run(config, context), repeat)
+    metrics_config = {"quantiles": [0.05, 0.95]}
+    metrics_times = _timed(lambda: MetricsPlugin().run(metrics_config, context), repeat)
+    params = {"mode": mode, "size": label, "bytes": path.stat().st_size, "rows": rows}
+    return (
+        _result("csv_ingest", params, ingest_times, size_mb, "MB/s"),
+        _result("metrics", params, metrics_times, size_mb, "MB/s"),
+    )
+
+
+def _metadata(suite: str) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {
+        "suite": suite,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+    for key, package in (
+        ("version", "operator_agent_orchestrator"),
+        ("pandas", "pandas"),
+        ("numpy", "numpy"),
+        ("pyyaml", "PyYAML"),
+    ):
+        try:
+            meta[key] = version(package)
+        except PackageNotFoundError:
+            meta[key] = None
+    return meta
+
+
+def run_benchmarks(
+    suite: str = "quick",
+    only: Iterable[str] = (),
+    repeat: int = 3,
+    task_counts: Optional[Iterable[int]] = None,
+    csv_sizes: Optional[Iterable[str]] = None,
+    data_dir: Optional[Path] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run a benchmark suite and return its results.
+
+    Parameters
+    ----------
+    suite:
+        Name of a predefined suite in :data:`SUITES`.
+    only:
+        Glob patterns; when given, only cases whose name matches one of
+        them are run (for example ``scheduler/*``).
+    repeat:
+        Number of timed repetitions per case.
+    task_counts, csv_sizes:
+        Override the DAG sizes and CSV sizes of the suite.
+    data_dir:
+        Directory holding generated CSV files.  Defaults to a temporary
+        directory that is removed afterwards.
+    progress:
+        Called with each result as soon as its case finishes.
+
+    Returns
+    -------
+    Dict[str, Any]
+        ``{"metadata": {...}, "results": [...]}`` where every result has a
+        ``name``, its ``params``, the individual ``times`` in seconds,
+        their ``min``, ``median`` and ``mean``, and a ``throughput`` in
+        ``unit`` based on the fastest repetition.
+    """
+    if suite not in SUITES:
+        raise ValueError(f"Unknown suite '{suite}'; expected one of {', '.join(SUITES)}")
+    counts = list(task_counts or SUITES[suite]["tasks"])
+    sizes = list(csv_sizes or SUITES[suite]["csv_sizes"])
+    patterns = list(only)
+
+    def selected(name: str) -> bool:
+        return not patterns or any(fnmatch.fnmatchcase(name, p) for p in patterns)
+
+    results: List[Dict[str, Any]] = []
+
+    def record(name: str, result: Dict[str, Any]) -> None:
+        result = {"name": name, **result}
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    for command in STARTUP_COMMANDS:
+        name = f"startup/{command}"
+        if selected(name):
+            record(name, bench_startup(command, repeat))
+    with tempfile.TemporaryDirectory(prefix="oprun-bench-") as tmp:
+        workdir = Path(tmp)
+        for n in counts:
+            for shape in SHAPES:
+                for group, bench in (
+                    ("scheduler", lambda: bench_scheduler(shape, n, repeat)),
+                    ("load", lambda: bench_load(shape, n, repeat, workdir)),
+                    ("plan", lambda: bench_plan(shape, n, repeat, workdir)),
+                    ("workflow", lambda: bench_workflow(shape, n, repeat, workdir)),
+                ):
+                    name = f"{group}/{shape}/{n}"
+                    if selected(name):
+                        record(name, bench())
+        csv_dir = Path(data_dir) if data_dir else workdir / "data"
+        for label in sizes:
+            nbytes = parse_size(label)
+            for chunked in (False, True):
+                if not chunked and nbytes > EAGER_LIMIT:
+                    continue
+                mode = "chunked" if chunked else "eager"
+                names = (f"csv_ingest/{mode}/{label}", f"metrics/{mode}/{label}")
+                if not any(selected(name) for name in names):
+                    continue
+                for name, result in zip(names, bench_csv(label, nbytes, chunked, repeat, csv_dir)):
+                    if selected(name):
+                        record(name, result)
+    return {"metadata": _metadata(suite), "results": results}
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Match the cases of two result sets and compute median speedups.
+
+    A ``speedup`` above 1 means the case got faster since ``baseline``.
+    """
+    before = {result["name"]: result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        rows.append(
+            {
+                "name": result["name"],
+                "baseline": old["median"],
+                "current": result["median"],
+                "speedup": old["median"] / result["median"] if result["median"] > 0 else None,
+            }
+        )
+    return rows
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    throughput = result["throughput"]
+    rate = f"{throughput:,.1f} {result['unit']}" if throughput is not None else "-"
+    return f"{result['name']:<32} {result['median'] * 1000:>11.2f} ms  {rate:>20}"
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'case':<32} {'baseline':>12} {'current':>12} {'speedup':>8}"]
+    for row in rows:
+        speedup = f"{row['speedup']:.2f}x" if row["speedup"] is not None else "-"
+        lines.append(
+            f"{row['name']:<32} {row['baseline'] * 1000:>9.2f} ms {row['current'] * 1000:>9.2f} ms {speedup:>8}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,225 @@
+"""Content‑addressed cache for task results.
+
+Tasks that opt in with ``cache: true`` are keyed on a hash of their plugin
+name, configuration, the fingerprints of their upstream tasks and any
+input fingerprint reported by the plugin (for example the modification
+time and size of the file read by ``csv_ingest``).  When a matching entry
+exists the orchestrator skips the plugin entirely and replays the cached
+result, together with any values the task published into the shared
+context.
+
+Entries are pickled into a directory tree on disk.  Reading an entry bumps
+its modification time so that, once the store grows beyond its size
+limit, the least recently used entries are evicted first.  The store's
+size is scanned once and then tracked as entries are written, so only a
+write that takes it over the limit walks the directory tree again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+#: Default upper bound on the total size of the on‑disk store (2 GiB).
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def digest(value: Any) -> str:
+    """Return a stable SHA‑256 hex digest of a JSON‑like value."""
+    return hashlib.sha256(_canonical(value).encode("utf-8")).hexdigest()
+
+
+def task_key(
+    plugin_name: str,
+    config: Dict[str, Any],
+    upstream: Dict[str, str],
+    inputs: Any = None,
+) -> str:
+    """Compute the cache key for a task.
+
+    Parameters
+    ----------
+    plugin_name:
+        Name of the plugin implementing the task.
+    config:
+        The task's configuration dictionary.
+    upstream:
+        Mapping of dependency IDs to their fingerprints.
+    inputs:
+        Optional plugin‑specific fingerprint of external inputs.
+    """
+    return digest(
+        {
+            "plugin": plugin_name,
+            "config": config,
+            "upstream": upstream,
+            "inputs": inputs,
+        }
+    )
+
+
+class RecordingContext(MutableMapping):
+    """View of the shared context that records what a task publishes.
+
+    Reads and writes go straight through to the underlying dictionary;
+    writes are additionally remembered in :attr:`published` so that they
+    can be stored alongside the task's result and replayed on a cache hit.
+    Entries of ``overlay`` are seen by this task only and take precedence
+    over the shared context when read.
+    """
+
+    def __init__(self, context: Dict[str, Any], overlay: Optional[Dict[str, Any]] = None) -> None:
+        self._context = context
+        self._overlay = overlay or {}
+        self.published: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._overlay:
+            return self._overlay[key]
+        return self._context[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._context[key] = value
+        self.published[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._context[key]
+        self.published.pop(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        if not self._overlay:
+            return iter(self._context)
+        return iter({**self._context, **self._overlay})
+
+    def __len__(self) -> int:
+        if not self._overlay:
+            return len(self._context)
+        return len(self._context.keys() | self._overlay.keys())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a shallow copy of the underlying context."""
+        return {**self._context, **self._overlay}
+
+
+class TaskCache:
+    """On‑disk store of task results with size‑based LRU eviction.
+
+    Parameters
+    ----------
+    root:
+        Directory holding the cache entries.  Created on demand.
+    max_bytes:
+        Total size the store may occupy before the least recently used
+        entries are evicted.
+    """
+
+    def __init__(self, root: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        # Running total of the store's size, None until first scanned.
+        # Entries written by other processes are picked up by the scan
+        # that each eviction starts with.
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Return ``(result, published)`` for ``key`` or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # A corrupt or incompatible entry is treated as a miss
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return entry["result"], entry["published"]
+
+    def put(self, key: str, result: Any, published: Dict[str, Any]) -> bool:
+        """Store an entry, returning False if it could not be pickled."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        stored = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    {"result": result, "published": published},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+                written = f.tell()
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+            stored = True
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        finally:
+            if not stored:
+                # Also reached on OSError, e.g. a full disk
+                Path(tmp).unlink(missing_ok=True)
+        with self._lock:
+            if self._size is None:
+                self._size = self.size()
+            else:
+                self._size += written - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+        return True
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        if not self.root.exists():
+            return entries
+        for path in self.root.glob("*/*.pkl"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        """Return the total size in bytes of all stored entries."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Remove least recently used entries until under ``max_bytes``."""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    path.unlink(missing_ok=True)
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._size = total
+
+    def clear(self) -> None:
+        """Delete every entry in the store."""
+        with self._lock:
+            if self.root.exists():
+                shutil.rmtree(self.root)
+            self._size = 0
@@ -0,0 +1,137 @@
+"""Per‑task checkpoints of a workflow run.
+
+As each task finishes successfully, its result, the values it published
+into the shared context and its cache fingerprint are appended to
+``checkpoints.pkl`` in the run directory.  Each record is pickled in full
+and then written with a single append behind a header holding its length
+and CRC‑32, so a run killed at any moment loses at most the record being
+written; a torn or garbled record at the end of the file is recognised by
+its header and discarded when the checkpoints are loaded.  Records with
+published values, whose pickles can be large, are synced to disk before
+:meth:`Checkpoints.save` returns; the rest are synced when the file is
+closed at the end of the run.
+
+Workflows or tasks with ``checkpoint: false`` are not checkpointed, which
+saves writing large published values such as DataFrames a second time when
+runs are never resumed.  The run directory also keeps
+the compiled plan of the workflow (``workflow.plan``), so that
+``oprun resume`` continues exactly the workflow that was started even if
+its YAML file has changed since.
+
+Failed tasks are not checkpointed; resuming a run restores the
+checkpointed tasks and executes the rest.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import IO, Any, Dict, Optional, Union
+
+#: Append‑only file of task checkpoints inside a run directory.
+CHECKPOINT_FILE = "checkpoints.pkl"
+
+#: Compiled plan of the workflow, stored in the run directory.
+PLAN_FILE = "workflow.plan"
+
+# Length and CRC-32 of the pickle following it
+_RECORD = struct.Struct(">QI")
+
+
+class Checkpoints:
+    """Checkpoints of the tasks of one run.
+
+    Parameters
+    ----------
+    run_dir:
+        Run directory holding ``checkpoints.pkl``.
+    """
+
+    def __init__(self, run_dir: Union[str, Path]) -> None:
+        self.path = Path(run_dir) / CHECKPOINT_FILE
+        self._lock = threading.Lock()
+        self._file: Optional[IO[bytes]] = None
+
+    def save(
+        self,
+        task_id: str,
+        result: Any,
+        published: Dict[str, Any],
+        fingerprint: Optional[str] = None,
+    ) -> bool:
+        """Append a finished task, returning False if it could not be pickled.
+
+        Safe to call from several threads at once.  The record reaches the
+        operating system before this returns, so it survives the process
+        being killed; a record with ``published`` values is also synced to
+        disk.
+        """
+        try:
+            record = pickle.dumps(
+                {"task": task_id, "result": result, "published": published, "fingerprint": fingerprint},
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        header = _RECORD.pack(len(record), zlib.crc32(record))
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+            self._file.write(header + record)
+            self._file.flush()
+            if published:
+                os.fsync(self._file.fileno())
+        return True
+
+    def close(self) -> None:
+        """Sync and close the checkpoint file; later saves reopen it."""
+        with self._lock:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return the stored checkpoints keyed by task ID.
+
+        Each value holds the task's ``result``, ``published`` values and
+        ``fingerprint``; later records of a task replace earlier ones.  A
+        torn record left by a killed run is truncated away so that new
+        records can be appended after the intact ones.  Intact records that
+        no longer unpickle, for example because a class they reference was
+        removed, are skipped and their tasks run again.
+        """
+        checkpoints: Dict[str, Dict[str, Any]] = {}
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return checkpoints
+        with f:
+            length = os.fstat(f.fileno()).st_size
+            end = 0
+            while True:
+                header = f.read(_RECORD.size)
+                if len(header) < _RECORD.size:
+                    break
+                size, crc = _RECORD.unpack(header)
+                # A garbled length must not be allocated
+                if size > length - f.tell():
+                    break
+                record = f.read(size)
+                if zlib.crc32(record) != crc:
+                    break
+                end = f.tell()
+                try:
+                    entry = pickle.loads(record)
+                except Exception:  # noqa: BLE001
+                    continue
+                if isinstance(entry, dict) and "task" in entry:
+                    checkpoints[entry["task"]] = entry
+            torn = length > end
+        if torn:
+            os.truncate(self.path, end)
+        return checkpoints
@@ -0,0 +1,225 @@
+"""Columnar sidecar cache for ingested CSV files.
+
+Parsing CSV text is usually the slowest step of a pipeline, and the same
+export is often parsed run after run.  When ``csv_ingest`` is configured
+with ``columnar_cache: true`` the parsed frame is also written to a
+sidecar entry in this cache, and later runs map it back from disk instead
+of re‑tokenising the file.
+
+An entry is keyed on the absolute source path, its modification time and
+size, and the read options (``usecols``, ``dtype``, ``chunksize``...), so a
+changed file or changed options simply miss.  Each entry holds one or more
+partitions stored with :class:`~operator_agent_orchestrator.executors.FrameHandle`:
+numeric columns become ``.npy`` files that are memory‑mapped on load and
+other columns are pickled.  Stale entries are removed by :meth:`ColumnarCache.prune`
+(``oprun csv-cache prune``).
+
+The cache lives in ``$OPRUN_COLUMNAR_CACHE`` if set, otherwise under the
+user cache directory (``$XDG_CACHE_HOME`` or ``~/.cache``).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .cache import digest
+from .executors import FrameHandle
+
+META_FILE = "meta.json"
+
+#: Seconds an incomplete entry is left to its writer before pruning removes it.
+INCOMPLETE_GRACE = 3600
+
+
+def default_root() -> Path:
+    """Return the cache directory used when none is configured."""
+    env = os.environ.get("OPRUN_COLUMNAR_CACHE")
+    if env:
+        return Path(env)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "operator_agent_orchestrator" / "columnar"
+
+
+def source_stat(path: str) -> Dict[str, Any]:
+    """Return the identity of a source file as stored in entry metadata."""
+    st = os.stat(path)
+    return {"source": os.path.abspath(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+class ColumnarEntry:
+    """A complete sidecar entry on disk."""
+
+    def __init__(self, directory: Path, meta: Dict[str, Any]) -> None:
+        self.directory = directory
+        self.meta = meta
+
+    @property
+    def rows(self) -> int:
+        return int(self.meta["rows"])
+
+    def partition_dirs(self) -> List[Path]:
+        return [self.directory / f"part-{i:05d}" for i in range(self.meta["partitions"])]
+
+    def iter_frames(self) -> Iterator[Any]:
+        """Yield each stored partition as a memory‑mapped DataFrame."""
+        for part in self.partition_dirs():
+            yield FrameHandle.open(part).load()
+
+    def load(self) -> Any:
+        """Return the whole entry as one DataFrame.
+
+        A single‑partition entry is returned as memory‑mapped columns without
+        copying; several partitions are concatenated.
+        """
+        frames = list(self.iter_frames())
+        if len(frames) == 1:
+            return frames[0]
+        import pandas as pd  # type: ignore
+
+        return pd.concat(frames, ignore_index=True)
+
+    def touch(self) -> None:
+        """Record that the entry was used, for age based pruning."""
+        os.utime(self.directory / META_FILE)
+
+
+class ColumnarWriter:
+    """Accumulate partitions into a new entry and publish it atomically."""
+
+    def __init__(self, cache: "ColumnarCache", key: str, meta: Dict[str, Any]) -> None:
+        self.cache = cache
+        self.key = key
+        self.meta = meta
+        self.tmp = cache.root / f".tmp-{uuid.uuid4().hex}"
+        self.partitions = 0
+        self.rows = 0
+
+    def add(self, df: Any) -> None:
+        """Append ``df`` as the next partition."""
+        FrameHandle.export(df, self.tmp / f"part-{self.partitions:05d}").save()
+        self.partitions += 1
+        self.rows += len(df)
+
+    def commit(self, **extra: Any) -> ColumnarEntry:
+        """Write the metadata and move the entry into place."""
+        self.tmp.mkdir(parents=True, exist_ok=True)
+        meta = dict(self.meta, partitions=self.partitions, rows=self.rows, created=time.time(), **extra)
+        with open(self.tmp / META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=str)
+        target = self.cache.root / self.key
+        try:
+            os.replace(self.tmp, target)
+        except OSError:
+            # Another process published the same entry first
+            shutil.rmtree(self.tmp, ignore_errors=True)
+        return ColumnarEntry(target, meta)
+
+    def abort(self) -> None:
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+class ColumnarCache:
+    """Directory of columnar sidecar entries.
+
+    Parameters
+    ----------
+    root:
+        Cache directory.  Defaults to :func:`default_root`.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None) -> None:
+        self.root = Path(root) if root else default_root()
+
+    def _identity(
+        self, path: str, options: Dict[str, Any], chunksize: Optional[int]
+    ) -> Tuple[str, Dict[str, Any]]:
+        meta = dict(source_stat(path), options=options, chunksize=chunksize)
+        return digest(meta), meta
+
+    def lookup(
+        self, path: str, options: Dict[str, Any], chunksize: Optional[int] = None
+    ) -> Optional[ColumnarEntry]:
+        """Return the entry for the current state of ``path`` or None."""
+        key, _ = self._identity(path, options, chunksize)
+        directory = self.root / key
+        try:
+            with open(directory / META_FILE, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entry = ColumnarEntry(directory, meta)
+        entry.touch()
+        return entry
+
+    def writer(
+        self, path: str, options: Dict[str, Any], chunksize: Optional[int] = None
+    ) -> ColumnarWriter:
+        """Start a new entry for the current state of ``path``."""
+        key, meta = self._identity(path, options, chunksize)
+        self.root.mkdir(parents=True, exist_ok=True)
+        return ColumnarWriter(self, key, meta)
+
+    def entries(self) -> List[ColumnarEntry]:
+        """Return every complete entry in the cache."""
+        found = []
+        if not self.root.exists():
+            return found
+        for directory in self.root.iterdir():
+            if directory.name.startswith("."):
+                continue
+            try:
+                with open(directory / META_FILE, "r", encoding="utf-8") as f:
+                    found.append(ColumnarEntry(directory, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return found
+
+    def prune(self, remove_all: bool = False, older_than: Optional[float] = None) -> int:
+        """Delete stale entries and return how many were removed.
+
+        An entry is stale when its source file no longer exists or has
+        changed since the entry was written.  With ``older_than`` (seconds)
+        entries not used for that long are removed too; ``remove_all``
+        empties the cache.  Directories of incomplete writes are not
+        counted; they are removed once untouched for
+        :data:`INCOMPLETE_GRACE` seconds, so that a write still in
+        progress, possibly in another process, is never deleted.
+        """
+        if not self.root.exists():
+            return 0
+        removed = 0
+        now = time.time()
+        complete = {entry.directory for entry in self.entries()}
+        for directory in self.root.iterdir():
+            if directory in complete:
+                continue
+            try:
+                age = now - directory.stat().st_mtime
+            except FileNotFoundError:
+                # Finished or removed by its writer meanwhile
+                continue
+            if age > INCOMPLETE_GRACE:
+                shutil.rmtree(directory, ignore_errors=True)
+        for entry in self.entries():
+            stale = remove_all
+            if not stale:
+                try:
+                    current = source_stat(entry.meta["source"])
+                    stale = (current["mtime_ns"], current["size"]) != (
+                        entry.meta["mtime_ns"],
+                        entry.meta["size"],
+                    )
+                except OSError:
+                    stale = True
+            if not stale and older_than is not None:
+                stale = now - (entry.directory / META_FILE).stat().st_mtime > older_than
+            if stale:
+                shutil.rmtree(entry.directory, ignore_errors=True)
+                removed += 1
+        return removed
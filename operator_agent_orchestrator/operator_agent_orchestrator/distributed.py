@@ -0,0 +1,536 @@
+"""Distributed execution of tasks through a broker.
+
+Tasks with ``executor: remote`` are not run by the orchestrator's process.
+Instead the orchestrator starts a :class:`Broker` listening on a TCP
+address, and any number of ``oprun worker`` processes, on this machine or
+on others, connect to it.  The broker hands each remote task to a worker
+with a free slot together with a snapshot of the shared context; the
+worker runs the plugin and sends back the result, the values the plugin
+published into the context and any log records emitted while it ran.
+These are merged into the run's context and log exactly as for local
+executors.
+
+Workers send a heartbeat every few seconds.  A worker that disconnects or
+misses heartbeats for ``heartbeat_timeout`` seconds is dropped and its
+tasks are handed to other workers, up to ``max_attempts`` times per task.
+Tasks wait in the broker's queue while no worker is connected.
+
+Protocol
+--------
+Every message is a frame: an 8‑byte big‑endian length followed by the
+payload.  A worker opens the connection with a JSON frame
+``{"token": ..., "worker": name, "slots": n}`` and the broker replies with
+``{"ok": true, "heartbeat": seconds}`` or ``{"ok": false, "error": ...}``.
+All later frames are pickled dictionaries with a ``type``:
+
+``task`` (broker to worker)
+    ``id``, ``plugin`` (``module:Class``) and ``payload``, the pickled
+    config and context.
+``shutdown`` (broker to worker)
+    The worker exits once its running tasks finish.
+``heartbeat`` (worker to broker)
+    Sent every ``heartbeat`` seconds.
+``log`` (worker to broker)
+    ``id``, ``level`` and ``message`` of a record logged during a task.
+``result`` (worker to broker)
+    ``id`` and either ``payload``, the pickled result, published values and
+    span statistics, or ``error``.
+
+Because pickles can execute code, pickled frames are only exchanged after
+the worker has presented the broker's token.  Keep the token secret and
+only expose the broker on networks you trust.
+"""
+
+from __future__ import annotations
+
+import hmac
+import importlib
+import json
+import logging
+import os
+import pickle
+import secrets
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .cache import RecordingContext
+
+#: Environment variable holding the broker token for ``oprun worker``.
+TOKEN_ENV = "OPRUN_BROKER_TOKEN"
+
+#: Seconds without a heartbeat after which a worker is considered dead.
+HEARTBEAT_TIMEOUT = 15.0
+
+#: Times a task is handed to a worker before it is failed.
+MAX_ATTEMPTS = 3
+
+#: Largest hello frame, in bytes, read before a worker has authenticated.
+HELLO_MAX_BYTES = 64 * 1024
+
+_HEADER = struct.Struct(">Q")
+
+LogCallback = Callable[[int, str], None]
+
+
+class RemoteTaskError(RuntimeError):
+    """A task failed on a remote worker or could not be completed."""
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Split ``HOST:PORT`` (or ``:PORT``) into host and port."""
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT, got '{address}'")
+    return host or "127.0.0.1", int(port)
+
+
+def _send_frame(sock: socket.socket, data: bytes) -> None:
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise EOFError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(sock: socket.socket, max_size: Optional[int] = None) -> bytes:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if max_size is not None and size > max_size:
+        raise ValueError(f"Frame of {size} bytes exceeds the limit of {max_size}")
+    return _recv_exact(sock, size)
+
+
+def _dumps(obj: Any) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class _Job:
+    def __init__(self, plugin: str, payload: bytes, on_log: Optional[LogCallback]) -> None:
+        self.id = uuid.uuid4().hex
+        self.frame = _dumps({"type": "task", "id": self.id, "plugin": plugin, "payload": payload})
+        self.future: "Future[Tuple[Any, Dict[str, Any], Dict[str, Any]]]" = Future()
+        self.on_log = on_log
+        self.attempts = 0
+
+
+class _Worker:
+    def __init__(self, sock: socket.socket, name: str, slots: int) -> None:
+        self.sock = sock
+        self.name = name
+        self.slots = slots
+        self.jobs: Dict[str, _Job] = {}
+        self.last_seen = time.monotonic()
+        self.send_lock = threading.Lock()
+
+    def send(self, frame: bytes) -> None:
+        with self.send_lock:
+            _send_frame(self.sock, frame)
+
+
+class Broker:
+    """Queue of remote tasks served to connected workers.
+
+    Parameters
+    ----------
+    address:
+        ``HOST:PORT`` to listen on.  Port 0 picks a free port; the actual
+        address is available as :attr:`address` once started.
+    token:
+        Secret workers must present.  Generated if not given.
+    heartbeat_timeout:
+        Seconds without a message after which a worker is dropped and its
+        tasks are reassigned.
+    max_attempts:
+        Number of workers a task may be handed to before it is failed.
+    """
+
+    def __init__(
+        self,
+        address: str = "127.0.0.1:0",
+        token: Optional[str] = None,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> None:
+        self.host, self.port = parse_address(address)
+        self.token = token or secrets.token_hex(16)
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._pending: Deque[_Job] = deque()
+        self._workers: List[_Worker] = []
+        self._server: Optional[socket.socket] = None
+        self._closed = False
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def start(self) -> str:
+        """Start listening and return the address workers connect to."""
+        server = socket.create_server((self.host, self.port))
+        self.port = server.getsockname()[1]
+        self._server = server
+        for target in (self._accept_loop, self._dispatch_loop, self._monitor_loop):
+            thread = threading.Thread(target=target, name=f"oprun-broker-{target.__name__}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self.address
+
+    def submit(
+        self,
+        plugin_cls: type,
+        config: Dict[str, Any],
+        context: Dict[str, Any],
+        on_log: Optional[LogCallback] = None,
+    ) -> "Future[Tuple[Any, Dict[str, Any], Dict[str, Any]]]":
+        """Queue a task; the future resolves to ``(result, published, stats)``.
+
+        ``on_log`` is called with the level and message of every record the
+        plugin logs on the worker, and of reassignments.
+        """
+        job = _Job(f"{plugin_cls.__module__}:{plugin_cls.__qualname__}", _dumps((config, context)), on_log)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Broker is shut down")
+            self._pending.append(job)
+            self._cond.notify_all()
+        return job.future
+
+    def workers(self) -> List[Dict[str, Any]]:
+        """Describe the connected workers."""
+        with self._cond:
+            return [{"name": w.name, "slots": w.slots, "running": len(w.jobs)} for w in self._workers]
+
+    def wait_for_workers(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Block until ``count`` workers are connected, returning whether they are."""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._workers) >= count or self._closed, timeout) and not self._closed
+
+    def shutdown(self) -> None:
+        """Stop workers, close connections and fail tasks still queued."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+            jobs = list(self._pending) + [job for w in workers for job in w.jobs.values()]
+            self._pending.clear()
+            self._cond.notify_all()
+        for worker in workers:
+            try:
+                worker.send(_dumps({"type": "shutdown"}))
+            except OSError:
+                pass
+            _close(worker.sock)
+        if self._server is not None:
+            _close(self._server)
+        for job in jobs:
+            _resolve(job, error=RemoteTaskError("Broker shut down before the task finished"))
+        for thread in self._threads:
+            thread.join(5)
+
+    # -- broker threads ---------------------------------------------------
+
+    def _accept_loop(self) -> None:
+        assert self._server is not None
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock,), name="oprun-broker-worker", daemon=True).start()
+
+    def _serve(self, sock: socket.socket) -> None:
+        worker: Optional[_Worker] = None
+        try:
+            sock.settimeout(self.heartbeat_timeout)
+            hello = json.loads(_recv_frame(sock, HELLO_MAX_BYTES))
+            token = hello.get("token") if isinstance(hello, dict) else None
+            # Compared as bytes, since compare_digest rejects non-ASCII str
+            if not isinstance(token, str) or not hmac.compare_digest(
+                token.encode("utf-8"), self.token.encode("utf-8")
+            ):
+                _send_frame(sock, json.dumps({"ok": False, "error": "invalid token"}).encode("utf-8"))
+                return
+            worker = _Worker(sock, str(hello.get("worker") or "worker"), max(1, int(hello.get("slots") or 1)))
+            _send_frame(
+                sock, json.dumps({"ok": True, "heartbeat": self.heartbeat_timeout / 3}).encode("utf-8")
+            )
+            sock.settimeout(None)
+            with self._cond:
+                if self._closed:
+                    return
+                self._workers.append(worker)
+                self._cond.notify_all()
+            while True:
+                message = pickle.loads(_recv_frame(sock))
+                worker.last_seen = time.monotonic()
+                if message["type"] == "result":
+                    with self._cond:
+                        job = worker.jobs.pop(message["id"], None)
+                        self._cond.notify_all()
+                    if job is not None:
+                        self._complete(job, message)
+                elif message["type"] == "log":
+                    job = worker.jobs.get(message["id"])
+                    if job is not None and job.on_log is not None:
+                        job.on_log(message["level"], f"[{worker.name}] {message['message']}")
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError, KeyError):
+            pass
+        finally:
+            if worker is not None:
+                self._drop(worker)
+            _close(sock)
+
+    def _complete(self, job: _Job, message: Dict[str, Any]) -> None:
+        if "error" in message:
+            _resolve(job, error=RemoteTaskError(message["error"]))
+            return
+        try:
+            result, published, stats = pickle.loads(message["payload"])
+        except Exception as exc:  # noqa: BLE001
+            _resolve(job, error=RemoteTaskError(f"Result could not be unpickled: {exc}"))
+            return
+        _resolve(job, value=(result, published, stats))
+
+    def _drop(self, worker: _Worker) -> None:
+        failed: List[_Job] = []
+        with self._cond:
+            if worker not in self._workers:
+                return
+            self._workers.remove(worker)
+            for job in reversed(list(worker.jobs.values())):
+                if self._closed or job.attempts >= self.max_attempts:
+                    failed.append(job)
+                else:
+                    self._pending.appendleft(job)
+                    if job.on_log is not None:
+                        job.on_log(logging.WARNING, f"Worker {worker.name} lost; reassigning task")
+            worker.jobs.clear()
+            self._cond.notify_all()
+        _close(worker.sock)
+        for job in failed:
+            _resolve(job, error=RemoteTaskError(f"Task lost with worker {worker.name} after {job.attempts} attempts"))
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or (self._pending and self._free_worker() is not None))
+                if self._closed:
+                    return
+                job = self._pending.popleft()
+                if job.future.done():
+                    continue
+                worker = self._free_worker()
+                assert worker is not None
+                worker.jobs[job.id] = job
+                job.attempts += 1
+            try:
+                worker.send(job.frame)
+            except OSError:
+                self._drop(worker)
+
+    def _free_worker(self) -> Optional[_Worker]:
+        free = [w for w in self._workers if len(w.jobs) < w.slots]
+        return min(free, key=lambda w: len(w.jobs) / w.slots) if free else None
+
+    def _monitor_loop(self) -> None:
+        interval = self.heartbeat_timeout / 3
+        while True:
+            with self._cond:
+                if self._cond.wait_for(lambda: self._closed, interval):
+                    return
+                now = time.monotonic()
+                dead = [w for w in self._workers if now - w.last_seen > self.heartbeat_timeout]
+            for worker in dead:
+                # The worker's reader thread notices and drops it
+                _close(worker.sock)
+
+
+def _resolve(job: _Job, value: Any = None, error: Optional[BaseException] = None) -> None:
+    if job.future.done() or not job.future.set_running_or_notify_cancel():
+        return
+    if error is not None:
+        job.future.set_exception(error)
+    else:
+        job.future.set_result(value)
+
+
+def _close(sock: socket.socket) -> None:
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+
+
+# -- worker side ------------------------------------------------------------
+
+
+class _ForwardingHandler(logging.Handler):
+    """Send records logged while a task runs to the broker."""
+
+    def __init__(self, send: Callable[[Dict[str, Any]], None]) -> None:
+        super().__init__(level=logging.INFO)
+        self._send = send
+        self.current = threading.local()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        task_id = getattr(self.current, "task", None)
+        if task_id is None:
+            return
+        try:
+            self._send({"type": "log", "id": task_id, "level": record.levelno, "message": record.getMessage()})
+        except Exception:  # noqa: BLE001
+            self.handleError(record)
+
+
+def _load_class(target: str) -> type:
+    module, _, qualname = target.partition(":")
+    obj: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def run_worker(
+    address: str,
+    token: str,
+    slots: int = 1,
+    name: Optional[str] = None,
+    connect_timeout: float = 30.0,
+) -> None:
+    """Connect to the broker at ``address`` and run tasks until it shuts down.
+
+    Parameters
+    ----------
+    address:
+        ``HOST:PORT`` of the broker.
+    token:
+        The broker's secret token.
+    slots:
+        Number of tasks run at once, each in its own thread.
+    name:
+        Name reported in logs and traces.  Defaults to ``host:pid``.
+    connect_timeout:
+        Seconds to keep retrying while the broker is not yet listening.
+
+    Raises
+    ------
+    ConnectionError
+        If the broker cannot be reached or rejects the token.
+    """
+    from .executors import _measured
+
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    host, port = parse_address(address)
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port), timeout=connect_timeout)
+            break
+        except OSError as exc:
+            if time.monotonic() >= deadline:
+                raise ConnectionError(f"No broker listening on {address}") from exc
+            time.sleep(0.2)
+    _send_frame(sock, json.dumps({"token": token, "worker": name, "slots": slots}).encode("utf-8"))
+    reply = json.loads(_recv_frame(sock, HELLO_MAX_BYTES))
+    if not reply.get("ok"):
+        sock.close()
+        raise ConnectionError(f"Broker rejected the worker: {reply.get('error')}")
+    sock.settimeout(None)
+
+    send_lock = threading.Lock()
+
+    def send(message: Dict[str, Any]) -> None:
+        frame = _dumps(message)
+        with send_lock:
+            _send_frame(sock, frame)
+
+    stopped = threading.Event()
+
+    def heartbeat() -> None:
+        while not stopped.wait(reply["heartbeat"]):
+            try:
+                send({"type": "heartbeat"})
+            except OSError:
+                return
+
+    handler = _ForwardingHandler(send)
+    plugins: Dict[str, Any] = {}
+    plugins_lock = threading.Lock()
+
+    def execute(message: Dict[str, Any]) -> None:
+        handler.current.task = message["id"]
+        try:
+            with plugins_lock:
+                plugin = plugins.get(message["plugin"])
+                if plugin is None:
+                    plugin = plugins[message["plugin"]] = _load_class(message["plugin"])()
+            config, payload = pickle.loads(message["payload"])
+            context = RecordingContext(payload)
+            result, stats = _measured(plugin.run, config, context, f"remote {name}")
+            reply = {"type": "result", "id": message["id"], "payload": _dumps((result, context.published, stats))}
+        except Exception as exc:  # noqa: BLE001
+            logging.getLogger(__name__).debug(traceback.format_exc())
+            reply = {"type": "result", "id": message["id"], "error": f"{type(exc).__name__}: {exc}"}
+        finally:
+            handler.current.task = None
+        try:
+            send(reply)
+        except OSError:
+            pass
+
+    beat = threading.Thread(target=heartbeat, name="oprun-worker-heartbeat", daemon=True)
+    beat.start()
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        with ThreadPoolExecutor(max_workers=slots, thread_name_prefix="oprun-worker") as pool:
+            while True:
+                try:
+                    message = pickle.loads(_recv_frame(sock))
+                except (OSError, EOFError):
+                    break
+                if message["type"] == "shutdown":
+                    break
+                if message["type"] == "task":
+                    pool.submit(execute, message)
+    finally:
+        stopped.set()
+        root.removeHandler(handler)
+        _close(sock)
+
+
+def spawn_local_workers(
+    address: str, token: str, count: int, slots: int = 1
+) -> List["subprocess.Popen[bytes]"]:
+    """Start ``count`` ``oprun worker`` processes connected to ``address``.
+
+    The token is passed through the environment rather than the command
+    line, where other users could read it.
+    """
+    # Make this copy of the package importable in the child interpreter
+    root = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    env[TOKEN_ENV] = token
+    command = [sys.executable, "-m", __package__, "worker", "--connect", address, "--slots", str(slots)]
+    return [subprocess.Popen(command, env=env, stdin=subprocess.DEVNULL) for _ in range(count)]
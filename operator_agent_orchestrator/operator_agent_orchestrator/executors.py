@@ -0,0 +1,545 @@
+"""Execution back‑ends for plugin invocations.
+
+Every task runs its plugin through one of four executors, selected with
+the ``executor`` key on the task (or as a workflow‑wide default):
+
+``thread``
+    The default.  ``plugin.run`` is called in a worker thread via
+    :func:`asyncio.to_thread`.  Suitable for I/O bound plugins and code
+    that releases the GIL.  Plugins implementing ``arun`` are awaited on
+    the event loop instead and need no thread at all.
+``process``
+    ``plugin.run`` is called in a reusable process pool so that CPU bound
+    plugins on independent branches of the DAG run truly in parallel.
+``inline``
+    ``plugin.run`` (or ``plugin.arun``) is called directly on the event
+    loop.  Only useful for trivial plugins where the thread hop costs more
+    than the work.
+``remote``
+    ``plugin.run`` is called by an ``oprun worker`` process connected to
+    the orchestrator's broker, possibly on another machine; see
+    :mod:`operator_agent_orchestrator.distributed`.  The context is pickled
+    and sent with the task.
+
+Process workers do not share memory with the orchestrator, so the shared
+context is shipped to them with every task.  Pandas DataFrames are not
+pickled; instead each numeric column is written once per run to a
+memory‑mapped ``.npy`` file (under ``/dev/shm`` where available) and the
+worker maps those files back into a DataFrame without copying.  Frames the
+worker publishes into the context travel back the same way.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import importlib
+import multiprocessing
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import RecordingContext
+from .distributed import Broker, LogCallback, spawn_local_workers
+from .plugin_base import supports_async
+from .plugins import PLUGINS
+from .tracing import current_rss
+
+#: Names accepted by the ``executor`` task option.
+EXECUTORS = ("thread", "process", "inline", "remote")
+
+#: Executor used when neither the task nor the workflow chooses one.
+DEFAULT_EXECUTOR = "thread"
+
+
+def _shared_tmpdir() -> Optional[str]:
+    # /dev/shm is a RAM backed tmpfs on Linux; fall back to the default
+    # temporary directory elsewhere.
+    return "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+class FrameHandle:
+    """Picklable reference to a DataFrame stored as memory‑mapped columns.
+
+    Columns with a plain NumPy dtype are saved as ``.npy`` files and mapped
+    copy‑on‑write by :meth:`load`, so every process reading the frame shares
+    the same physical pages.  Columns with object or extension dtypes
+    cannot be mapped and are pickled along with the handle instead.  File
+    names are stored relative to :attr:`directory`, so a saved frame can be
+    reopened from wherever its directory ends up.
+    """
+
+    #: File holding the pickled handle written by :meth:`save`.
+    META_FILE = "frame.pkl"
+
+    def __init__(
+        self,
+        directory: str,
+        columns: Any,
+        index: Any,
+        mapped: Dict[int, str],
+        inline: Dict[int, Any],
+    ) -> None:
+        self.directory = directory
+        self.columns = columns
+        self.index = index
+        self.mapped = mapped
+        self.inline = inline
+
+    @classmethod
+    def export(cls, df: Any, directory: Path) -> "FrameHandle":
+        """Write ``df`` into ``directory`` and return a handle to it."""
+        import numpy as np  # type: ignore
+
+        directory.mkdir(parents=True, exist_ok=True)
+        mapped: Dict[int, str] = {}
+        inline: Dict[int, Any] = {}
+        for pos in range(df.shape[1]):
+            series = df.iloc[:, pos]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM":
+                np.save(directory / f"{pos}.npy", series.to_numpy(), allow_pickle=False)
+                mapped[pos] = f"{pos}.npy"
+            else:
+                inline[pos] = series.reset_index(drop=True)
+        return cls(str(directory), df.columns, df.index, mapped, inline)
+
+    def save(self) -> None:
+        """Persist the handle next to its columns for :meth:`open`."""
+        with open(Path(self.directory) / self.META_FILE, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def open(cls, directory: Path) -> "FrameHandle":
+        """Reopen a handle previously written with :meth:`save`."""
+        with open(directory / cls.META_FILE, "rb") as f:
+            handle = pickle.load(f)
+        handle.directory = str(directory)
+        return handle
+
+    def load(self) -> Any:
+        """Map the stored columns back into a DataFrame."""
+        import numpy as np  # type: ignore
+        import pandas as pd  # type: ignore
+
+        data: Dict[int, Any] = {}
+        for pos in range(len(self.columns)):
+            if pos in self.mapped:
+                data[pos] = np.load(os.path.join(self.directory, self.mapped[pos]), mmap_mode="c")
+            else:
+                data[pos] = self.inline[pos]
+        df = pd.DataFrame(data, copy=False)
+        df.columns = self.columns
+        df.index = self.index
+        return df
+
+
+class FrameExporter:
+    """Convert context values to and from their process‑transferable form.
+
+    Each distinct DataFrame is exported at most once; later tasks reuse the
+    same handle.  The exporter keeps a reference to every exported frame so
+    that object identities stay stable for the lifetime of the run.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._handles: Dict[int, Tuple[Any, FrameHandle]] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, value: Any) -> Any:
+        pd = sys.modules.get("pandas")
+        if pd is None or not isinstance(value, pd.DataFrame):
+            return value
+        with self._lock:
+            entry = self._handles.get(id(value))
+            if entry is None:
+                handle = FrameHandle.export(value, self.directory / uuid.uuid4().hex)
+                entry = self._handles[id(value)] = (value, handle)
+        return entry[1]
+
+    @staticmethod
+    def unwrap(value: Any) -> Any:
+        return value.load() if isinstance(value, FrameHandle) else value
+
+
+def _measured(
+    run: Callable[[Dict[str, Any], Any], Any],
+    config: Dict[str, Any],
+    context: Any,
+    worker: str,
+    profile_path: Optional[str] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Call ``run(config, context)`` and measure it on the current thread.
+
+    Returns the result and the span fields for
+    :class:`~operator_agent_orchestrator.tracing.Tracer`.  With
+    ``profile_path`` the call is profiled with :mod:`cProfile` and the
+    statistics are written to that file.
+    """
+    rss = current_rss()
+    cpu = time.thread_time()
+    if profile_path:
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(run, config, context)
+        finally:
+            profiler.dump_stats(profile_path)
+    else:
+        result = run(config, context)
+    after = current_rss()
+    stats = {
+        "worker": worker,
+        "cpu_seconds": time.thread_time() - cpu,
+        "rss_delta_bytes": after - rss if rss is not None and after is not None else None,
+        "profile": profile_path,
+    }
+    return result, stats
+
+
+async def run_in_new_thread(func: Callable[..., Any], *args: Any, name: Optional[str] = None) -> Any:
+    """Call ``func(*args)`` on a thread of its own and await the result.
+
+    Used for work that may block for a long time waiting on other tasks,
+    such as reading or filling a stream, which must not occupy one of the
+    default executor's few threads.
+    """
+    loop = asyncio.get_running_loop()
+    future: "asyncio.Future[Any]" = loop.create_future()
+
+    def settle(outcome: Callable[[Any], None], value: Any) -> None:
+        if not future.done():
+            outcome(value)
+
+    def target() -> None:
+        try:
+            result = func(*args)
+        except BaseException as exc:  # noqa: BLE001
+            outcome, value = future.set_exception, exc
+        else:
+            outcome, value = future.set_result, result
+        try:
+            loop.call_soon_threadsafe(settle, outcome, value)
+        except RuntimeError:
+            # The loop closed after giving up on the call
+            pass
+
+    threading.Thread(target=target, name=name, daemon=True).start()
+    return await future
+
+
+class _ThreadCall:
+    """A call on a worker thread that may outlive the task awaiting it.
+
+    Cancelling the awaiting task cannot stop a thread that is already
+    running.  :meth:`abandon` tells whether that happened, and
+    :attr:`exited` resolves on the event loop once such a thread returns.
+    A call abandoned before its thread picked it up never runs.
+    """
+
+    def __init__(self, call: Callable[[], Any], loop: asyncio.AbstractEventLoop) -> None:
+        self._call = call
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._started = False
+        self._finished = False
+        self._abandoned = False
+        self.exited: "asyncio.Future[None]" = loop.create_future()
+
+    def __call__(self) -> Any:
+        with self._lock:
+            if self._abandoned:
+                return None
+            self._started = True
+        try:
+            return self._call()
+        finally:
+            with self._lock:
+                self._finished = True
+                abandoned = self._abandoned
+            if abandoned:
+                try:
+                    self._loop.call_soon_threadsafe(self._exit)
+                except RuntimeError:
+                    # The loop closed after giving up on the call
+                    pass
+
+    def _exit(self) -> None:
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+    def abandon(self) -> bool:
+        """Give up on the call, returning whether its thread is still running."""
+        with self._lock:
+            self._abandoned = True
+            return self._started and not self._finished
+
+
+def _run_in_process(
+    plugin_cls: type,
+    config: Dict[str, Any],
+    payload: Dict[str, Any],
+    share_dir: str,
+    profile_path: Optional[str] = None,
+) -> Tuple[Any, Dict[str, Any], Dict[str, Any]]:
+    """Entry point executed inside a worker process."""
+    context = RecordingContext({key: FrameExporter.unwrap(value) for key, value in payload.items()})
+    result, stats = _measured(
+        plugin_cls().run, config, context, f"process {os.getpid()}", profile_path
+    )
+    exporter = FrameExporter(Path(share_dir))
+    published = {key: exporter.wrap(value) for key, value in context.published.items()}
+    return result, published, stats
+
+
+def _preload(modules: Tuple[str, ...]) -> None:
+    """Process pool initializer importing ``modules`` in every worker."""
+    for module in modules:
+        importlib.import_module(module)
+
+
+class ExecutorPool:
+    """Long‑lived executor resources shared by every run of an orchestrator.
+
+    Parameters
+    ----------
+    max_workers:
+        Size of the process pool.  Defaults to the number of CPUs.
+    preload:
+        Modules imported by every worker process when it starts, in
+        addition to the modules of the built‑in plugins.
+    broker:
+        ``HOST:PORT`` the broker for ``remote`` tasks listens on.  Port 0
+        picks a free port.
+    broker_token:
+        Secret remote workers must present.  Generated if not given.
+    local_workers:
+        Number of ``oprun worker`` processes started on this machine when
+        the broker starts.  Workers on other machines connect with
+        ``oprun worker --connect``.
+    worker_slots:
+        Tasks each local worker runs at once.
+    on_broker_start:
+        Called with the broker's address and token once it has started,
+        for example to tell users how to connect workers.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        preload: Tuple[str, ...] = (),
+        broker: str = "127.0.0.1:0",
+        broker_token: Optional[str] = None,
+        local_workers: int = 0,
+        worker_slots: int = 1,
+        on_broker_start: Optional[Callable[[str, str], None]] = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.preload = tuple(preload)
+        self.broker_address = broker
+        self.broker_token = broker_token
+        self.local_workers = local_workers
+        self.worker_slots = worker_slots
+        self.on_broker_start = on_broker_start
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._broker: Optional[Broker] = None
+        self._workers: List["subprocess.Popen[bytes]"] = []
+        self._broker_lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        """The process pool, created on first use."""
+        with self._pool_lock:
+            if self._process_pool is None:
+                # Spawned workers avoid inheriting the orchestrator's threads
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_preload,
+                    initargs=(tuple(PLUGINS.builtin_modules().values()) + self.preload,),
+                )
+            return self._process_pool
+
+    def discard_process_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Drop ``pool`` after one of its workers died.
+
+        A :class:`ProcessPoolExecutor` refuses all work once a worker has
+        exited abruptly, so the next task creates a fresh pool instead.
+        Nothing happens if ``pool`` was already replaced.
+        """
+        with self._pool_lock:
+            if self._process_pool is not pool:
+                return
+            self._process_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def broker(self) -> Broker:
+        """The broker for ``remote`` tasks, started on first use."""
+        with self._broker_lock:
+            if self._broker is None:
+                broker = Broker(self.broker_address, token=self.broker_token)
+                address = broker.start()
+                if self.on_broker_start is not None:
+                    self.on_broker_start(address, broker.token)
+                if self.local_workers:
+                    self._workers = spawn_local_workers(
+                        address, broker.token, self.local_workers, self.worker_slots
+                    )
+                self._broker = broker
+        return self._broker
+
+    def warm(self) -> None:
+        """Start the worker processes now rather than on first use."""
+        pool = self.process_pool
+        # Workers are spawned on demand, one per task without an idle worker
+        futures = [pool.submit(os.getpid) for _ in range(self.max_workers or os.cpu_count() or 1)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes and the broker, if any were started."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+        if self._broker is not None:
+            self._broker.shutdown()
+            self._broker = None
+        for worker in self._workers:
+            try:
+                worker.wait(10)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+                worker.wait()
+        self._workers = []
+
+
+class TaskExecutor:
+    """Run plugins for a single workflow run on the selected executor.
+
+    Parameters
+    ----------
+    pool:
+        Shared executor resources.
+    """
+
+    def __init__(self, pool: ExecutorPool) -> None:
+        self.pool = pool
+        self._share_dir: Optional[Path] = None
+        self._exporter: Optional[FrameExporter] = None
+
+    def _get_exporter(self) -> FrameExporter:
+        if self._exporter is None:
+            self._share_dir = Path(tempfile.mkdtemp(prefix="oprun-", dir=_shared_tmpdir()))
+            self._exporter = FrameExporter(self._share_dir)
+        return self._exporter
+
+    async def run(
+        self,
+        mode: str,
+        plugin: Any,
+        config: Dict[str, Any],
+        context: RecordingContext,
+        span: Optional[Dict[str, Any]] = None,
+        profile_path: Optional[str] = None,
+        log: Optional[LogCallback] = None,
+        dedicated: bool = False,
+        linger: Optional[Callable[["asyncio.Future[None]"], None]] = None,
+    ) -> Any:
+        """Invoke ``plugin.run(config, context)`` on the executor ``mode``.
+
+        Native async plugins are awaited on the event loop unless they are
+        explicitly sent to the process pool or a remote worker.  If ``span``
+        is given it is updated with where the plugin ran, its CPU time and
+        the change in resident memory.  ``profile_path`` enables
+        :mod:`cProfile` for synchronous plugins on this machine.  ``log``
+        receives the level and message of records logged by remote tasks.
+        With ``dedicated`` a ``thread`` task gets a thread of its own
+        rather than one from the shared pool.  If a ``thread`` task is
+        cancelled, for example by a timeout, while its thread keeps
+        running, ``linger`` is called with a future that resolves once the
+        thread has returned.
+        """
+        span = span if span is not None else {}
+        if mode in ("thread", "inline") and supports_async(plugin):
+            # CPU time on the loop thread cannot be attributed to one task
+            span.update(worker="event loop", cpu_seconds=None, rss_delta_bytes=None, profile=None)
+            return await plugin.arun(config, context)
+        if mode == "inline":
+            result, stats = _measured(plugin.run, config, context, "event loop", profile_path)
+            span.update(stats)
+            return result
+        if mode == "thread":
+            call = lambda: _measured(  # noqa: E731
+                plugin.run,
+                config,
+                context,
+                f"thread {threading.current_thread().name}",
+                profile_path,
+            )
+            tracked = _ThreadCall(call, asyncio.get_running_loop())
+            try:
+                if dedicated:
+                    result, stats = await run_in_new_thread(tracked, name="oprun-stream-task")
+                else:
+                    result, stats = await asyncio.to_thread(tracked)
+            except asyncio.CancelledError:
+                if tracked.abandon() and linger is not None:
+                    linger(tracked.exited)
+                raise
+            span.update(stats)
+            return result
+        if mode == "remote":
+            future = self.pool.broker.submit(type(plugin), config, context.snapshot(), log)
+            result, published, stats = await asyncio.wrap_future(future)
+            for key, value in published.items():
+                context[key] = value
+            span.update(stats)
+            return result
+        if mode != "process":
+            raise ValueError(f"Unknown executor '{mode}'")
+        exporter = self._get_exporter()
+        payload = await asyncio.to_thread(
+            lambda: {key: exporter.wrap(value) for key, value in context.snapshot().items()}
+        )
+        loop = asyncio.get_running_loop()
+        pool = self.pool.process_pool
+        try:
+            result, published, stats = await loop.run_in_executor(
+                pool,
+                functools.partial(
+                    _run_in_process,
+                    type(plugin),
+                    config,
+                    payload,
+                    str(exporter.directory),
+                    profile_path,
+                ),
+            )
+        except BrokenProcessPool:
+            # Fails the tasks that were on the pool; later ones get a new one
+            self.pool.discard_process_pool(pool)
+            raise
+        for key, value in published.items():
+            context[key] = FrameExporter.unwrap(value)
+        span.update(stats)
+        return result
+
+    def close(self) -> None:
+        """Remove the run's memory‑mapped files."""
+        if self._share_dir is not None:
+            # Mappings already held by live DataFrames remain valid on POSIX
+            shutil.rmtree(self._share_dir, ignore_errors=True)
+            self._share_dir = None
+            self._exporter = None
@@ -0,0 +1,422 @@
+"""Index of past runs and their task durations.
+
+The orchestrator records every run in a SQLite database, by default
+``history.sqlite`` in the log directory.  A run is added when it starts
+and completed from its trace when it ends, so runs that crashed remain
+visible as ``running``.  For every task the database keeps its status,
+duration, queue wait, CPU time, change in resident memory and where it
+ran.  ``oprun history`` queries it.
+
+Runs are identified by their resolved run directory, so log directories
+sharing one database never mix up runs whose directories have the same
+name.  Durations are shared between the runs of one workflow *file*: each
+run carries a key, the resolved path of the workflow it was started from,
+so two unrelated workflows that both use the default name and reuse task
+IDs such as ``ingest`` do not share estimates.  A resumed run keeps the key
+of the run it continues.
+
+The scheduler uses the recorded durations to estimate how long each task
+of a workflow will take, and starts ready tasks on the longest remaining
+path first (see :func:`critical_path_priorities`).  Tasks that opt into
+speculative execution are duplicated once they run longer than a
+percentile of their recorded durations (see :func:`straggler_thresholds`).
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+#: Default history database inside the log directory.
+HISTORY_FILE = "history.sqlite"
+
+#: Successful runs of a task used to estimate its duration.
+ESTIMATE_RUNS = 5
+
+#: Successful runs of a task whose durations decide when it is a straggler.
+SPECULATION_RUNS = 20
+
+#: Tasks with fewer recorded durations than this are never speculated on.
+SPECULATION_MIN_RUNS = 3
+
+#: Runs of each workflow file kept in the history; older ones are pruned.
+KEEP_RUNS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    key TEXT,
+    run_dir TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    status TEXT NOT NULL,
+    tasks INTEGER,
+    failed INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_workflow ON runs (workflow, started);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    task TEXT NOT NULL,
+    plugin TEXT,
+    executor TEXT,
+    worker TEXT,
+    status TEXT,
+    started REAL,
+    duration REAL,
+    queue_wait REAL,
+    cpu_seconds REAL,
+    rss_delta_bytes INTEGER,
+    PRIMARY KEY (run_id, task)
+);
+CREATE INDEX IF NOT EXISTS tasks_task ON tasks (task, started);
+"""
+
+# Shard IDs are the map task's ID followed by the shard index
+_SHARD = re.compile(r"^(.*)\[\d+\]$")
+
+
+class RunHistory:
+    """SQLite index of runs and task spans.
+
+    The database is opened on first use and may be shared by the threads
+    of one process.
+
+    Parameters
+    ----------
+    path:
+        Database file.  Created, with its directory, if missing.
+    keep_runs:
+        Runs of each workflow key to keep.  Older runs and their tasks are
+        deleted as new runs finish.  None keeps every run.
+    """
+
+    def __init__(self, path: Union[str, Path], keep_runs: Optional[int] = KEEP_RUNS) -> None:
+        if keep_runs is not None and keep_runs < 1:
+            raise ValueError("keep_runs must be a positive integer or None")
+        self.path = Path(path)
+        self.keep_runs = keep_runs
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # Concurrent runs in other processes may write at the same time
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(_SCHEMA)
+            # Databases written before runs had a key gain the column;
+            # their runs no longer inform estimates
+            if "key" not in {row[1] for row in conn.execute("PRAGMA table_info(runs)")}:
+                conn.execute("ALTER TABLE runs ADD COLUMN key TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_key ON runs (key, started)")
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def start_run(self, workflow: str, run_dir: Path, key: Optional[str] = None) -> str:
+        """Record that a run of ``workflow`` in ``run_dir`` has started.
+
+        A resumed run replaces its earlier record when it finishes.
+
+        Parameters
+        ----------
+        workflow:
+            Name of the workflow, shown by ``oprun history``.
+        run_dir:
+            The run directory, which identifies the run.
+        key:
+            Identity of the workflow whose runs share durations, such as
+            the resolved path of its file.  Defaults to ``workflow``.  A run
+            that was started before keeps its key.
+
+        Returns
+        -------
+        str
+            The run's key, to pass to :meth:`estimates` and
+            :meth:`durations`.
+        """
+        run_id = _run_id(run_dir)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO runs (run_id, workflow, key, run_dir, started, status)"
+                    " VALUES (?, ?, ?, ?, ?, 'running') ON CONFLICT (run_id) DO UPDATE SET"
+                    " status = 'running', finished = NULL, key = COALESCE(runs.key, excluded.key)",
+                    (run_id, workflow, key or workflow, run_id, time.time()),
+                )
+                (stored,) = conn.execute("SELECT key FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return stored
+
+    def finish_run(self, run_dir: Path, trace: Dict[str, Any], status: str) -> None:
+        """Store the spans of ``trace`` and the outcome of the run in ``run_dir``."""
+        spans = trace["spans"]
+        run_id = _run_id(run_dir)
+        failed = sum(1 for span in spans if span.get("status") == "error")
+        rows = [
+            (
+                run_id,
+                span["task"],
+                span.get("plugin"),
+                span.get("executor"),
+                span.get("worker"),
+                span.get("status"),
+                span.get("started"),
+                span.get("duration"),
+                span.get("queue_wait"),
+                span.get("cpu_seconds"),
+                span.get("rss_delta_bytes"),
+            )
+            for span in spans
+        ]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO runs (run_id, workflow, key, run_dir, started, finished, status, tasks, failed)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (run_id) DO UPDATE SET"
+                    " finished = excluded.finished, status = excluded.status,"
+                    " tasks = excluded.tasks, failed = excluded.failed,"
+                    " key = COALESCE(runs.key, excluded.key)",
+                    (
+                        run_id,
+                        trace["workflow"],
+                        trace["workflow"],
+                        run_id,
+                        trace["started"],
+                        trace["finished"],
+                        status,
+                        len(spans),
+                        failed,
+                    ),
+                )
+                conn.execute("DELETE FROM tasks WHERE run_id = ?", (run_id,))
+                conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                if self.keep_runs is not None:
+                    # Their tasks go with them (ON DELETE CASCADE)
+                    (key,) = conn.execute("SELECT key FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+                    conn.execute(
+                        "DELETE FROM runs WHERE key = ? AND run_id NOT IN"
+                        " (SELECT run_id FROM runs WHERE key = ? ORDER BY started DESC LIMIT ?)",
+                        (key, key, self.keep_runs),
+                    )
+
+    def estimates(self, key: str, runs: int = ESTIMATE_RUNS) -> Dict[str, float]:
+        """Median duration of the last ``runs`` successful runs of each task.
+
+        Only runs recorded under ``key`` (see :meth:`start_run`) count.
+        Cached results are ignored, since they say nothing about how long
+        the task takes to run.
+        """
+        return {task: statistics.median(values) for task, values in self.durations(key, runs).items()}
+
+    def durations(self, key: str, runs: int = ESTIMATE_RUNS) -> Dict[str, List[float]]:
+        """Durations of the last ``runs`` successful runs of each task, newest first.
+
+        Only runs recorded under ``key`` count.
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT task, duration FROM ("
+                " SELECT tasks.task, tasks.duration,"
+                " ROW_NUMBER() OVER (PARTITION BY tasks.task ORDER BY tasks.started DESC) AS recent"
+                " FROM tasks JOIN runs USING (run_id)"
+                " WHERE runs.key = ? AND tasks.status = 'ok' AND tasks.duration IS NOT NULL"
+                ") WHERE recent <= ? ORDER BY task, recent",
+                (key, runs),
+            ).fetchall()
+        samples: Dict[str, List[float]] = {}
+        for task, duration in rows:
+            samples.setdefault(task, []).append(duration)
+        return samples
+
+    def runs(self, workflow: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """The most recent runs, newest first."""
+        query = "SELECT * FROM runs"
+        params: List[Any] = []
+        if workflow is not None:
+            query += " WHERE workflow = ?"
+            params.append(workflow)
+        query += " ORDER BY started DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._connect().execute(query, params)]
+
+    def task_stats(self, workflow: Optional[str] = None, task: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per‑task aggregates over all recorded runs, slowest first.
+
+        Shards of map tasks are folded into one row per map task.
+        """
+        query = (
+            "SELECT runs.workflow, tasks.task, tasks.plugin, tasks.status, tasks.duration,"
+            " tasks.cpu_seconds, tasks.rss_delta_bytes, tasks.run_id FROM tasks JOIN runs USING (run_id)"
+        )
+        params: List[Any] = []
+        if workflow is not None:
+            query += " WHERE runs.workflow = ?"
+            params.append(workflow)
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        groups: Dict[Any, Dict[str, Any]] = {}
+        for row in rows:
+            match = _SHARD.match(row["task"])
+            name = match.group(1) if match else row["task"]
+            if task is not None and name != task:
+                continue
+            entry = groups.get((row["workflow"], name))
+            if entry is None:
+                entry = groups[(row["workflow"], name)] = {
+                    "workflow": row["workflow"],
+                    "task": name,
+                    "plugin": row["plugin"],
+                    "runs": set(),
+                    "failures": 0,
+                    "durations": [],
+                    "cpu_seconds": [],
+                    "max_rss_delta_bytes": None,
+                }
+            entry["runs"].add(row["run_id"])
+            if row["status"] == "error":
+                entry["failures"] += 1
+            if row["status"] == "ok" and row["duration"] is not None:
+                entry["durations"].append(row["duration"])
+            if row["cpu_seconds"] is not None:
+                entry["cpu_seconds"].append(row["cpu_seconds"])
+            if row["rss_delta_bytes"] is not None:
+                entry["max_rss_delta_bytes"] = max(entry["max_rss_delta_bytes"] or 0, row["rss_delta_bytes"])
+        stats = []
+        for entry in groups.values():
+            durations = entry.pop("durations")
+            cpu = entry.pop("cpu_seconds")
+            entry["runs"] = len(entry["runs"])
+            entry["mean_seconds"] = statistics.fmean(durations) if durations else None
+            entry["median_seconds"] = statistics.median(durations) if durations else None
+            entry["max_seconds"] = max(durations) if durations else None
+            entry["mean_cpu_seconds"] = statistics.fmean(cpu) if cpu else None
+            stats.append(entry)
+        stats.sort(key=lambda entry: entry["mean_seconds"] or 0.0, reverse=True)
+        return stats
+
+
+def _run_id(run_dir: Union[str, Path]) -> str:
+    return str(Path(run_dir).resolve())
+
+
+def critical_path_priorities(
+    tasks: Dict[str, Dict[str, Any]], estimates: Dict[str, float]
+) -> Dict[str, float]:
+    """Estimated time from the start of each task to the end of the run.
+
+    This is the length of the longest path from the task through its
+    dependents, weighting each task by its estimated duration.  Starting
+    the ready task with the highest value first keeps long chains from
+    starting late.  A map task is weighted by its slowest recorded shard
+    as well, since its shards run before it completes.  Tasks without
+    history are weighted by the median of the known estimates, or 1 if
+    there are none, so that on a first run chains with more tasks go first.
+
+    Parameters
+    ----------
+    tasks:
+        Task definitions ordered so that every task comes after its
+        dependencies, as returned by :func:`load_workflow`.
+    estimates:
+        Expected duration of tasks, and of shards by their shard ID.
+    """
+    default = statistics.median(estimates.values()) if estimates else 1.0
+    shards: Dict[str, float] = {}
+    for task_id, duration in estimates.items():
+        match = _SHARD.match(task_id)
+        if match:
+            shards[match.group(1)] = max(shards.get(match.group(1), 0.0), duration)
+    dependents: Dict[str, List[str]] = {tid: [] for tid in tasks}
+    for tid, task in tasks.items():
+        for dep in task["depends_on"]:
+            dependents[dep].append(tid)
+    priorities: Dict[str, float] = {}
+    for tid in reversed(list(tasks)):
+        own = estimates.get(tid, default) + shards.get(tid, 0.0)
+        priorities[tid] = own + max((priorities[child] for child in dependents[tid]), default=0.0)
+    return priorities
+
+
+def straggler_thresholds(
+    durations: Dict[str, List[float]],
+    percentiles: Dict[str, float],
+    min_runs: int = SPECULATION_MIN_RUNS,
+) -> Dict[str, float]:
+    """Duration after which a running task counts as a straggler.
+
+    Parameters
+    ----------
+    durations:
+        Recorded durations of tasks and shards, as returned by
+        :meth:`RunHistory.durations`.
+    percentiles:
+        Percentile of its recorded durations, between 0 and 100, at which
+        each task becomes a straggler.  The durations of all shards of a
+        map task are pooled under the map task's ID, and replace the
+        duration of the map task itself, since a shard is compared with
+        its siblings.
+    min_runs:
+        Tasks with fewer recorded durations get no threshold.
+    """
+    shards: Dict[str, List[float]] = {}
+    for task_id, values in durations.items():
+        match = _SHARD.match(task_id)
+        if match:
+            shards.setdefault(match.group(1), []).extend(values)
+    thresholds: Dict[str, float] = {}
+    for task_id, percentile in percentiles.items():
+        values = sorted(shards.get(task_id) or durations.get(task_id, []))
+        if len(values) < max(min_runs, 1):
+            continue
+        # Linear interpolation between the closest ranks
+        position = (len(values) - 1) * percentile / 100.0
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        thresholds[task_id] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    return thresholds
+
+
+def _seconds(value: Optional[float]) -> str:
+    return f"{value:.3f}s" if value is not None else "-"
+
+
+def format_runs(runs: List[Dict[str, Any]]) -> str:
+    """Render runs returned by :meth:`RunHistory.runs` as a table."""
+    lines = [f"{'started':<20} {'workflow':<24} {'status':<8} {'tasks':>6} {'failed':>6} {'wall':>10}  run"]
+    for run in runs:
+        wall = run["finished"] - run["started"] if run["finished"] is not None else None
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"]))
+        lines.append(
+            f"{started:<20} {run['workflow']:<24} {run['status']:<8} {run['tasks'] or 0:>6}"
+            f" {run['failed'] or 0:>6} {_seconds(wall):>10}  {Path(run['run_dir']).name}"
+        )
+    return "\n".join(lines)
+
+
+def format_task_stats(stats: List[Dict[str, Any]]) -> str:
+    """Render aggregates returned by :meth:`RunHistory.task_stats` as a table."""
+    lines = [f"{'task':<30} {'runs':>5} {'failed':>6} {'median':>10} {'mean':>10} {'max':>10} {'cpu':>10}  plugin"]
+    for entry in stats:
+        lines.append(
+            f"{entry['task']:<30} {entry['runs']:>5} {entry['failures']:>6}"
+            f" {_seconds(entry['median_seconds']):>10} {_seconds(entry['mean_seconds']):>10}"
+            f" {_seconds(entry['max_seconds']):>10} {_seconds(entry['mean_cpu_seconds']):>10}  {entry['plugin']}"
+        )
+    return "\n".join(lines)
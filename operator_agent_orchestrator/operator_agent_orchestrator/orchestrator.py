@@ -2,23 +2,166 @@
 
 The :class:`Orchestrator` class loads a workflow definition from a YAML file,
 resolves task dependencies, executes tasks concurrently using asyncio and
-records structured logs.  Tasks are defined by plugins listed in
+records structured logs (see :mod:`operator_agent_orchestrator.runlog`).  Tasks are defined by plugins listed in
 ``operator_agent_orchestrator.plugins`` and specified in the workflow file.
+
+Workflows are validated and topologically sorted when they are loaded, so
+unknown dependencies and dependency cycles fail before any task runs.  At
+run time tasks are dispatched from a ready queue as soon as their last
+dependency finishes.  Dispatch can be bounded with a workflow‑wide
+``max_parallel``, per‑plugin limits (``plugin_limits``) and declarative
+resource tags: a task declaring ``resources: {memory_gb: 8}`` only starts
+once 8 units of ``memory_gb`` are free in the host capacities.
+
+Tasks may opt into result caching with ``cache: true`` (or the workflow may
+set ``cache: true`` as a default).  Cached tasks whose plugin, config,
+inputs and upstream results are unchanged since a previous run are not
+re‑executed; see :mod:`operator_agent_orchestrator.cache`.
+
+The ``executor`` key (per task or workflow‑wide) selects whether a plugin
+runs in a thread, in a reusable process pool, inline on the event loop or
+on a remote worker; see :mod:`operator_agent_orchestrator.executors`.
+
+Every run records a span per task (ready, start and finish times, worker,
+CPU time and memory delta) in ``trace.json`` and ``trace.chrome.json`` in
+the run directory; see :mod:`operator_agent_orchestrator.tracing`.
+
+A task with a ``foreach`` key is a map task.  When its dependencies have
+finished it expands into one shard per item of a list, per file matching a
+glob, or per partition published by an upstream task.  The shards are
+scheduled like any other task, so they run in parallel within the
+configured limits, and an optional ``reduce`` step combines their results
+into the task's own result.
+
+Tasks whose dependencies failed are skipped.  A task may bound each attempt
+with a ``timeout``, be retried (``retries``, ``retry_delay``), cancel the rest
+of the run when it fails (``fail_fast``) and, if it is idempotent, be
+duplicated once it runs longer than usual (``speculate``).
+
+Each task's result is checkpointed in the run directory as soon as it
+finishes, unless the task or workflow sets ``checkpoint: false``, and
+:meth:`Orchestrator.resume` continues an interrupted or failed run,
+executing only the tasks without a checkpoint; see
+:mod:`operator_agent_orchestrator.checkpoint`.
+
+:meth:`Orchestrator.run_workflow_async` runs a workflow on an existing
+event loop and returns a :class:`RunResult`.
+:meth:`Orchestrator.run_workflows_async` runs a batch of workflows at once,
+sharing the executor pools and, optionally, a number of task slots that are
+handed out round‑robin between the runs.
+
+Validated workflows are compiled into plans that are cached on the hash of
+the workflow file, so unchanged workflows are not parsed again; see
+:mod:`operator_agent_orchestrator.plans`.
 """
 
 from __future__ import annotations
 
 import asyncio
 import datetime
-import json
+import glob
+import heapq
+import itertools
 import logging
 import os
+import sqlite3
+import time
+from collections import ChainMap, OrderedDict, deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import yaml
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
+from .artifacts import ArtifactStore, ArtifactView, default_memory_limit
+from .cache import DEFAULT_MAX_BYTES, RecordingContext, TaskCache, digest, task_key
+from .checkpoint import PLAN_FILE, Checkpoints
+from .executors import DEFAULT_EXECUTOR, EXECUTORS, ExecutorPool, TaskExecutor, run_in_new_thread
+from .history import (
+    HISTORY_FILE,
+    KEEP_RUNS,
+    SPECULATION_RUNS,
+    RunHistory,
+    critical_path_priorities,
+    straggler_thresholds,
+)
+from .plans import PLAN_SUFFIX, PlanCache, parse_yaml, plan_key, read_plan, write_plan
 from .plugins import PLUGINS
+from .runlog import RunLog
+from .streams import DEFAULT_BUFFER, Stream
+from .summary import SummaryWriter
+from .tracing import Tracer
+
+
+#: Executors able to run streaming tasks and the tasks reading them.
+STREAM_EXECUTORS = ("thread", "inline")
+
+#: Seconds before the first retry of a failed task; doubled for each further
+#: attempt up to ``MAX_RETRY_DELAY``.
+DEFAULT_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 300.0
+
+#: Percentile of its recorded durations after which ``speculate: true``
+#: starts a second copy of a task.
+DEFAULT_SPECULATE_PERCENTILE = 95.0
+
+
+class RunResult:
+    """Outcome of one workflow run.
+
+    Attributes
+    ----------
+    workflow:
+        Path of the workflow (or plan) that was run.
+    run_dir:
+        Directory holding the run's logs, trace and summary, or None if
+        the run failed before it was created.
+    results:
+        Result of every task that finished, keyed by task ID.  Failed
+        tasks, and tasks skipped or cancelled because of them, have a
+        result with an ``error`` key.
+    status:
+        ``ok`` if every task succeeded, ``failed`` if some task failed and
+        ``aborted`` if the run itself raised; :attr:`error` then holds the
+        message.
+    started, finished:
+        Wall‑clock times of the start and end of the run.
+    """
+
+    def __init__(
+        self,
+        workflow: str,
+        run_dir: Optional[Path],
+        results: Dict[str, Any],
+        started: float,
+        finished: float,
+        error: Optional[str] = None,
+    ) -> None:
+        self.workflow = workflow
+        self.run_dir = run_dir
+        self.results = results
+        self.started = started
+        self.finished = finished
+        self.error = error
+
+    @property
+    def failed(self) -> List[str]:
+        """IDs of the tasks whose result is an error."""
+        return [tid for tid, result in self.results.items() if isinstance(result, dict) and "error" in result]
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "aborted"
+        return "failed" if self.failed else "ok"
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+    def __repr__(self) -> str:
+        return f"<RunResult {self.workflow} {self.status} in {self.duration:.3f}s>"
 
 
 class Orchestrator:
@@ -30,114 +173,1585 @@ class Orchestrator:
         Optional root directory where run logs should be written.  If None,
         a `logs/` directory will be created relative to the current working
         directory.
+    cache_dir:
+        Directory of the task result cache.  Defaults to ``cache/`` inside
+        ``log_root``.
+    use_cache:
+        If False, cached results are neither read nor written, even for
+        tasks that opt in, and workflows are compiled afresh on every run
+        instead of being loaded from the plan cache in ``plans/`` inside
+        the cache directory.
+    cache_max_bytes:
+        Size limit of the on‑disk cache before least recently used entries
+        are evicted.
+    process_workers:
+        Size of the process pool used by tasks with ``executor: process``.
+        Defaults to the number of CPUs.  The pool is started on first use
+        and reused across runs until :meth:`close` is called.
+    max_parallel:
+        Maximum number of tasks running at once.  Overrides the workflow's
+        own ``max_parallel`` setting.
+    resources:
+        Host capacities for resource tags, such as ``{"memory_gb": 32}``.
+        Merged over (and taking precedence over) the capacities declared
+        in the workflow's ``resources`` section.
+    profile:
+        If True, every synchronous plugin call is profiled with
+        :mod:`cProfile` and the statistics are saved to
+        ``profiles/<task>.prof`` in the run directory.
+    preload:
+        Modules imported by every process pool worker when it starts, so
+        that tasks sent to the pool do not pay for the imports.
+    log_level:
+        Minimum level of the records written to ``run.log`` and
+        ``events.jsonl`` in the run directory.
+    console_level:
+        Minimum level of the records printed to standard error, or None
+        to keep runs silent.  Printing a line per task slows down
+        workflows with many small tasks.
+    broker:
+        ``HOST:PORT`` the broker for tasks with ``executor: remote``
+        listens on.  The broker is started on first use and reused across
+        runs until :meth:`close` is called.
+    broker_token:
+        Secret remote workers must present.  Generated if not given.
+    workers:
+        Number of ``oprun worker`` processes started on this machine along
+        with the broker.
+    worker_slots:
+        Tasks each of those workers runs at once.
+    on_broker_start:
+        Called with the broker's address and token once it has started,
+        so that workers on other machines can be pointed at it.
+    artifact_memory:
+        Bytes of DataFrames and arrays published by tasks that are kept in
+        memory before the largest are spilled to memory‑mapped files.
+        Defaults to a quarter of physical memory.
+    compact_summary:
+        Write ``summary.json`` without indentation, which is faster for
+        large summaries.
+    history:
+        Record runs and task durations in a SQLite index and use past
+        durations to start tasks on the longest remaining path first.
+    history_path:
+        Location of the index.  Defaults to ``history.sqlite`` in
+        ``log_root``.
+    history_keep:
+        Runs of each workflow kept in the history, or None to keep all.
+    checkpoint:
+        Checkpoint finished tasks so that :meth:`resume` can skip them.
+        When False no task is checkpointed, whatever its workflow says.
     """
 
-    def __init__(self, log_root: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        log_root: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        use_cache: bool = True,
+        cache_max_bytes: int = DEFAULT_MAX_BYTES,
+        process_workers: Optional[int] = None,
+        max_parallel: Optional[int] = None,
+        resources: Optional[Dict[str, float]] = None,
+        profile: bool = False,
+        preload: Sequence[str] = (),
+        log_level: int = logging.INFO,
+        console_level: Optional[int] = logging.INFO,
+        broker: str = "127.0.0.1:0",
+        broker_token: Optional[str] = None,
+        workers: int = 0,
+        worker_slots: int = 1,
+        on_broker_start: Optional[Callable[[str, str], None]] = None,
+        artifact_memory: Optional[int] = None,
+        compact_summary: bool = False,
+        history: bool = True,
+        history_path: Optional[str] = None,
+        history_keep: Optional[int] = KEEP_RUNS,
+        checkpoint: bool = True,
+    ) -> None:
         self.log_root = Path(log_root) if log_root else Path("logs")
         self.log_root.mkdir(parents=True, exist_ok=True)
+        cache_root = Path(cache_dir) if cache_dir else self.log_root / "cache"
+        self.cache = TaskCache(cache_root, max_bytes=cache_max_bytes)
+        self.use_cache = use_cache
+        self.plans = PlanCache(cache_root / "plans") if use_cache else None
+        self.executors = ExecutorPool(
+            max_workers=process_workers,
+            preload=tuple(preload),
+            broker=broker,
+            broker_token=broker_token,
+            local_workers=workers,
+            worker_slots=worker_slots,
+            on_broker_start=on_broker_start,
+        )
+        self.max_parallel = max_parallel
+        self.resources = dict(resources or {})
+        self.profile = profile
+        self.log_level = log_level
+        self.console_level = console_level
+        self.artifact_memory = artifact_memory if artifact_memory is not None else default_memory_limit()
+        self.compact_summary = compact_summary
+        self.checkpoint = checkpoint
+        self.history: Optional[RunHistory] = None
+        if history:
+            self.history = RunHistory(history_path or self.log_root / HISTORY_FILE, keep_runs=history_keep)
+        self._plugins: Dict[str, Any] = {}
+
+    def _plugin(self, plugin_name: str) -> Any:
+        # Plugins are stateless, so one instance serves every task and run
+        plugin = self._plugins.get(plugin_name)
+        if plugin is None:
+            plugin = self._plugins[plugin_name] = PLUGINS[plugin_name]()
+        return plugin
 
-    def run_workflow(self, workflow_path: str) -> None:
+    def close(self) -> None:
+        """Release long‑lived resources such as the process pool and broker."""
+        self.executors.shutdown()
+        if self.history is not None:
+            self.history.close()
+
+    def run_workflow(self, workflow_path: str) -> RunResult:
         """Synchronously run a workflow definition.
 
-        Internally, this method invokes :func:`asyncio.run` on the
-        asynchronous implementation.  Results and logs are written to disk
-        when execution completes.
+        Internally, this method invokes :func:`asyncio.run` on
+        :meth:`run_workflow_async`, so it cannot be called from a running
+        event loop.  Results and logs are also written to disk.
 
         Parameters
         ----------
         workflow_path:
             Path to a YAML file describing the workflow.
         """
-        asyncio.run(self._run_workflow_async(workflow_path))
+        return asyncio.run(self.run_workflow_async(workflow_path))
+
+    async def run_workflow_async(self, workflow_path: str) -> RunResult:
+        """Run a workflow definition on the running event loop.
+
+        Runs started concurrently on one :class:`Orchestrator` share its
+        plugins, caches and executor pools.
+
+        Parameters
+        ----------
+        workflow_path:
+            Path to a YAML file describing the workflow, or to a compiled
+            plan.
+
+        Returns
+        -------
+        RunResult
+            The run directory and the result of every task.
+        """
+        started = time.time()
+        run_dir, results = await self._run_workflow_async(workflow_path)
+        return RunResult(workflow_path, run_dir, results, started, time.time())
+
+    def run_workflows(
+        self, workflow_paths: Iterable[str], max_parallel: Optional[int] = None, max_runs: Optional[int] = None
+    ) -> List[RunResult]:
+        """Synchronously run several workflows at once.
+
+        See :meth:`run_workflows_async`.
+        """
+        return asyncio.run(self.run_workflows_async(workflow_paths, max_parallel=max_parallel, max_runs=max_runs))
+
+    async def run_workflows_async(
+        self, workflow_paths: Iterable[str], max_parallel: Optional[int] = None, max_runs: Optional[int] = None
+    ) -> List[RunResult]:
+        """Run several workflows concurrently on the running event loop.
+
+        All runs share this orchestrator's executor pools.  With
+        ``max_parallel`` they also share that many task slots, handed out
+        round‑robin between the runs with tasks waiting, so a run with many
+        ready tasks cannot hold up runs started after it.  Each run's own
+        ``max_parallel`` and resource limits still apply.
+
+        Parameters
+        ----------
+        workflow_paths:
+            Workflows to run.  The same path may be given more than once.
+        max_parallel:
+            Maximum number of tasks running at once across all the runs.
+            Unlimited if None.
+        max_runs:
+            Maximum number of workflows running at once; the others wait
+            for a run to finish.  Unlimited if None.
+
+        Returns
+        -------
+        List[RunResult]
+            One result per workflow, in the order given.  A run that raised
+            has the ``aborted`` status instead of propagating the error.
+        """
+        if max_parallel is not None and max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1")
+        if max_runs is not None and max_runs < 1:
+            raise ValueError("max_runs must be at least 1")
+        share = _FairShare(max_parallel) if max_parallel is not None else None
+        slots = asyncio.Semaphore(max_runs) if max_runs is not None else None
+
+        async def run_one(workflow_path: str) -> RunResult:
+            if slots is not None:
+                await slots.acquire()
+            started = time.time()
+            try:
+                run_dir, results = await self._run_workflow_async(workflow_path, share=share)
+            except Exception as exc:  # noqa: BLE001
+                return RunResult(workflow_path, None, {}, started, time.time(), error=str(exc))
+            finally:
+                if slots is not None:
+                    slots.release()
+            return RunResult(workflow_path, run_dir, results, started, time.time())
+
+        return list(await asyncio.gather(*(run_one(path) for path in workflow_paths)))
+
+    def resume(self, run_dir: str) -> RunResult:
+        """Continue an interrupted or partly failed run in ``run_dir``.
+
+        Tasks checkpointed by the earlier run are restored, together with
+        the values they published, and only the remaining tasks are
+        executed.  The run continues the workflow as it was compiled when
+        the run started, appending to the run's log and rewriting its
+        summary and trace.
+
+        Parameters
+        ----------
+        run_dir:
+            Run directory created by an earlier :meth:`run_workflow`.
+        """
+        started = time.time()
+        path, results = asyncio.run(self._resume_async(run_dir))
+        return RunResult(str(path / PLAN_FILE), path, results, started, time.time())
 
-    async def _run_workflow_async(self, workflow_path: str) -> None:
-        # Load the YAML
-        with open(workflow_path, "r", encoding="utf-8") as f:
-            definition = yaml.safe_load(f)
-        tasks_def = definition.get("tasks") or []
-        name = definition.get("name", "unnamed-workflow")
-        description = definition.get("description", "")
+    def _limits(self, workflow: Dict[str, Any]) -> _Limits:
+        limits = _Limits(
+            max_parallel=self.max_parallel or workflow["max_parallel"],
+            plugin_limits=workflow["plugin_limits"],
+            capacities={**workflow["resources"], **self.resources},
+        )
+        limits.validate(workflow["tasks"])
+        return limits
 
-        # Create run directory
+    async def _run_workflow_async(
+        self,
+        workflow_path: str,
+        share: Optional["_FairShare"] = None,
+        workflow: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Path, Dict[str, Any]]:
+        # Callers that validated the workflow up front pass it in so the
+        # file is not loaded a second time
+        if workflow is None:
+            workflow = load_workflow(workflow_path, plan_cache=self.plans)
+        limits = self._limits(workflow)
+
+        # Create run directory, unique even for concurrent runs of the
+        # same workflow
         ts = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-        run_dir = self.log_root / f"{Path(workflow_path).stem}_{ts}"
-        run_dir.mkdir(parents=True, exist_ok=True)
-
-        # Set up logger
-        logger = logging.getLogger(f"orchestrator.{ts}")
-        logger.setLevel(logging.INFO)
-        # File handler
-        fh = logging.FileHandler(run_dir / "run.log", encoding="utf-8")
-        fh.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
-        logger.addHandler(fh)
-        # Console handler
-        ch = logging.StreamHandler()
-        ch.setFormatter(logging.Formatter("%(message)s"))
-        logger.addHandler(ch)
-
-        logger.info(f"Starting workflow: {name}")
-        if description:
-            logger.info(description)
-
-        # Validate tasks and build data structures
-        tasks: Dict[str, Dict[str, Any]] = {}
-        for idx, t in enumerate(tasks_def):
-            tid = t.get("id")
-            if not tid or not isinstance(tid, str):
-                raise ValueError(f"Task at index {idx} is missing a string 'id'")
-            if tid in tasks:
-                raise ValueError(f"Duplicate task id '{tid}'")
-            plugin_name = t.get("plugin")
-            if plugin_name not in PLUGINS:
-                raise ValueError(f"Unknown plugin '{plugin_name}' for task '{tid}'")
-            config = t.get("config", {})
-            depends_on = t.get("depends_on", []) or []
-            if not isinstance(depends_on, list):
-                raise ValueError(f"'depends_on' for task '{tid}' must be a list")
-            tasks[tid] = {
-                "plugin": plugin_name,
-                "config": config,
-                "depends_on": depends_on,
+        base = f"{Path(workflow_path).stem}_{ts}"
+        run_dir = self.log_root / base
+        attempt = 1
+        while True:
+            try:
+                run_dir.mkdir(parents=True)
+                break
+            except FileExistsError:
+                attempt += 1
+                run_dir = self.log_root / f"{base}-{attempt}"
+        write_plan(workflow, run_dir / PLAN_FILE)
+        # Durations are shared between runs of the same file, not of every
+        # workflow that happens to have the same name
+        history_key = str(Path(workflow_path).resolve())
+        return await self._execute(workflow, limits, run_dir, {}, share=share, history_key=history_key)
+
+    async def _resume_async(self, run_dir: str) -> Tuple[Path, Dict[str, Any]]:
+        path = Path(run_dir)
+        if not (path / PLAN_FILE).exists():
+            raise ValueError(f"{run_dir} cannot be resumed: it has no {PLAN_FILE}")
+        workflow = load_workflow(str(path / PLAN_FILE))
+        limits = self._limits(workflow)
+        return await self._execute(workflow, limits, path, Checkpoints(path).load())
+
+    async def _execute(
+        self,
+        workflow: Dict[str, Any],
+        limits: _Limits,
+        run_dir: Path,
+        completed: Dict[str, Dict[str, Any]],
+        share: Optional["_FairShare"] = None,
+        history_key: Optional[str] = None,
+    ) -> Tuple[Path, Dict[str, Any]]:
+        name = workflow["name"]
+        description = workflow["description"]
+        tasks: Dict[str, Dict[str, Any]] = workflow["tasks"]
+
+        run_log = RunLog(run_dir, level=self.log_level, console_level=self.console_level)
+        logger = run_log.logger
+        summary = SummaryWriter(run_dir, compact=self.compact_summary)
+
+        try:
+            if completed:
+                logger.info(
+                    f"Resuming workflow: {name} ({len(completed)} tasks checkpointed)",
+                    extra={"event": "run_resume", "workflow": name, "checkpointed": len(completed)},
+                )
+            else:
+                logger.info(f"Starting workflow: {name}", extra={"event": "run_start", "workflow": name})
+            if description:
+                logger.info(description)
+
+            # Results of finished tasks and the values tasks publish into
+            # their context, namespaced by task and freed once every
+            # dependent has finished
+            results: Dict[str, Any] = {}
+            store = ArtifactStore(run_dir / "spill", memory_limit=self.artifact_memory)
+            consumers: Dict[str, int] = {tid: 0 for tid in tasks}
+            for task in tasks.values():
+                for dep in task["depends_on"]:
+                    consumers[dep] += 1
+            for tid, count in consumers.items():
+                if count:
+                    store.retain(tid, count)
+            # Results of the shards of map tasks and the partitioned values
+            # those shards read from
+            shard_results: Dict[str, Any] = {}
+            sources: Dict[str, Any] = {}
+            expansion_errors: Dict[str, str] = {}
+            # Streams of streaming tasks, the futures resolved when they open
+            # and the readers handed to each reading task
+            streams: Dict[str, Stream] = {}
+            loop = asyncio.get_running_loop()
+            opened: Dict[str, "asyncio.Future[None]"] = {
+                tid: loop.create_future() for tid, task in tasks.items() if task.get("stream")
             }
+            stream_readers: Dict[str, Dict[str, Any]] = {}
+
+            # Content fingerprints of finished tasks, used to key downstream
+            # cache entries.  Only computed when some task opts into caching.
+            use_cache = self.use_cache and any(t["cache"] for t in tasks.values())
+            fingerprints: Dict[str, str] = {}
+
+            executor = TaskExecutor(self.executors)
+            checkpoints = Checkpoints(run_dir)
+            tracer = Tracer(name)
+            profile_dir: Optional[Path] = None
+            if self.profile:
+                profile_dir = run_dir / "profiles"
+                profile_dir.mkdir(exist_ok=True)
+
+            def profile_path(task_id: str) -> Optional[str]:
+                return str(profile_dir / f"{task_id}.prof") if profile_dir else None
+
+            def worker_log(task_id: str) -> Callable[[int, str], None]:
+                # Called from the broker's threads; the run log is thread safe
+                def log(level: int, message: str) -> None:
+                    logger.log(level, f"Task {task_id}: {message}", extra={"event": "worker_log", "task": task_id})
+
+                return log
+
+            def view(task_id: str, attempt: Optional[int] = None) -> ArtifactView:
+                return ArtifactView(store, task_id, tasks[task_id]["depends_on"], results, attempt)
+
+            def restore(task_id: str) -> Any:
+                tracer.start(task_id)
+                entry = completed[task_id]
+                result = entry["result"]
+                store.publish(task_id, entry["published"])
+                if entry["fingerprint"] is not None:
+                    fingerprints[task_id] = entry["fingerprint"]
+                results[task_id] = result
+                logger.info(
+                    f"Task {task_id} restored from checkpoint",
+                    extra={"event": "task_restored", "task": task_id},
+                )
+                tracer.finish(task_id, "restored")
+                return result
+
+            async def checkpoint(task_id: str, result: Any, values: Dict[str, Any]) -> None:
+                if not self.checkpoint or not tasks[task_id]["checkpoint"]:
+                    return
+                args = (task_id, result, values, fingerprints.get(task_id))
+                # Results alone are small; published values such as
+                # DataFrames are pickled off the event loop
+                saved = await asyncio.to_thread(checkpoints.save, *args) if values else checkpoints.save(*args)
+                if not saved:
+                    logger.warning(
+                        f"Task {task_id} could not be checkpointed",
+                        extra={"event": "checkpoint_failed", "task": task_id},
+                    )
+
+            def expand(task_id: str) -> Dict[str, Dict[str, Any]]:
+                task = tasks[task_id]
+                if task_id in completed:
+                    # Restored as a whole, without running its shards
+                    return {}
+                if any(_failed(results.get(dep)) for dep in task["depends_on"]):
+                    # Skipped as a whole
+                    return {}
+                try:
+                    items, source = _foreach_items(task["foreach"], store, results)
+                except Exception as exc:  # noqa: BLE001
+                    logger.error(
+                        f"Task {task_id} could not be expanded: {exc}",
+                        extra={"event": "task_error", "task": task_id},
+                    )
+                    expansion_errors[task_id] = str(exc)
+                    items, source = [], None
+                if source is not None:
+                    sources[task_id] = source
+                shards: Dict[str, Dict[str, Any]] = {}
+                for index, item in enumerate(items):
+                    shards[f"{task_id}[{index}]"] = {
+                        **task,
+                        "config": _substitute(task["config"], {"item": item, "index": index}),
+                        "depends_on": list(task["depends_on"]),
+                        "foreach": None,
+                        "reduce": None,
+                        "shard": {"of": task_id, "index": index},
+                    }
+                task["shards"] = list(shards)
+                logger.info(
+                    f"Task {task_id} expanded into {len(shards)} shards",
+                    extra={"event": "task_expanded", "task": task_id, "shards": len(shards)},
+                )
+                return shards
+
+            async def drain(task_id: str, source: Any) -> Dict[str, Any]:
+                # Feed the iterable returned by a streaming task to its readers
+                if not hasattr(source, "__aiter__") and not hasattr(source, "__iter__"):
+                    raise TypeError(f"Streaming task returned {type(source).__name__}, not an iterable")
+                readers = [tid for tid, task in tasks.items() if task_id in task["depends_on"]]
+                stream = streams[task_id] = Stream(tasks[task_id]["stream"], readers=len(readers))
+                for reader_id, reader in zip(readers, stream.readers):
+                    stream_readers.setdefault(reader_id, {})[task_id] = reader
+                opened[task_id].set_result(None)
+                logger.info(
+                    f"Task {task_id} streaming to {len(readers)} tasks",
+                    extra={"event": "stream_open", "task": task_id, "readers": readers},
+                )
+                try:
+                    if hasattr(source, "__aiter__"):
+                        count = await stream.afill(source)
+                    else:
+                        count = await run_in_new_thread(stream.fill, source, name=f"oprun-stream-{task_id}")
+                except BaseException as exc:
+                    stream.close(exc)
+                    raise
+                stream.close()
+                return {"items": count}
+
+            async def run_task(task_id: str) -> Any:
+                release_slot: Optional[Callable[..., None]] = None
+                if share is not None:
+                    await share.acquire(run_dir.name)
+                    release_slot = _once(share.release)
+                    # Like the run's own limits, a streaming task hands its
+                    # slot back once its readers may start
+                    if task_id in opened:
+                        opened[task_id].add_done_callback(release_slot)
+                try:
+                    result = await run_single_task(task_id)
+                    if not tasks[task_id].get("shard"):
+                        summary.add(task_id, result)
+                    if tasks[task_id]["fail_fast"] and _failed(result):
+                        raise _FailFast(task_id)
+                    return result
+                finally:
+                    # A reader that stopped early must not hold up its stream
+                    for reader in stream_readers.pop(task_id, {}).values():
+                        reader.close()
+                    # Shards are covered by their map task's reference
+                    if not tasks[task_id].get("shard"):
+                        for dep in tasks[task_id]["depends_on"]:
+                            store.release(dep)
+                    if release_slot is not None:
+                        release_slot()
+
+            def skip(task_id: str, failed: List[str]) -> Any:
+                tracer.start(task_id)
+                result = {"error": f"Skipped because {', '.join(failed)} failed"}
+                logger.warning(
+                    f"Task {task_id} skipped: {', '.join(failed)} failed",
+                    extra={"event": "task_skipped", "task": task_id, "failed": failed},
+                )
+                results[task_id] = result
+                tracer.finish(task_id, "skipped")
+                return result
+
+            async def run_attempt(
+                task_id: str, plugin: Any, local: Dict[str, Any], span: Dict[str, Any]
+            ) -> Tuple[Any, RecordingContext]:
+                # Run the task's plugin once, within the task's timeout
+                task = tasks[task_id]
+                readers = stream_readers.get(task_id)
+                attempt = store.begin_attempt(task_id)
+                if task["speculate"] is not None:
+                    # Copies running side by side keep their writes apart
+                    # until one of them wins
+                    task_context = RecordingContext(ChainMap({}, local, view(task_id, attempt)))
+                elif task.get("shard"):
+                    task_context = RecordingContext(ChainMap(local, view(task_id, attempt)), readers)
+                else:
+                    task_context = RecordingContext(view(task_id, attempt), readers)
+
+                async def call() -> Any:
+                    result = await executor.run(
+                        task["executor"],
+                        plugin,
+                        _substitute(task["config"], {"run_dir": str(run_dir), "task": task_id}),
+                        task_context,
+                        span=span,
+                        profile_path=profile_path(task_id),
+                        log=worker_log(task_id),
+                        # Reading a stream may block for the producer's lifetime
+                        dedicated=bool(readers),
+                        # A thread left running by a timeout still counts
+                        linger=lambda exited: limits.linger(task, exited),
+                    )
+                    if task.get("stream"):
+                        result = await drain(task_id, result)
+                    return result
+
+                try:
+                    return await _with_timeout(call(), task["timeout"], f"Task {task_id}"), task_context
+                except BaseException:
+                    # Whatever the attempt's thread still writes is dropped
+                    store.end_attempt(task_id, attempt)
+                    raise
 
-        # Shared context for tasks to publish results
-        context: Dict[str, Any] = {}
-        results: Dict[str, Any] = {}
-
-        # Keep futures for tasks
-        task_futures: Dict[str, asyncio.Future] = {}
-
-        async def run_single_task(task_id: str) -> Any:
-            # Wait for dependencies
-            for dep in tasks[task_id]["depends_on"]:
-                fut = task_futures.get(dep)
-                if fut:
-                    await fut
-            plugin_name = tasks[task_id]["plugin"]
-            config = tasks[task_id]["config"]
-            plugin_cls = PLUGINS[plugin_name]
-            plugin = plugin_cls()
-            logger.info(f"Running task {task_id} using plugin {plugin_name}...")
+            async def run_attempts(
+                task_id: str, plugin: Any, local: Dict[str, Any], span: Dict[str, Any]
+            ) -> Tuple[Any, RecordingContext]:
+                # Retry failed attempts and duplicate stragglers
+                task = tasks[task_id]
+                threshold = thresholds.get(task["shard"]["of"] if task.get("shard") else task_id)
+
+                def speculating() -> None:
+                    span["speculated"] = True
+                    logger.info(
+                        f"Task {task_id} has run longer than {threshold:.3f}s, starting a second copy",
+                        extra={"event": "task_speculate", "task": task_id, "threshold": threshold},
+                    )
+
+                attempts = task["retries"] + 1
+                attempt = 1
+                while True:
+                    try:
+                        if threshold is None:
+                            return await run_attempt(task_id, plugin, local, span)
+                        return await _speculate(
+                            lambda: run_attempt(task_id, plugin, local, span), threshold, speculating
+                        )
+                    except Exception as exc:  # noqa: BLE001
+                        if attempt == attempts:
+                            raise
+                        delay = _retry_delay(task["retry_delay"], attempt)
+                        logger.warning(
+                            f"Task {task_id} failed (attempt {attempt} of {attempts}), retrying in {delay:g}s: {exc}",
+                            extra={"event": "task_retry", "task": task_id, "attempt": attempt, "delay": delay},
+                        )
+                        attempt += 1
+                        span["attempts"] = attempt
+                        await asyncio.sleep(delay)
+
+            async def run_single_task(task_id: str) -> Any:
+                if task_id in completed:
+                    return restore(task_id)
+                # Nothing runs on the results of failed tasks
+                failed = [dep for dep in tasks[task_id]["depends_on"] if _failed(results.get(dep))]
+                if failed:
+                    return skip(task_id, failed)
+                if tasks[task_id].get("foreach"):
+                    return await join_shards(task_id)
+                tracer.start(task_id)
+                span: Dict[str, Any] = {}
+                status = "ok"
+                plugin_name = tasks[task_id]["plugin"]
+                config = tasks[task_id]["config"]
+                shard = tasks[task_id].get("shard")
+                plugin = self._plugin(plugin_name)
+                key: Optional[str] = None
+                cached = None
+                if use_cache:
+                    try:
+                        inputs = plugin.input_fingerprint(config)
+                    except OSError:
+                        inputs = None
+                    if shard is not None:
+                        # Shards of one partitioned value share their config
+                        inputs = [inputs, shard["index"]]
+                    upstream = {dep: fingerprints.get(dep, "") for dep in tasks[task_id]["depends_on"]}
+                    key = task_key(plugin_name, config, upstream, inputs)
+                    if tasks[task_id]["cache"]:
+                        cached = await asyncio.to_thread(self.cache.get, key)
+                values: Dict[str, Any] = {}
+                if cached is not None:
+                    result, values = cached
+                    if shard is None:
+                        store.publish(task_id, values)
+                    status = "cached"
+                    logger.info(
+                        f"Task {task_id} skipped: cached result {key[:12]}",
+                        extra={"event": "task_cached", "task": task_id, "key": key},
+                    )
+                else:
+                    logger.info(
+                        f"Running task {task_id} using plugin {plugin_name}...",
+                        extra={"event": "task_start", "task": task_id, "plugin": plugin_name},
+                    )
+                    # Shards see the shared context but keep their writes
+                    # (and the partition they work on) to themselves
+                    local: Dict[str, Any] = {}
+                    try:
+                        if shard is not None and shard["of"] in sources:
+                            local["dataframe"] = await asyncio.to_thread(
+                                sources[shard["of"]].partition, shard["index"]
+                            )
+                        result, task_context = await run_attempts(task_id, plugin, local, span)
+                        values = task_context.published
+                        if shard is None and tasks[task_id]["speculate"] is not None:
+                            store.publish(task_id, values)
+                        logger.info(f"Task {task_id} completed", extra={"event": "task_finish", "task": task_id})
+                        if key is not None and tasks[task_id]["cache"]:
+                            stored = await asyncio.to_thread(
+                                self.cache.put, key, result, task_context.published
+                            )
+                            if not stored:
+                                logger.warning(
+                                    f"Task {task_id} result could not be cached",
+                                    extra={"event": "cache_failed", "task": task_id},
+                                )
+                    except Exception as exc:  # noqa: BLE001
+                        logger.exception(
+                            f"Task {task_id} failed: {exc}", extra={"event": "task_error", "task": task_id}
+                        )
+                        result = {"error": str(exc)}
+                        status = "error"
+                if key is not None:
+                    # A deterministic task is fully described by its key; anything
+                    # else also folds in its actual result
+                    if tasks[task_id]["cache"] or getattr(plugin, "deterministic", False):
+                        fingerprints[task_id] = key
+                    else:
+                        fingerprints[task_id] = digest([key, digest(result)])
+                # Save result
+                if shard is None:
+                    results[task_id] = result
+                    # A stream cannot be replayed to readers of a resumed run
+                    if status != "error" and not tasks[task_id].get("stream"):
+                        await checkpoint(task_id, result, values)
+                else:
+                    shard_results[task_id] = result
+                tracer.finish(task_id, status, **span)
+                return result
+
+            async def join_shards(task_id: str) -> Any:
+                # Runs once every shard of a map task has finished
+                tracer.start(task_id)
+                span: Dict[str, Any] = {}
+                status = "ok"
+                task = tasks[task_id]
+                reduce = task["reduce"]
+                shard_ids = task.get("shards", [])
+                values = [shard_results.pop(sid) for sid in shard_ids]
+                failed = [sid for sid, value in zip(shard_ids, values) if isinstance(value, dict) and "error" in value]
+                if task_id in expansion_errors:
+                    result = {"error": expansion_errors[task_id]}
+                elif failed:
+                    result = {"error": f"Shards failed: {', '.join(failed)}", "results": values}
+                elif reduce is None:
+                    result = values
+                else:
+                    logger.info(
+                        f"Reducing {len(values)} shards of task {task_id} using plugin {reduce['plugin']}...",
+                        extra={"event": "task_reduce", "task": task_id, "plugin": reduce["plugin"]},
+                    )
+                    task_context = RecordingContext(view(task_id))
+                    try:
+                        result = await executor.run(
+                            reduce["executor"],
+                            self._plugin(reduce["plugin"]),
+                            _substitute(
+                                reduce["config"], {"results": values, "run_dir": str(run_dir), "task": task_id}
+                            ),
+                            task_context,
+                            span=span,
+                            profile_path=profile_path(task_id),
+                            log=worker_log(task_id),
+                        )
+                        values = task_context.published
+                    except Exception as exc:  # noqa: BLE001
+                        logger.exception(
+                            f"Task {task_id} reduce failed: {exc}", extra={"event": "task_error", "task": task_id}
+                        )
+                        result = {"error": str(exc)}
+                if isinstance(result, dict) and "error" in result:
+                    status = "error"
+                else:
+                    logger.info(f"Task {task_id} completed", extra={"event": "task_finish", "task": task_id})
+                if use_cache:
+                    parts: List[Any] = [[fingerprints.get(sid, "") for sid in shard_ids], reduce]
+                    if reduce is not None and not getattr(PLUGINS[reduce["plugin"]], "deterministic", False):
+                        parts.append(digest(result))
+                    fingerprints[task_id] = digest(parts)
+                results[task_id] = result
+                if status != "error":
+                    await checkpoint(task_id, result, values)
+                tracer.finish(task_id, status, **span)
+                return result
+
+            def cancel_rest(failed: str) -> None:
+                # Dispatch has cancelled the tasks that were still running
+                logger.warning(
+                    f"Task {failed} failed, cancelling the rest of the run",
+                    extra={"event": "run_cancelled", "task": failed},
+                )
+                for tid, span in tracer.spans.items():
+                    if "started" in span and "finished" not in span:
+                        tracer.finish(tid, "cancelled")
+                for tid, task in tasks.items():
+                    if tid not in results and not task.get("shard"):
+                        results[tid] = {"error": f"Cancelled because {failed} failed"}
+                        summary.add(tid, results[tid])
+
+            # Start the tasks with the longest expected remaining path first,
+            # and duplicate speculative tasks that run much longer than usual
+            priorities: Optional[Dict[str, float]] = None
+            thresholds: Dict[str, float] = {}
+            if self.history is not None:
+                try:
+                    # A resumed run keeps the key it was started with
+                    history_key = self.history.start_run(name, run_dir, history_key)
+                    priorities = critical_path_priorities(tasks, self.history.estimates(history_key))
+                    speculative = {tid: t["speculate"] for tid, t in tasks.items() if t["speculate"] is not None}
+                    if speculative:
+                        thresholds = straggler_thresholds(
+                            self.history.durations(history_key, SPECULATION_RUNS), speculative
+                        )
+                except sqlite3.Error as exc:
+                    logger.warning(
+                        f"Run history unavailable: {exc}", extra={"event": "history_failed", "error": str(exc)}
+                    )
+
+            outcome = "aborted"
             try:
-                result = await asyncio.to_thread(plugin.run, config, context)
-                logger.info(f"Task {task_id} completed")
-            except Exception as exc:  # noqa: BLE001
-                logger.exception(f"Task {task_id} failed: {exc}")
-                result = {"error": str(exc)}
-            # Save result
-            context[task_id] = result
-            results[task_id] = result
-            return result
-
-        # Schedule all tasks at once; run_single_task awaits dependencies
-        for tid in tasks:
-            task_futures[tid] = asyncio.create_task(run_single_task(tid))
-
-        # Wait for all tasks to finish
-        await asyncio.gather(*task_futures.values())
-
-        # Persist results
-        summary_path = run_dir / "summary.json"
-        with open(summary_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2, default=str)
-        logger.info(f"Workflow finished. Results written to {summary_path}")
+                try:
+                    await _dispatch(
+                        tasks,
+                        run_task,
+                        limits,
+                        on_ready=lambda tid: tracer.ready(tid, tasks[tid]),
+                        expand=expand,
+                        opened=opened,
+                        priorities=priorities,
+                    )
+                except _FailFast as exc:
+                    cancel_rest(exc.task_id)
+                outcome = "ok"
+            finally:
+                # Wake producers and readers still blocked if the run aborted
+                for stream in streams.values():
+                    stream.cancel()
+                store.close()
+                executor.close()
+                checkpoints.close()
+                tracer.write(run_dir)
+                if self.history is not None:
+                    trace = tracer.to_dict()
+                    if outcome == "ok" and any(span.get("status") == "error" for span in trace["spans"]):
+                        outcome = "failed"
+                    try:
+                        self.history.finish_run(run_dir, trace, outcome)
+                    except sqlite3.Error as exc:
+                        logger.warning(
+                            f"Run history not updated: {exc}", extra={"event": "history_failed", "error": str(exc)}
+                        )
+
+            # Results were written as tasks finished
+            summary_path = summary.close()
+            logger.info(
+                f"Workflow finished. Results written to {summary_path}",
+                extra={"event": "run_finish", "workflow": name, "summary": str(summary_path)},
+            )
+            return run_dir, results
+        finally:
+            summary.abort()
+            run_log.close()
+
+
+def load_workflow(workflow_path: str, plan_cache: Optional[PlanCache] = None) -> Dict[str, Any]:
+    """Load, validate and topologically order a workflow definition.
+
+    Parameters
+    ----------
+    workflow_path:
+        Path to a YAML file describing the workflow, or to a plan compiled
+        from one by ``oprun compile`` (ending in ``.plan``).
+    plan_cache:
+        If given, a plan previously compiled from identical file contents
+        is returned without parsing the YAML again, and new plans are
+        added to the cache.
+
+    Returns
+    -------
+    Dict[str, Any]
+        A dictionary with the workflow ``name`` and ``description``, its
+        concurrency settings (``max_parallel``, ``plugin_limits`` and
+        ``resources`` capacities) and a ``tasks`` mapping of task IDs to
+        their normalised definitions.  The mapping is ordered so that every
+        task comes after its dependencies.
+
+    Raises
+    ------
+    ValueError
+        If a task is malformed, references an unknown plugin or
+        dependency, or the dependencies form a cycle.
+    """
+    if str(workflow_path).endswith(PLAN_SUFFIX):
+        workflow = read_plan(workflow_path)
+        unknown = _unknown_plugins(workflow)
+        if unknown:
+            raise ValueError(f"Unknown plugins in compiled plan: {', '.join(unknown)}")
+        return workflow
+    with open(workflow_path, "rb") as f:
+        source = f.read()
+    if plan_cache is not None:
+        key = plan_key(source)
+        workflow = plan_cache.get(key)
+        # Plugins may have been uninstalled since the plan was compiled;
+        # recompiling then reports them like any other unknown plugin
+        if workflow is not None and not _unknown_plugins(workflow):
+            return workflow
+    workflow = compile_workflow(parse_yaml(source) or {})
+    if plan_cache is not None:
+        try:
+            plan_cache.put(key, workflow)
+        except OSError:
+            pass
+    return workflow
+
+
+def compile_workflow(definition: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate and order a parsed workflow definition.
+
+    Returns the same structure as :func:`load_workflow`.
+    """
+    if not isinstance(definition, dict):
+        raise ValueError("A workflow must be a mapping with a 'tasks' list")
+    tasks_def = definition.get("tasks") or []
+    cache_default = bool(definition.get("cache", False))
+    executor_default = definition.get("executor", DEFAULT_EXECUTOR)
+    if executor_default not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor_default}' for workflow")
+    max_parallel = definition.get("max_parallel")
+    if max_parallel is not None and (not isinstance(max_parallel, int) or max_parallel < 1):
+        raise ValueError("'max_parallel' must be a positive integer")
+    plugin_limits = definition.get("plugin_limits") or {}
+    if not isinstance(plugin_limits, dict):
+        raise ValueError("'plugin_limits' must be a mapping of plugin names to integers")
+    for plugin_name, limit in plugin_limits.items():
+        if not isinstance(limit, int) or limit < 1:
+            raise ValueError(f"Limit for plugin '{plugin_name}' must be a positive integer")
+    capacities = _parse_resources(definition.get("resources"), "workflow")
+    timeout_default = _parse_timeout(definition.get("timeout"), "workflow")
+    retries_default = _parse_retries(definition.get("retries"), "workflow")
+    retry_delay_default = _parse_retry_delay(definition.get("retry_delay"), "workflow")
+    fail_fast_default = bool(definition.get("fail_fast", False))
+    checkpoint_default = bool(definition.get("checkpoint", True))
+
+    tasks: Dict[str, Dict[str, Any]] = {}
+    # Tasks setting their own retries rather than inheriting the default
+    retried: Set[str] = set()
+    for idx, t in enumerate(tasks_def):
+        tid = t.get("id")
+        if not tid or not isinstance(tid, str):
+            raise ValueError(f"Task at index {idx} is missing a string 'id'")
+        if tid in tasks:
+            raise ValueError(f"Duplicate task id '{tid}'")
+        plugin_name = t.get("plugin")
+        if plugin_name not in PLUGINS:
+            raise ValueError(f"Unknown plugin '{plugin_name}' for task '{tid}'")
+        config = t.get("config", {})
+        depends_on = t.get("depends_on", []) or []
+        if not isinstance(depends_on, list):
+            raise ValueError(f"'depends_on' for task '{tid}' must be a list")
+        executor = t.get("executor", executor_default)
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}' for task '{tid}'")
+        foreach = _parse_foreach(t.get("foreach"), tid)
+        if foreach is not None and "partitions" in foreach:
+            depends_on = depends_on + [foreach["partitions"]]
+        reduce = _parse_reduce(t.get("reduce"), tid, executor)
+        if reduce is not None and foreach is None:
+            raise ValueError(f"Task '{tid}' has a 'reduce' step but no 'foreach'")
+        stream = _parse_stream(t.get("stream"), tid)
+        if stream is not None:
+            if executor not in STREAM_EXECUTORS:
+                raise ValueError(f"Streaming task '{tid}' must use the thread or inline executor")
+            if foreach is not None:
+                raise ValueError(f"Map task '{tid}' cannot stream")
+            if t.get("cache", cache_default):
+                raise ValueError(f"Streaming task '{tid}' cannot be cached")
+        retries = _parse_retries(t.get("retries", retries_default), f"task '{tid}'")
+        if "retries" in t:
+            retried.add(tid)
+        speculate = _parse_speculate(t.get("speculate"), tid)
+        if stream is not None:
+            # Items already handed to readers cannot be taken back
+            if speculate is not None or (retries and tid in retried):
+                raise ValueError(f"Streaming task '{tid}' cannot be retried or speculated on")
+            retries = 0
+        tasks[tid] = {
+            "plugin": plugin_name,
+            "executor": executor,
+            "config": config,
+            # Repeated dependencies would skew the in-degree counts
+            "depends_on": list(dict.fromkeys(depends_on)),
+            "cache": bool(t.get("cache", cache_default)),
+            "resources": _parse_resources(t.get("resources"), f"task '{tid}'"),
+            "foreach": foreach,
+            "reduce": reduce,
+            "stream": stream,
+            "timeout": _parse_timeout(t.get("timeout", timeout_default), f"task '{tid}'"),
+            "retries": retries,
+            "retry_delay": _parse_retry_delay(t.get("retry_delay", retry_delay_default), f"task '{tid}'"),
+            "fail_fast": bool(t.get("fail_fast", fail_fast_default)),
+            "speculate": speculate,
+            "checkpoint": bool(t.get("checkpoint", checkpoint_default)),
+        }
+
+    for tid, task in tasks.items():
+        for dep in task["depends_on"]:
+            if tasks.get(dep, {}).get("stream") is None:
+                continue
+            # Readers are live objects of this process that block until items
+            # arrive, which must not happen on the event loop
+            if task["executor"] != "thread" or task["foreach"] is not None or task["cache"]:
+                raise ValueError(
+                    f"Task '{tid}' reads the stream of '{dep}', so it must be an uncached, "
+                    "unmapped task using the thread executor"
+                )
+            # and can only be read once
+            if task["speculate"] is not None or (task["retries"] and tid in retried):
+                raise ValueError(f"Task '{tid}' reads the stream of '{dep}', so it cannot be retried or speculated on")
+            task["retries"] = 0
+
+    order = topological_order(tasks)
+    return {
+        "name": definition.get("name", "unnamed-workflow"),
+        "description": definition.get("description", ""),
+        "max_parallel": max_parallel,
+        "plugin_limits": plugin_limits,
+        "resources": capacities,
+        "tasks": {tid: tasks[tid] for tid in order},
+    }
+
+
+def _unknown_plugins(workflow: Dict[str, Any]) -> List[str]:
+    names = set()
+    for task in workflow["tasks"].values():
+        names.add(task["plugin"])
+        if task.get("reduce"):
+            names.add(task["reduce"]["plugin"])
+    return sorted(name for name in names if name not in PLUGINS)
+
+
+def _parse_foreach(value: Any, tid: str) -> Optional[Dict[str, Any]]:
+    if value is None:
+        return None
+    if isinstance(value, list):
+        value = {"items": value}
+    if not isinstance(value, dict) or len(set(value) & {"items", "glob", "partitions"}) != 1 or len(value) != 1:
+        raise ValueError(f"'foreach' for task '{tid}' needs exactly one of 'items', 'glob' or 'partitions'")
+    if "items" in value and not isinstance(value["items"], list):
+        raise ValueError(f"'foreach.items' for task '{tid}' must be a list")
+    if "glob" in value and not isinstance(value["glob"], str):
+        raise ValueError(f"'foreach.glob' for task '{tid}' must be a string")
+    if "partitions" in value and not isinstance(value["partitions"], str):
+        raise ValueError(f"'foreach.partitions' for task '{tid}' must be a task id")
+    return dict(value)
+
+
+def _parse_stream(value: Any, tid: str) -> Optional[int]:
+    if value is None or value is False:
+        return None
+    if value is True:
+        return DEFAULT_BUFFER
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"'stream' for task '{tid}' must be true or a positive buffer size")
+    return value
+
+
+def _parse_timeout(value: Any, where: str) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"'timeout' for {where} must be a positive number of seconds")
+    return float(value)
+
+
+def _parse_retries(value: Any, where: str) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"'retries' for {where} must be a non-negative integer")
+    return value
+
+
+def _parse_retry_delay(value: Any, where: str) -> float:
+    if value is None:
+        return DEFAULT_RETRY_DELAY
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f"'retry_delay' for {where} must be a non-negative number of seconds")
+    return float(value)
+
+
+def _parse_speculate(value: Any, tid: str) -> Optional[float]:
+    if value is None or value is False:
+        return None
+    if value is True:
+        return DEFAULT_SPECULATE_PERCENTILE
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value < 100:
+        raise ValueError(f"'speculate' for task '{tid}' must be true or a percentile between 0 and 100")
+    return float(value)
+
+
+def _retry_delay(delay: float, attempt: int) -> float:
+    """Seconds to wait before retrying after failed attempt number ``attempt``."""
+    return min(delay * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+
+
+def _parse_reduce(value: Any, tid: str, executor: str) -> Optional[Dict[str, Any]]:
+    if value is None:
+        return None
+    if not isinstance(value, dict):
+        raise ValueError(f"'reduce' for task '{tid}' must be a mapping")
+    plugin_name = value.get("plugin")
+    if plugin_name not in PLUGINS:
+        raise ValueError(f"Unknown plugin '{plugin_name}' for the reduce step of task '{tid}'")
+    reduce_executor = value.get("executor", executor)
+    if reduce_executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{reduce_executor}' for the reduce step of task '{tid}'")
+    return {"plugin": plugin_name, "executor": reduce_executor, "config": value.get("config", {})}
+
+
+def _foreach_items(
+    foreach: Dict[str, Any], store: ArtifactStore, results: Dict[str, Any]
+) -> Tuple[List[Any], Optional[Any]]:
+    """Return the items a map task expands over and their partitioned source.
+
+    For ``partitions`` the items are partition indices into the value the
+    upstream task published (such as chunked ``csv_ingest`` output), or the
+    elements of the upstream result if that is a list.
+    """
+    if "items" in foreach:
+        return list(foreach["items"]), None
+    if "glob" in foreach:
+        return sorted(glob.glob(foreach["glob"], recursive=True)), None
+    upstream = foreach["partitions"]
+    names = store.names(upstream)
+    if "dataframe" in names:
+        source = store.get(upstream, "dataframe")
+    elif len(names) == 1:
+        source = store.get(upstream, names[0])
+    else:
+        source = results.get(upstream)
+    if isinstance(source, (list, tuple)):
+        return list(source), None
+    if not hasattr(source, "partition"):
+        raise ValueError(f"Task '{upstream}' did not produce partitions to expand over")
+    return list(range(len(source))), source
+
+
+def _substitute(value: Any, variables: Dict[str, Any]) -> Any:
+    """Replace ``{name}`` placeholders in the strings nested in ``value``.
+
+    A string consisting of a single placeholder is replaced by the variable
+    itself, keeping its type; placeholders inside longer strings are
+    formatted with :func:`str`.
+    """
+    if isinstance(value, str):
+        for name, replacement in variables.items():
+            placeholder = "{" + name + "}"
+            if value == placeholder:
+                return replacement
+            value = value.replace(placeholder, str(replacement))
+        return value
+    if isinstance(value, list):
+        return [_substitute(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, variables) for key, item in value.items()}
+    return value
+
+
+def _parse_resources(value: Any, owner: str) -> Dict[str, float]:
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError(f"'resources' for {owner} must be a mapping of names to amounts")
+    resources: Dict[str, float] = {}
+    for name, amount in value.items():
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount < 0:
+            raise ValueError(f"Resource '{name}' for {owner} must be a non-negative number")
+        resources[str(name)] = float(amount)
+    return resources
+
+
+def topological_order(tasks: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Return task IDs ordered so that dependencies come first.
+
+    Uses Kahn's algorithm, which runs in O(V + E).  Tasks that are not
+    constrained relative to each other keep their declaration order.
+
+    Raises
+    ------
+    ValueError
+        If a task depends on an unknown task ID or the dependency graph
+        contains a cycle.
+    """
+    in_degree: Dict[str, int] = {}
+    dependents: Dict[str, List[str]] = {tid: [] for tid in tasks}
+    for tid, task in tasks.items():
+        for dep in task["depends_on"]:
+            if dep not in tasks:
+                raise ValueError(f"Task '{tid}' depends on unknown task '{dep}'")
+            dependents[dep].append(tid)
+        in_degree[tid] = len(task["depends_on"])
+
+    ready = deque(tid for tid, degree in in_degree.items() if degree == 0)
+    order: List[str] = []
+    while ready:
+        tid = ready.popleft()
+        order.append(tid)
+        for child in dependents[tid]:
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                ready.append(child)
+
+    if len(order) < len(tasks):
+        raise ValueError(f"Dependency cycle detected: {' -> '.join(_find_cycle(tasks, in_degree))}")
+    return order
+
+
+def _find_cycle(tasks: Dict[str, Dict[str, Any]], in_degree: Dict[str, int]) -> List[str]:
+    # Every task left with a positive in-degree has at least one dependency
+    # that is also left, so following those edges must revisit a task.
+    blocked = {tid for tid, degree in in_degree.items() if degree > 0}
+    path: List[str] = []
+    seen: Dict[str, int] = {}
+    tid = next(tid for tid in tasks if tid in blocked)
+    while tid not in seen:
+        seen[tid] = len(path)
+        path.append(tid)
+        tid = next(dep for dep in tasks[tid]["depends_on"] if dep in blocked)
+    # Report the cycle in execution order (dependency before dependant)
+    return list(reversed(path[seen[tid]:] + [tid]))
+
+
+class _FairShare:
+    """Task slots shared by concurrent runs, handed out round‑robin.
+
+    A task waits in the queue of its run.  Whenever a slot is free it goes
+    to the oldest waiting task of the next run in rotation, so every run
+    with ready tasks gets its turn however many tasks other runs have
+    queued.
+    """
+
+    def __init__(self, slots: int) -> None:
+        self.free = slots
+        self._waiting: "OrderedDict[str, deque[asyncio.Future[None]]]" = OrderedDict()
+
+    async def acquire(self, run_id: str) -> None:
+        """Wait for a slot for a task of ``run_id``."""
+        if self.free > 0 and not self._waiting:
+            self.free -= 1
+            return
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(run_id, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the cancellation
+                self.release()
+            else:
+                waiting = self._waiting.get(run_id)
+                if waiting is not None and future in waiting:
+                    waiting.remove(future)
+                    if not waiting:
+                        del self._waiting[run_id]
+            raise
+
+    def release(self) -> None:
+        """Return a slot, granting it to the next run in rotation."""
+        self.free += 1
+        while self.free > 0 and self._waiting:
+            run_id, waiting = next(iter(self._waiting.items()))
+            future = waiting.popleft()
+            if waiting:
+                self._waiting.move_to_end(run_id)
+            else:
+                del self._waiting[run_id]
+            if not future.done():
+                self.free -= 1
+                future.set_result(None)
+
+
+def _once(func: Callable[[], None]) -> Callable[..., None]:
+    # Wrap ``func`` so that only its first call, with any arguments, runs
+    called = False
+
+    def call(*_: Any) -> None:
+        nonlocal called
+        if not called:
+            called = True
+            func()
+
+    return call
+
+
+def _failed(result: Any) -> bool:
+    return isinstance(result, dict) and "error" in result
+
+
+class _FailFast(Exception):
+    """Raised by a task with ``fail_fast`` whose result is an error."""
+
+    def __init__(self, task_id: str) -> None:
+        super().__init__(f"Task {task_id} failed")
+        self.task_id = task_id
+
+
+async def _cancel(futures: Iterable["asyncio.Future[Any]"]) -> None:
+    # Cancel the futures still running and wait until they have stopped
+    pending = [future for future in futures if not future.done()]
+    for future in pending:
+        future.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _with_timeout(call: Awaitable[Any], timeout: Optional[float], what: str) -> Any:
+    """Await ``call``, cancelling it after ``timeout`` seconds.
+
+    Raises :class:`TimeoutError` saying that ``what`` timed out if the time
+    runs out.
+    Unlike :func:`asyncio.wait_for` this leaves a :class:`TimeoutError`
+    raised by ``call`` itself, such as the ``shell`` plugin's, untouched.
+    """
+    if timeout is None:
+        return await call
+    future = asyncio.ensure_future(call)
+    try:
+        done, _ = await asyncio.wait({future}, timeout=timeout)
+    finally:
+        await _cancel([future])
+    if not done:
+        raise TimeoutError(f"{what} timed out after {timeout:g}s")
+    return future.result()
+
+
+async def _speculate(
+    start: Callable[[], Awaitable[Any]], threshold: float, on_speculate: Callable[[], None]
+) -> Any:
+    """Await ``start()``, and a second copy if the first runs past ``threshold``.
+
+    The result of the first copy to succeed is returned and the other copy
+    is cancelled.  If both fail, the first copy's exception is raised.
+    ``on_speculate`` is called when the second copy starts.
+    """
+    copies = [asyncio.ensure_future(start())]
+    try:
+        done, _ = await asyncio.wait(copies, timeout=threshold)
+        if not done:
+            on_speculate()
+            copies.append(asyncio.ensure_future(start()))
+        pending = set(copies)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in copies:
+                if future in done and future.exception() is None:
+                    return future.result()
+        raise copies[0].exception()  # type: ignore[misc]
+    finally:
+        await _cancel(copies)
+
+
+class _Limits:
+    """Admission control applied by :func:`_dispatch`.
+
+    Tracks the number of running tasks overall and per plugin, and the
+    amount of each resource currently held.  Resources without a declared
+    capacity are not limited.
+    """
+
+    def __init__(
+        self,
+        max_parallel: Optional[int] = None,
+        plugin_limits: Optional[Dict[str, int]] = None,
+        capacities: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.max_parallel = max_parallel
+        self.plugin_limits = dict(plugin_limits or {})
+        self.capacities = dict(capacities or {})
+        self.running = 0
+        self.running_by_plugin: Dict[str, int] = {}
+        self.in_use: Dict[str, float] = {name: 0.0 for name in self.capacities}
+        # Called with a task whose abandoned attempt returned its capacity;
+        # set by _dispatch to wake the tasks waiting for it
+        self.on_release: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def _plugin_limit(self, plugin_name: str) -> Optional[int]:
+        if plugin_name in self.plugin_limits:
+            return self.plugin_limits[plugin_name]
+        return getattr(PLUGINS[plugin_name], "max_concurrency", None)
+
+    def validate(self, tasks: Dict[str, Dict[str, Any]]) -> None:
+        """Reject tasks that could never be admitted."""
+        for tid, task in tasks.items():
+            for name, amount in task["resources"].items():
+                capacity = self.capacities.get(name)
+                if capacity is not None and amount > capacity:
+                    raise ValueError(
+                        f"Task '{tid}' requests {amount:g} {name} but only {capacity:g} is available"
+                    )
+
+    @property
+    def saturated(self) -> bool:
+        """True when no further task may start regardless of its needs."""
+        return self.max_parallel is not None and self.running >= self.max_parallel
+
+    def blocker(self, task: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """The first limit keeping ``task`` from starting now, or None.
+
+        Limits are named ``("parallel", "")``, ``("plugin", name)`` or
+        ``("resource", name)``.
+        """
+        if self.saturated:
+            return ("parallel", "")
+        plugin_name = task["plugin"]
+        limit = self._plugin_limit(plugin_name)
+        if limit is not None and self.running_by_plugin.get(plugin_name, 0) >= limit:
+            return ("plugin", plugin_name)
+        for name, amount in task["resources"].items():
+            if name in self.capacities and self.in_use[name] + amount > self.capacities[name] + 1e-9:
+                return ("resource", name)
+        return None
+
+    def acquire(self, task: Dict[str, Any]) -> bool:
+        """Reserve capacity for ``task`` if it fits, returning whether it did."""
+        return self.reserve(task) is None
+
+    def reserve(self, task: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Reserve capacity for ``task`` if it fits.
+
+        Returns None if it did, and otherwise the limit in the way, as
+        :meth:`blocker` names it.
+        """
+        blocked = self.blocker(task)
+        if blocked is not None:
+            return blocked
+        self._take(task)
+        return None
+
+    def _take(self, task: Dict[str, Any]) -> None:
+        plugin_name = task["plugin"]
+        self.running += 1
+        self.running_by_plugin[plugin_name] = self.running_by_plugin.get(plugin_name, 0) + 1
+        for name, amount in task["resources"].items():
+            if name in self.capacities:
+                self.in_use[name] += amount
+
+    def linger(self, task: Dict[str, Any], exited: "asyncio.Future[Any]") -> None:
+        """Count an abandoned attempt of ``task`` until ``exited`` resolves.
+
+        A timed‑out thread cannot be stopped, so it keeps holding the
+        task's share of the limits, even beyond them, until it returns.
+        """
+        self._take(task)
+
+        def release(_: Any) -> None:
+            self.release(task)
+            if self.on_release is not None:
+                self.on_release(task)
+
+        exited.add_done_callback(release)
+
+    def release(self, task: Dict[str, Any]) -> None:
+        """Return the capacity reserved for ``task``."""
+        self.running -= 1
+        self.running_by_plugin[task["plugin"]] -= 1
+        for name, amount in task["resources"].items():
+            if name in self.capacities:
+                self.in_use[name] -= amount
+
+
+async def _dispatch(
+    tasks: Dict[str, Dict[str, Any]],
+    run_task: Callable[[str], Awaitable[Any]],
+    limits: Optional[_Limits] = None,
+    on_ready: Optional[Callable[[str], None]] = None,
+    expand: Optional[Callable[[str], Dict[str, Dict[str, Any]]]] = None,
+    opened: Optional[Dict[str, "asyncio.Future[None]"]] = None,
+    priorities: Optional[Dict[str, float]] = None,
+) -> None:
+    """Run ``run_task`` for every task as soon as its dependencies finish.
+
+    Tasks whose remaining in‑degree drops to zero are pushed onto a ready
+    queue; completions are reported back through an :class:`asyncio.Queue`.
+    Each task and each dependency edge is visited once, so dispatch costs
+    O((V + E) log V) regardless of the graph's shape.  Ready tasks are
+    started highest ``priorities`` first, and in the order they became
+    ready among equals, as long as ``limits`` admits them; a task that
+    does not fit yet waits in a queue for the plugin limit or resource in
+    its way while later tasks that do fit are started.  A finished task
+    only wakes the queues of the limits it held, so blocked tasks do not
+    add to the cost of dispatch.  ``on_ready`` is called with each task ID as it enters the
+    ready queue.
+
+    When the dependencies of a task with ``foreach`` have finished, it is
+    passed to ``expand`` instead, which returns the task's shards.  The
+    shards are added to ``tasks`` and queued at once; the task itself only
+    becomes ready, to combine their results, once every shard has finished.
+
+    A task with a future in ``opened`` releases its dependents as soon as
+    the future is resolved rather than when it finishes.  Streaming tasks
+    use this to run alongside the tasks reading their stream; they also
+    hand back their concurrency slot at that point, so that a full stream
+    cannot wait on a reader that the limits keep from starting.
+    """
+    limits = limits or _Limits()
+    priorities = dict(priorities or {})
+    remaining: Dict[str, int] = {tid: len(t["depends_on"]) for tid, t in tasks.items()}
+    dependents: Dict[str, List[str]] = {tid: [] for tid in tasks}
+    for tid, task in tasks.items():
+        for dep in task["depends_on"]:
+            dependents[dep].append(tid)
+    # Heap of (-priority, arrival, task)
+    ready: List[Tuple[float, int, str]] = []
+    arrivals = itertools.count()
+    expanded: Set[str] = set()
+
+    def make_ready(task_id: str) -> None:
+        if expand is not None and tasks[task_id].get("foreach") and task_id not in expanded:
+            expanded.add(task_id)
+            shards = expand(task_id)
+            if shards:
+                tasks.update(shards)
+                remaining[task_id] = len(shards)
+                for shard_id in shards:
+                    remaining[shard_id] = 0
+                    dependents[shard_id] = [task_id]
+                    priorities.setdefault(shard_id, priorities.get(task_id, 0.0))
+                    make_ready(shard_id)
+                return
+        heapq.heappush(ready, (-priorities.get(task_id, 0.0), next(arrivals), task_id))
+        if on_ready is not None:
+            on_ready(task_id)
+
+    for tid in [tid for tid, degree in remaining.items() if degree == 0]:
+        make_ready(tid)
+    # Messages are (task, error, opened): opened marks a stream opening,
+    # and an empty task ID that an abandoned attempt returned its capacity
+    done: "asyncio.Queue[Tuple[str, Optional[BaseException], bool]]" = asyncio.Queue()
+    running: Set[asyncio.Task] = set()
+    # Streaming tasks whose dependents were released and which are still
+    # running, and streaming tasks that have finished
+    released: Set[str] = set()
+    ended: Set[str] = set()
+
+    def release_dependents(task_id: str) -> None:
+        for child in dependents[task_id]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                make_ready(child)
+
+    async def run_and_report(task_id: str) -> None:
+        future = opened.get(task_id) if opened else None
+        if future is not None:
+            future.add_done_callback(lambda _: done.put_nowait((task_id, None, True)))
+        try:
+            await run_task(task_id)
+        except Exception as exc:  # noqa: BLE001
+            done.put_nowait((task_id, exc, False))
+        else:
+            done.put_nowait((task_id, None, False))
+
+    # Ready tasks kept out by a plugin limit or resource wait in a heap per
+    # limit, and only return to ``ready`` when that limit frees up, so that
+    # a blocked task is not looked at again on every completion
+    waiting: Dict[Tuple[str, str], List[Tuple[float, int, str]]] = {}
+    # Tasks moved back to ``ready`` and the limit they waited for
+    woken: Dict[str, Tuple[str, str]] = {}
+
+    def wake(limit: Tuple[str, str]) -> None:
+        queue = waiting.get(limit)
+        if queue:
+            entry = heapq.heappop(queue)
+            woken[entry[2]] = limit
+            heapq.heappush(ready, entry)
+
+    def wake_held(task: Dict[str, Any]) -> None:
+        wake(("plugin", task["plugin"]))
+        for name in task["resources"]:
+            wake(("resource", name))
+
+    def free(task_id: str) -> None:
+        limits.release(tasks[task_id])
+        wake_held(tasks[task_id])
+
+    def lingered(task: Dict[str, Any]) -> None:
+        # The thread of an abandoned attempt returned (see _Limits.linger)
+        wake_held(task)
+        done.put_nowait(("", None, False))
+
+    limits.on_release = lingered
+
+    def start_ready() -> None:
+        while ready and not limits.saturated:
+            entry = heapq.heappop(ready)
+            waited_for = woken.pop(entry[2], None)
+            blocked = limits.reserve(tasks[entry[2]])
+            if blocked is None:
+                task = asyncio.create_task(run_and_report(entry[2]))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            else:
+                heapq.heappush(waiting.setdefault(blocked, []), entry)
+            # A freed resource may fit more than one waiting task: keep
+            # waking them until one is blocked by that resource again
+            if waited_for is not None and blocked != waited_for:
+                wake(waited_for)
+
+    finished = 0
+    try:
+        while finished < len(tasks):
+            start_ready()
+            if limits.running == 0 and len(released) == 0:
+                stuck = sorted(ready + [entry for queue in waiting.values() for entry in queue])
+                raise RuntimeError(f"No ready task can be admitted: {', '.join(tid for _, _, tid in stuck)}")
+            task_id, error, opening = await done.get()
+            if not task_id:
+                # Capacity held by an abandoned attempt came back
+                continue
+            if opening:
+                # Ignored if the task already finished before the message
+                if task_id not in ended:
+                    released.add(task_id)
+                    free(task_id)
+                    release_dependents(task_id)
+                continue
+            if opened and task_id in opened:
+                ended.add(task_id)
+            if task_id in released:
+                released.discard(task_id)
+            else:
+                free(task_id)
+                if error is None:
+                    release_dependents(task_id)
+            if error is not None:
+                raise error
+            finished += 1
+    finally:
+        limits.on_release = None
+        for task in list(running):
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
@@ -0,0 +1,128 @@
+"""Compiled workflow plans.
+
+Loading a workflow means parsing its YAML, validating every task and
+sorting the dependency graph.  For generated workflows with tens of
+thousands of tasks that takes seconds, most of it in the YAML parser.  A
+*plan* is the result of that work: the validated, topologically ordered
+workflow returned by :func:`~operator_agent_orchestrator.orchestrator.load_workflow`,
+pickled so that it loads in milliseconds.
+
+Plans are written explicitly with ``oprun compile`` (a ``.plan`` file can
+be passed to ``oprun run`` in place of the YAML file) and implicitly by the
+:class:`PlanCache`, which keys plans on the SHA‑256 of the workflow file's
+contents and the package version.  Editing the file or upgrading the
+package therefore never reuses a stale plan.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import yaml
+
+#: Bumped whenever the layout of a compiled workflow changes.
+PLAN_FORMAT = 4
+
+#: File suffix of compiled plans.
+PLAN_SUFFIX = ".plan"
+
+#: Fastest available safe YAML loader; the libyaml binding is several
+#: times faster than the pure‑Python parser.
+YAML_LOADER: Any = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_yaml(source: Union[bytes, str]) -> Any:
+    """Parse a YAML document with :data:`YAML_LOADER`."""
+    return yaml.load(source, Loader=YAML_LOADER)
+
+
+@functools.lru_cache(maxsize=None)
+def _package_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("operator_agent_orchestrator")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def plan_key(source: bytes) -> str:
+    """Return the plan cache key of a workflow file's contents."""
+    h = hashlib.sha256(f"{PLAN_FORMAT}:{_package_version()}:".encode("utf-8"))
+    h.update(source)
+    return h.hexdigest()
+
+
+def write_plan(workflow: Dict[str, Any], path: Union[str, Path], key: Optional[str] = None) -> Path:
+    """Atomically write a compiled ``workflow`` to ``path``."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(
+                {"format": PLAN_FORMAT, "key": key, "workflow": workflow},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def read_plan(path: Union[str, Path]) -> Dict[str, Any]:
+    """Return the compiled workflow stored at ``path``.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a plan or was written in another format.
+    """
+    with open(path, "rb") as f:
+        try:
+            plan = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as exc:
+            raise ValueError(f"{path} is not a compiled workflow plan") from exc
+    if not isinstance(plan, dict) or plan.get("format") != PLAN_FORMAT:
+        raise ValueError(f"{path} is not a compiled workflow plan of format {PLAN_FORMAT}; recompile it")
+    return plan["workflow"]
+
+
+class PlanCache:
+    """Directory of compiled plans keyed on workflow file contents.
+
+    Parameters
+    ----------
+    root:
+        Directory holding the plans.  Created on demand.
+    """
+
+    def __init__(self, root: Union[str, Path]) -> None:
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}{PLAN_SUFFIX}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the plan stored under ``key`` or None on a miss."""
+        path = self._path(key)
+        try:
+            return read_plan(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # A corrupt or outdated plan is treated as a miss
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, workflow: Dict[str, Any]) -> Path:
+        """Store the compiled ``workflow`` under ``key``."""
+        return write_plan(workflow, self._path(key), key=key)
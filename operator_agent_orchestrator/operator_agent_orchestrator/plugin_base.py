@@ -1,14 +1,21 @@
 """Base classes and utilities for orchestrator plugins.
 
 Plugins are simple classes that implement a single `run` method.  The
-orchestrator instantiates the plugin and calls `run(config, context)`
-whenever the corresponding task is executed.  The plugin should perform
-whatever work is necessary and return a JSON‑serialisable object that
-captures the result.  It may also read and modify the shared `context`
-dictionary to pass intermediate outputs to downstream tasks.
+orchestrator instantiates each plugin once and calls `run(config, context)`
+whenever a task using it is executed, so plugins must not keep per‑task
+state on the instance.  The plugin should perform whatever work is
+necessary and return a JSON‑serialisable object that captures the result.
+It may also read and modify the shared `context` dictionary to pass
+intermediate outputs to downstream tasks.
+
+Plugins whose work is I/O bound may additionally implement a coroutine
+``arun(config, context)``.  The orchestrator awaits it directly on the
+event loop instead of occupying a worker thread for the lifetime of the
+task.  ``run`` remains the entry point for the ``process`` executor and for
+callers outside the orchestrator.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 
 class Plugin:
@@ -17,6 +24,15 @@ class Plugin:
     #: Unique name used to refer to this plugin in workflow YAML files.
     name: str = "plugin"
 
+    #: Default cap on how many tasks using this plugin may run at once.
+    #: None means unlimited; workflows can override it via ``plugin_limits``.
+    max_concurrency: Optional[int] = None
+
+    #: Whether :meth:`run` always produces the same result for the same
+    #: configuration, inputs and upstream results.  Used when keying the
+    #: cache entries of downstream tasks.
+    deterministic: bool = False
+
     def run(self, config: Dict[str, Any], context: Dict[str, Any]) -> Any:
         """Execute the plugin.
 
@@ -39,3 +55,30 @@ class Plugin:
             task's ID in the run summary.
         """
         raise NotImplementedError
+
+    async def arun(self, config: Dict[str, Any], context: Dict[str, Any]) -> Any:
+        """Execute the plugin on the event loop.
+
+        Optional.  Takes the same arguments and returns the same value as
+        :meth:`run`, but must not block: use asynchronous I/O throughout.
+        Plugins that do not override this method are run synchronously.
+        """
+        raise NotImplementedError
+
+    def input_fingerprint(self, config: Dict[str, Any]) -> Any:
+        """Describe external inputs that affect the result of :meth:`run`.
+
+        The orchestrator folds the returned value into the cache key of
+        tasks that opt into result caching.  Plugins reading files or other
+        external state should return something that changes whenever that
+        state changes (such as a file's modification time and size).  The
+        default implementation returns None, meaning the result depends
+        only on the configuration and upstream tasks.
+        """
+        return None
+
+
+def supports_async(plugin: Any) -> bool:
+    """Return True if ``plugin`` provides its own :meth:`Plugin.arun`."""
+    arun = getattr(type(plugin), "arun", None)
+    return arun is not None and arun is not Plugin.arun
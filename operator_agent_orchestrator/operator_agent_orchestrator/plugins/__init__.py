@@ -1,21 +1,170 @@
-"""Built‑in plugin registry.
+"""Plugin registry.
 
-This module imports all bundled plugins and exposes them in the ``PLUGINS``
-dictionary keyed by their unique names.  To add a new plugin, create a
-module in this package and register it here.
+``PLUGINS`` maps plugin names to plugin classes.  It knows the names of
+all built‑in plugins and of third‑party plugins advertised through the
+``operator_agent_orchestrator.plugins`` entry point group, but imports a
+plugin's module only when its class is first looked up.  Listing plugins
+or validating a workflow therefore does not import pandas or any other
+heavy dependency of plugins the workflow does not use.
+
+A distribution provides plugins by declaring entry points such as:
+
+```toml
+[project.entry-points."operator_agent_orchestrator.plugins"]
+reverse = "mypackage.plugins:ReversePlugin"
+```
+
+Plugins can also be registered at run time with ``PLUGINS[name] = cls``.
+Built‑in plugins take precedence over entry points with the same name.
 """
 
-from .shell import ShellPlugin
-from .python_function import PythonFunctionPlugin
-from .csv_ingest import CSVIngestPlugin
-from .metrics import MetricsPlugin
+from __future__ import annotations
+
+import importlib
+from importlib import metadata
+from typing import Any, Dict, Iterator, MutableMapping
 
+#: Entry point group scanned for third‑party plugins.
+ENTRY_POINT_GROUP = "operator_agent_orchestrator.plugins"
 
-PLUGINS = {
-    ShellPlugin.name: ShellPlugin,
-    PythonFunctionPlugin.name: PythonFunctionPlugin,
-    CSVIngestPlugin.name: CSVIngestPlugin,
-    MetricsPlugin.name: MetricsPlugin,
+_BUILTINS = {
+    "shell": f"{__name__}.shell:ShellPlugin",
+    "python_function": f"{__name__}.python_function:PythonFunctionPlugin",
+    "csv_ingest": f"{__name__}.csv_ingest:CSVIngestPlugin",
+    "metrics": f"{__name__}.metrics:MetricsPlugin",
+    "noop": f"{__name__}.noop:NoopPlugin",
 }
 
-__all__ = ["PLUGINS", "ShellPlugin", "PythonFunctionPlugin", "CSVIngestPlugin", "MetricsPlugin"]
\ No newline at end of file
+
+class PluginSpec:
+    """Where a plugin class can be imported from, without importing it.
+
+    ``target`` has the entry point form ``module:attribute``; ``source`` is
+    ``built-in``, the distribution providing the entry point, or
+    ``registered`` for classes added at run time.
+    """
+
+    def __init__(self, name: str, target: str, source: str) -> None:
+        self.name = name
+        self.target = target
+        self.source = source
+
+    @property
+    def module(self) -> str:
+        return self.target.partition(":")[0]
+
+    def load(self) -> type:
+        module, _, attribute = self.target.partition(":")
+        obj: Any = importlib.import_module(module)
+        for part in attribute.split("."):
+            obj = getattr(obj, part)
+        return obj
+
+
+def _entry_points(group: str) -> Iterator[Any]:
+    found = metadata.entry_points()
+    if hasattr(found, "select"):
+        return iter(found.select(group=group))
+    # Python < 3.10 returns a dict of groups
+    return iter(found.get(group, []))
+
+
+class PluginRegistry(MutableMapping[str, type]):
+    """Mapping of plugin names to classes that imports plugins on demand.
+
+    Entry points are only scanned when a name that is not built in is
+    looked up or when the registry is iterated.
+    """
+
+    def __init__(self, builtins: Dict[str, str], group: str = ENTRY_POINT_GROUP) -> None:
+        self.group = group
+        self._specs: Dict[str, PluginSpec] = {
+            name: PluginSpec(name, target, "built-in") for name, target in builtins.items()
+        }
+        self._classes: Dict[str, type] = {}
+        self._discovered = False
+
+    def _discover(self) -> None:
+        if self._discovered:
+            return
+        self._discovered = True
+        for entry_point in _entry_points(self.group):
+            if entry_point.name in self._specs:
+                continue
+            dist = getattr(entry_point, "dist", None)
+            source = dist.metadata["Name"] if dist is not None else "entry point"
+            self._specs[entry_point.name] = PluginSpec(entry_point.name, entry_point.value, source)
+
+    def spec(self, name: str) -> PluginSpec:
+        """Return the metadata of plugin ``name`` without importing it."""
+        if name not in self._specs:
+            self._discover()
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise KeyError(name) from None
+
+    def specs(self) -> Dict[str, PluginSpec]:
+        """Return the metadata of every known plugin, keyed by name."""
+        self._discover()
+        return dict(self._specs)
+
+    def __getitem__(self, name: str) -> type:
+        cls = self._classes.get(name)
+        if cls is None:
+            cls = self._classes[name] = self.spec(name).load()
+        return cls
+
+    def __setitem__(self, name: str, cls: type) -> None:
+        self._specs[name] = PluginSpec(name, f"{cls.__module__}:{cls.__qualname__}", "registered")
+        self._classes[name] = cls
+
+    def __delitem__(self, name: str) -> None:
+        self.spec(name)
+        del self._specs[name]
+        self._classes.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        if name not in self._specs:
+            self._discover()
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        return iter(list(self._specs))
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._specs)
+
+    def builtin_modules(self) -> Dict[str, str]:
+        """Return the modules of the built‑in plugins, keyed by plugin name."""
+        return {name: spec.module for name, spec in self._specs.items() if spec.source == "built-in"}
+
+
+PLUGINS = PluginRegistry(_BUILTINS)
+
+_CLASS_NAMES = {target.rpartition(":")[2]: name for name, target in _BUILTINS.items()}
+
+
+def __getattr__(attribute: str) -> type:
+    # Built-in plugin classes stay importable from this package, but are
+    # only imported on first access
+    if attribute in _CLASS_NAMES:
+        return PLUGINS[_CLASS_NAMES[attribute]]
+    raise AttributeError(f"module {__name__!r} has no attribute {attribute!r}")
+
+
+__all__ = [
+    "ENTRY_POINT_GROUP",
+    "PLUGINS",
+    "PluginRegistry",
+    "PluginSpec",
+    "ShellPlugin",
+    "PythonFunctionPlugin",
+    "CSVIngestPlugin",
+    "MetricsPlugin",
+    "NoopPlugin",
+]
@@ -2,41 +2,189 @@
 
 This plugin calculates basic statistics on numeric columns of a DataFrame
 previously ingested by the ``csv_ingest`` plugin.  It expects to find
-``context['dataframe']`` populated and computes mean, median and standard
-deviation for the specified columns.
+``context['dataframe']`` populated and computes count, mean, median,
+standard deviation, minimum and maximum for the specified columns.
+
+Configuration schema:
+
+```
+plugin: metrics
+config:
+  numeric_columns: [age, score]   # optional: defaults to all numeric columns
+  quantiles: [0.05, 0.95]         # optional: reported as p5, p95
+  distinct: true                  # optional: add a distinct value count
+  group_by: [department]          # optional: compute metrics per group
+  input: transform                # optional: summarise this task's result instead
+```
+
+An in‑memory DataFrame is summarised exactly with one vectorised
+aggregation and one quantile computation across all requested columns;
+boolean columns are summarised as 0 and 1.
+Partitioned input (from a streaming ``csv_ingest``, or a stream of
+DataFrames from the task named by ``input``) is consumed one partition at
+a time into mergeable summaries from
+:mod:`~operator_agent_orchestrator.sketches`: counts, means, deviations
+and ranges stay exact while quantiles and distinct counts become close
+approximations.
+
+Without ``group_by`` the result maps column names to their statistics.
+With ``group_by`` it is ``{"group_by": [...], "groups": [{"key": {...},
+"metrics": {...}}, ...]}``.
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd  # type: ignore
 
 from ..plugin_base import Plugin
+from ..sketches import ColumnSummary, quantile_label
+
+
+def _scalar(value: Any) -> Any:
+    return value.item() if hasattr(value, "item") else value
 
 
 class MetricsPlugin(Plugin):
     """Compute numeric metrics on a pandas DataFrame."""
 
     name = "metrics"
+    deterministic = True
 
     def run(self, config: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-        if "dataframe" not in context:
+        source = config.get("input")
+        if source is not None:
+            if source not in context:
+                raise RuntimeError(f"No result of task '{source}' found in context")
+            data = context[source]
+        elif "dataframe" not in context:
             raise RuntimeError("No DataFrame found in context; run csv_ingest before metrics")
-        df: pd.DataFrame = context["dataframe"]
-        numeric_columns: List[str] = config.get("numeric_columns", [])
-        if not numeric_columns:
+        else:
+            data = context["dataframe"]
+        group_by = config.get("group_by") or []
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        quantiles = [float(q) for q in config.get("quantiles", [])]
+        for q in quantiles:
+            if not 0.0 <= q <= 1.0:
+                raise ValueError(f"Quantile {q} must be between 0 and 1")
+        distinct = bool(config.get("distinct", False))
+        numeric_columns: List[str] = list(config.get("numeric_columns", []))
+        if isinstance(data, pd.DataFrame):
+            groups = self._summarise_frame(data, numeric_columns, group_by, quantiles, distinct)
+        else:
+            # Partitioned input from a streaming csv_ingest
+            groups = self._summarise_partitions(data, numeric_columns, group_by, quantiles, distinct)
+        if not group_by:
+            return groups[0][1] if groups else {}
+        return {
+            "group_by": group_by,
+            "groups": [
+                {"key": dict(zip(group_by, (_scalar(v) for v in key))), "metrics": metrics}
+                for key, metrics in groups
+            ],
+        }
+
+    @staticmethod
+    def _columns(df: pd.DataFrame, requested: List[str], group_by: List[str]) -> List[str]:
+        for col in group_by:
+            if col not in df.columns:
+                raise ValueError(f"Group key '{col}' not found in DataFrame")
+        if not requested:
             # Auto‑detect numeric columns
-            numeric_columns = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
-        results: Dict[str, Dict[str, float]] = {}
-        for col in numeric_columns:
+            return [
+                col
+                for col in df.columns
+                if col not in group_by and pd.api.types.is_numeric_dtype(df[col])
+            ]
+        for col in requested:
             if col not in df.columns:
                 raise ValueError(f"Column '{col}' not found in DataFrame")
-            series = df[col].dropna()
-            results[col] = {
-                "mean": float(series.mean()),
-                "median": float(series.median()),
-                "std": float(series.std()),
-                "min": float(series.min()),
-                "max": float(series.max()),
-                "count": int(series.count()),
-            }
-        return results
\ No newline at end of file
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                raise ValueError(f"Column '{col}' is not numeric")
+        return requested
+
+    def _summarise_frame(
+        self,
+        df: pd.DataFrame,
+        requested: List[str],
+        group_by: List[str],
+        quantiles: List[float],
+        distinct: bool,
+    ) -> List[Tuple[Any, Dict[str, Dict[str, Any]]]]:
+        columns = self._columns(df, requested, group_by)
+        if not columns:
+            return []
+        bools = [col for col in columns if pd.api.types.is_bool_dtype(df[col])]
+        if bools:
+            # Booleans count as numeric but cannot be subtracted for std
+            df = df.copy(deep=False)
+            for col in bools:
+                df[col] = df[col].to_numpy(dtype="float64", na_value=float("nan"))
+        levels = [0.5] + quantiles
+        aggregations = ["count", "mean", "std", "min", "max"] + (["nunique"] if distinct else [])
+        if group_by:
+            grouped = df.groupby(group_by, sort=True, observed=True, dropna=False)[columns]
+            stats = grouped.agg(aggregations)
+            keys = [key if isinstance(key, tuple) else (key,) for key in stats.index]
+            rows = [stats.iloc[pos] for pos in range(len(keys))]
+            # Quantiles come back as one row per (group, level), in group order
+            qs = grouped.quantile(levels)
+            qrows = [qs.iloc[pos * len(levels) : (pos + 1) * len(levels)] for pos in range(len(keys))]
+        else:
+            frame = df[columns]
+            keys = [()]
+            rows = [frame.agg(aggregations).unstack()]
+            qrows = [frame.quantile(levels)]
+        groups = []
+        for key, row, qrow in zip(keys, rows, qrows):
+            metrics: Dict[str, Dict[str, Any]] = {}
+            for col in columns:
+                metrics[col] = {
+                    "mean": float(row[(col, "mean")]),
+                    "median": float(qrow[col].iloc[0]),
+                    "std": float(row[(col, "std")]),
+                    "min": float(row[(col, "min")]),
+                    "max": float(row[(col, "max")]),
+                    "count": int(row[(col, "count")]),
+                }
+                for pos, q in enumerate(quantiles, start=1):
+                    metrics[col][quantile_label(q)] = float(qrow[col].iloc[pos])
+                if distinct:
+                    metrics[col]["distinct"] = int(row[(col, "nunique")])
+            groups.append((key, metrics))
+        return groups
+
+    def _summarise_partitions(
+        self,
+        partitions: Any,
+        requested: List[str],
+        group_by: List[str],
+        quantiles: List[float],
+        distinct: bool,
+    ) -> List[Tuple[Any, Dict[str, Dict[str, Any]]]]:
+        columns: Optional[List[str]] = None
+        summaries: Dict[Any, Dict[str, ColumnSummary]] = {}
+
+        def update(key: Any, frame: pd.DataFrame) -> None:
+            per_column = summaries.get(key)
+            if per_column is None:
+                per_column = summaries[key] = {col: ColumnSummary(quantiles, distinct) for col in columns}
+            for col in columns:
+                per_column[col].update(frame[col].to_numpy(dtype="float64", na_value=float("nan")))
+
+        for chunk in partitions:
+            if columns is None:
+                columns = self._columns(chunk, requested, group_by)
+            if group_by:
+                for key, frame in chunk.groupby(group_by, sort=False, observed=True, dropna=False):
+                    update(key if isinstance(key, tuple) else (key,), frame)
+            else:
+                update((), chunk)
+        try:
+            ordered = sorted(summaries.items(), key=lambda item: item[0])
+        except TypeError:
+            ordered = sorted(summaries.items(), key=lambda item: tuple(str(v) for v in item[0]))
+        return [
+            (key, {col: summary.result() for col, summary in per_column.items()})
+            for key, per_column in ordered
+        ]
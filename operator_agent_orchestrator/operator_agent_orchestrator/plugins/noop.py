@@ -0,0 +1,30 @@
+"""No‑op plugin.
+
+This plugin does nothing and returns ``None``.  It is useful as a
+placeholder while sketching a workflow, as a join point that only groups
+dependencies, and for measuring the orchestrator's own overhead (see
+``oprun bench``).
+
+Configuration schema:
+
+```
+plugin: noop
+```
+"""
+
+from typing import Any, Dict
+
+from ..plugin_base import Plugin
+
+
+class NoopPlugin(Plugin):
+    """Do nothing."""
+
+    name = "noop"
+    deterministic = True
+
+    def run(self, config: Dict[str, Any], context: Dict[str, Any]) -> Any:
+        return None
+
+    async def arun(self, config: Dict[str, Any], context: Dict[str, Any]) -> Any:
+        return None
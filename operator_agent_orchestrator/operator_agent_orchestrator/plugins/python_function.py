@@ -3,7 +3,10 @@
 This plugin dynamically imports and executes a Python function specified by
 module path and function name.  It is useful for delegating complex logic
 into reusable functions without writing a new plugin.  The function may
-return any JSON‑serialisable value.
+return any value, or, in a task marked ``stream: true``, a generator or
+async generator whose items are streamed to dependent tasks.  Results that
+are large or not JSON‑serialisable, such as DataFrames, are stored next to
+the run summary rather than in it.
 
 Configuration schema:
 
@@ -13,7 +16,12 @@ config:
   function: "path.to.module:function_name"
   args: [arg1, arg2, ...]       # optional positional arguments
   kwargs: {key: value, ...}     # optional keyword arguments
+  inputs: {key: task_id, ...}   # optional: upstream results as keyword arguments
 ```
+
+``inputs`` passes the result of an upstream task, or the reader of its
+stream if it streams, as a keyword argument.  A generator function taking
+a stream and yielding transformed items forms one stage of a pipeline.
 """
 
 import importlib
@@ -42,5 +50,12 @@ class PythonFunctionPlugin(Plugin):
             raise AttributeError(f"Module '{module_name}' has no attribute '{func_name}'")
         func = getattr(module, func_name)
         args: List[Any] = config.get("args", [])
-        kwargs: Dict[str, Any] = config.get("kwargs", {})
+        kwargs: Dict[str, Any] = dict(config.get("kwargs", {}))
+        inputs = config.get("inputs") or {}
+        if not isinstance(inputs, dict):
+            raise ValueError("python_function 'inputs' must map argument names to task IDs")
+        for argument, task_id in inputs.items():
+            if task_id not in context:
+                raise ValueError(f"Input '{argument}' refers to '{task_id}', which has no result in the context")
+            kwargs[argument] = context[task_id]
         return func(*args, **kwargs)
\ No newline at end of file
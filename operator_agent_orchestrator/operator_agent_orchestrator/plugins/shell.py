@@ -1,34 +1,177 @@
 """Shell command plugin.
 
 This plugin executes a shell command defined in the task configuration.
-It captures standard output and standard error and returns them as part
-of the result.  Use this plugin to run arbitrary shell commands such as
-copying files, invoking other scripts or sending simple notifications.
+It returns the end of the command's standard output and standard error
+along with its exit status.  Use this plugin to run arbitrary shell
+commands such as copying files, invoking other scripts or sending simple
+notifications.
+
+Configuration schema:
+
+```
+plugin: shell
+config:
+  command: ./export.sh            # required
+  timeout: 600                    # optional: seconds before the command is killed
+  env: {EXPORT_FORMAT: parquet}   # optional: added to the environment
+  log_file: "{run_dir}/tasks/{task}.log"  # optional: full output of both streams
+  max_output_bytes: 65536         # optional: tail of each stream kept in the result
+```
+
+The command is started with :func:`asyncio.create_subprocess_shell` and
+awaited on the orchestrator's event loop, so hundreds of concurrent shell
+tasks do not tie up a worker thread each.  Output is consumed as it is
+produced: only the last ``max_output_bytes`` of each stream are kept in
+memory and returned (with ``truncated`` and the full ``output_bytes``
+when output was dropped), and with ``log_file`` the complete output of
+both streams is appended to that file as it arrives.  Chatty commands
+therefore neither hold their whole output in memory nor bloat
+``summary.json``.
+
+The command runs in its own process group.  When it exceeds ``timeout`` or
+the task is cancelled, even while the command is still starting, the whole
+group is killed, including any children
+the command started, and a timeout fails the task with
+:class:`TimeoutError`.
 """
 
-import subprocess
-from typing import Any, Dict
+import asyncio
+import os
+import signal
+from pathlib import Path
+from typing import IO, Any, Dict, Optional
 
 from ..plugin_base import Plugin
 
+#: Bytes of each output stream kept in the result by default.
+DEFAULT_MAX_OUTPUT_BYTES = 64 * 1024
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class _Tail:
+    """The last ``limit`` bytes written to a stream."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.buffer = bytearray()
+        self.total = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.total += len(chunk)
+        self.buffer += chunk
+        excess = len(self.buffer) - self.limit
+        if excess > 0:
+            del self.buffer[:excess]
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.buffer)
+
+    def text(self) -> str:
+        data = bytes(self.buffer)
+        if self.truncated:
+            # Drop the partial first line of a truncated tail
+            newline = data.find(b"\n")
+            data = data[newline + 1 :] if newline >= 0 else data
+        return data.decode(errors="replace").strip()
+
+
+async def _pump(stream: asyncio.StreamReader, tail: _Tail, log: Optional[IO[bytes]]) -> None:
+    while True:
+        chunk = await stream.read(_CHUNK_SIZE)
+        if not chunk:
+            return
+        tail.write(chunk)
+        if log is not None:
+            log.write(chunk)
+
+
+def _kill_group(proc: "asyncio.subprocess.Process") -> None:
+    # The shell may have exited while children it started live on in its
+    # group, so the group is killed even when the shell is gone
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        elif proc.returncode is None:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
 
 class ShellPlugin(Plugin):
-    """Execute a shell command using ``subprocess``."""
+    """Execute a shell command as an asyncio subprocess."""
 
     name = "shell"
 
-    def run(self, config: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    async def arun(self, config: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         command = config.get("command")
         if not command:
             raise ValueError("Shell plugin requires a 'command' in config")
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-        )
-        return {
-            "stdout": result.stdout.strip(),
-            "stderr": result.stderr.strip(),
-            "returncode": result.returncode,
-        }
\ No newline at end of file
+        timeout = config.get("timeout")
+        if timeout is not None and (
+            isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0
+        ):
+            raise ValueError("Shell plugin 'timeout' must be a positive number of seconds")
+        env_overrides = config.get("env") or {}
+        if not isinstance(env_overrides, dict):
+            raise ValueError("Shell plugin 'env' must be a mapping of variable names to values")
+        env = {**os.environ, **{str(k): str(v) for k, v in env_overrides.items()}} if env_overrides else None
+        limit = int(config.get("max_output_bytes", DEFAULT_MAX_OUTPUT_BYTES))
+        stdout, stderr = _Tail(limit), _Tail(limit)
+        log_file = config.get("log_file")
+        log: Optional[IO[bytes]] = None
+        if log_file:
+            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+            log = open(log_file, "ab")
+        try:
+            spawn = asyncio.ensure_future(
+                asyncio.create_subprocess_shell(
+                    command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    env=env,
+                    start_new_session=True,
+                )
+            )
+            try:
+                proc = await asyncio.shield(spawn)
+            except asyncio.CancelledError:
+                # Cancelled while starting: let the command start so that its
+                # whole group can be killed rather than left running
+                proc = await spawn
+                _kill_group(proc)
+                await proc.wait()
+                raise
+            assert proc.stdout is not None and proc.stderr is not None
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(_pump(proc.stdout, stdout, log), _pump(proc.stderr, stderr, log), proc.wait()),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                _kill_group(proc)
+                await proc.wait()
+                raise TimeoutError(f"Command timed out after {timeout} seconds: {command}") from None
+            except asyncio.CancelledError:
+                _kill_group(proc)
+                await proc.wait()
+                raise
+        finally:
+            if log is not None:
+                log.close()
+        result: Dict[str, Any] = {
+            "stdout": stdout.text(),
+            "stderr": stderr.text(),
+            "returncode": proc.returncode,
+        }
+        if stdout.truncated or stderr.truncated:
+            result["truncated"] = True
+            result["output_bytes"] = {"stdout": stdout.total, "stderr": stderr.total}
+        if log_file:
+            result["log_file"] = str(log_file)
+        return result
+
+    def run(self, config: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        # Synchronous entry point for process workers and direct callers
+        return asyncio.run(self.arun(config, context))
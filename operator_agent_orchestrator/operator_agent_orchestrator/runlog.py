@@ -0,0 +1,139 @@
+"""Per‑run logging pipeline.
+
+Every run gets its own logger writing three outputs:
+
+- ``run.log`` in the run directory, one human‑readable line per record;
+- ``events.jsonl`` in the run directory, one JSON object per record with
+  its time, level, message and structured fields such as ``event``,
+  ``task``, ``plugin`` and ``status``;
+- the console (standard error), with a separately configurable level.
+
+Calls on the logger only put the record on a queue.  A background thread
+formats the records and writes them, so neither the event loop nor worker
+threads block on file or terminal I/O.  The logger is not registered with
+:mod:`logging`'s global logger manager and its handlers are closed when the
+run ends, so long‑lived processes such as ``oprun serve`` do not accumulate
+loggers or file descriptors.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+#: Human‑readable log inside a run directory.
+LOG_FILE = "run.log"
+
+#: Structured JSON Lines log inside a run directory.
+EVENTS_FILE = "events.jsonl"
+
+#: Level names accepted by the command line.
+LEVELS: Dict[str, int] = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single‑line JSON objects.
+
+    Fields passed to the logging call with ``extra`` are included as
+    top‑level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": record.created,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _RecordQueueHandler(QueueHandler):
+    # QueueHandler.prepare folds the traceback into the message; keep it in
+    # exc_text instead so that the JSON log can store it separately.  The
+    # record is only seen by this handler, so it is updated in place.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class RunLog:
+    """Queue‑backed logger of a single run.
+
+    Parameters
+    ----------
+    run_dir:
+        Directory receiving ``run.log`` and ``events.jsonl``.
+    level:
+        Minimum level of records written to the run directory.
+    console_level:
+        Minimum level of records printed to standard error, or None to
+        print nothing.
+    """
+
+    def __init__(
+        self,
+        run_dir: Path,
+        level: int = logging.INFO,
+        console_level: Optional[int] = logging.INFO,
+    ) -> None:
+        self.logger = logging.Logger(f"orchestrator.{run_dir.name}")
+        self.logger.propagate = False
+        self._handlers: List[logging.Handler] = []
+        text = logging.FileHandler(run_dir / LOG_FILE, encoding="utf-8")
+        text.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        events = logging.FileHandler(run_dir / EVENTS_FILE, encoding="utf-8")
+        events.setFormatter(JsonFormatter())
+        for handler in (text, events):
+            handler.setLevel(level)
+            self._handlers.append(handler)
+        levels = [level]
+        if console_level is not None:
+            console = logging.StreamHandler(sys.stderr)
+            console.setFormatter(logging.Formatter("%(message)s"))
+            console.setLevel(console_level)
+            self._handlers.append(console)
+            levels.append(console_level)
+        # Records no handler wants are dropped before they are queued
+        self.logger.setLevel(min(levels))
+        self._queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.logger.addHandler(_RecordQueueHandler(self._queue))
+        self._listener = QueueListener(self._queue, *self._handlers, respect_handler_level=True)
+        self._listener.start()
+
+    def close(self) -> None:
+        """Write the queued records and release the run's handlers."""
+        self._listener.stop()
+        for handler in self.logger.handlers + self._handlers:
+            handler.close()
+        self.logger.handlers.clear()
+
+
+def read_events(run_dir: Path) -> List[Dict[str, Any]]:
+    """Return the structured log records of the run in ``run_dir``."""
+    with open(Path(run_dir) / EVENTS_FILE, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,335 @@
+"""Long‑running orchestrator daemon.
+
+Every ``oprun run`` pays for interpreter start‑up, for importing pandas,
+YAML and the plugins, and for starting a process pool.  For many small,
+frequent workflows that fixed cost dominates.  ``oprun serve`` pays it once:
+it keeps a single :class:`~operator_agent_orchestrator.Orchestrator` with its
+plugin instances, imported modules, task cache and executor pool alive, and
+runs submitted workflows concurrently on one event loop.
+
+Clients talk to the daemon over a Unix socket (or a TCP port bound to
+``127.0.0.1``) using one JSON object per line in each direction:
+
+``{"op": "submit", "workflow": "/abs/path.yaml"}``
+    Queue a workflow run.  The reply holds the new run's record.  With
+    ``"wait": true`` the reply is only sent once the run has finished.
+``{"op": "status"}`` or ``{"op": "status", "run_id": "..."}``
+    Records of all known runs, or of one run.
+``{"op": "wait", "run_id": "..."}``
+    Reply with the run's record once it has finished.
+``{"op": "shutdown"}``
+    Stop accepting work and exit once the running workflows finish.
+
+Every reply carries ``"ok": true`` or ``"ok": false`` with an ``"error"``
+message.  A run record contains its ``id``, ``workflow``, ``status``
+(``queued``, ``running``, ``succeeded`` or ``failed``), the submission,
+start and finish times, the ``run_dir`` holding its logs and results, and
+any ``error``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import os
+import signal
+import socket
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from .orchestrator import Orchestrator, RunResult, _FairShare, load_workflow
+
+#: Number of finished runs remembered for status queries.
+MAX_FINISHED_RUNS = 1000
+
+#: Modules imported when the daemon starts, before any workflow arrives.
+WARM_MODULES = ("numpy", "pandas", "yaml")
+
+
+def default_socket_path() -> Path:
+    """Return the socket used when none is configured.
+
+    ``$OPRUN_SOCKET`` if set, otherwise ``oprun.sock`` in
+    ``$XDG_RUNTIME_DIR`` or a per‑user file in the temporary directory.
+    """
+    env = os.environ.get("OPRUN_SOCKET")
+    if env:
+        return Path(env)
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / "oprun.sock"
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return Path(tempfile.gettempdir()) / f"oprun-{uid}.sock"
+
+
+def preload_modules(modules: Iterable[str]) -> None:
+    """Import ``modules`` so that workflows using them start warm."""
+    for module in modules:
+        importlib.import_module(module)
+
+
+class WorkflowServer:
+    """Run submitted workflows concurrently on a shared orchestrator.
+
+    Parameters
+    ----------
+    orchestrator:
+        Orchestrator whose plugins, cache and executor pool are shared by
+        every run.
+    max_runs:
+        Maximum number of workflows running at once; further submissions
+        wait in the queue.  None means unlimited.
+    max_parallel:
+        Maximum number of tasks running at once across all runs, handed
+        out round‑robin between the runs with tasks waiting as in
+        :meth:`Orchestrator.run_workflows_async`.  None means unlimited.
+    """
+
+    def __init__(
+        self, orchestrator: Orchestrator, max_runs: Optional[int] = None, max_parallel: Optional[int] = None
+    ) -> None:
+        if max_parallel is not None and max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1")
+        self.orchestrator = orchestrator
+        self.max_runs = max_runs
+        self.max_parallel = max_parallel
+        self._share = _FairShare(max_parallel) if max_parallel is not None else None
+        self.runs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._clients: Dict["asyncio.Task[None]", asyncio.StreamWriter] = {}
+
+    async def submit(self, workflow_path: str) -> Dict[str, Any]:
+        """Queue a run of ``workflow_path`` and return its record.
+
+        The workflow is loaded up front, in a worker thread so that other
+        clients are not held up, and invalid definitions are reported to
+        the client instead of failing in the background.  The run uses the
+        workflow loaded here.
+        """
+        if self._stopping is not None and self._stopping.is_set():
+            raise RuntimeError("Server is shutting down")
+        workflow = await asyncio.to_thread(load_workflow, workflow_path, plan_cache=self.orchestrator.plans)
+        if self._stopping is not None and self._stopping.is_set():
+            raise RuntimeError("Server is shutting down")
+        run_id = uuid.uuid4().hex[:12]
+        run: Dict[str, Any] = {
+            "id": run_id,
+            "workflow": workflow_path,
+            "status": "queued",
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "run_dir": None,
+            "error": None,
+        }
+        self.runs[run_id] = run
+        self._finished[run_id] = asyncio.Event()
+        self._tasks[run_id] = asyncio.create_task(self._execute(run, workflow))
+        self._forget_finished()
+        return run
+
+    async def wait(self, run_id: str) -> Dict[str, Any]:
+        """Return the record of ``run_id`` once the run has finished."""
+        run = self._get(run_id)
+        await self._finished[run_id].wait()
+        return run
+
+    def _get(self, run_id: Optional[str]) -> Dict[str, Any]:
+        if run_id not in self.runs:
+            raise KeyError(f"Unknown run '{run_id}'")
+        return self.runs[run_id]
+
+    def _forget_finished(self) -> None:
+        finished = [rid for rid, run in self.runs.items() if run["finished"] is not None]
+        for run_id in finished[: max(0, len(finished) - MAX_FINISHED_RUNS)]:
+            del self.runs[run_id]
+            del self._finished[run_id]
+
+    async def _execute(self, run: Dict[str, Any], workflow: Dict[str, Any]) -> None:
+        if self._slots is not None:
+            await self._slots.acquire()
+        try:
+            run["status"] = "running"
+            run["started"] = time.time()
+            run_dir, results = await self.orchestrator._run_workflow_async(
+                run["workflow"], share=self._share, workflow=workflow
+            )
+            result = RunResult(run["workflow"], run_dir, results, run["started"], time.time())
+            run["run_dir"] = str(result.run_dir)
+            run["status"] = "succeeded" if result.ok else "failed"
+            if result.failed:
+                run["error"] = f"Tasks failed: {', '.join(result.failed)}"
+        except Exception as exc:  # noqa: BLE001
+            run["status"] = "failed"
+            run["error"] = str(exc)
+        finally:
+            run["finished"] = time.time()
+            if self._slots is not None:
+                self._slots.release()
+            self._finished[run["id"]].set()
+            self._tasks.pop(run["id"], None)
+
+    async def _respond(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "submit":
+            workflow = request.get("workflow")
+            if not workflow:
+                raise ValueError("'submit' requires a 'workflow' path")
+            run = await self.submit(str(workflow))
+            if request.get("wait"):
+                run = await self.wait(run["id"])
+            return {"ok": True, "run": run}
+        if op == "status":
+            if request.get("run_id"):
+                return {"ok": True, "run": self._get(request["run_id"])}
+            return {"ok": True, "pid": os.getpid(), "runs": list(self.runs.values())}
+        if op == "wait":
+            return {"ok": True, "run": await self.wait(request.get("run_id"))}
+        if op == "shutdown":
+            self.stop()
+            return {"ok": True}
+        raise ValueError(f"Unknown operation '{op}'")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._clients[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                    response = await self._respond(request)
+                except Exception as exc:  # noqa: BLE001
+                    message = exc.args[0] if isinstance(exc, KeyError) and exc.args else str(exc)
+                    response = {"ok": False, "error": message}
+                writer.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            self._clients.pop(task, None)
+
+    def stop(self) -> None:
+        """Stop accepting work; :meth:`serve` returns once runs finish."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def serve(
+        self,
+        socket_path: Optional[Union[str, Path]] = None,
+        port: Optional[int] = None,
+        ready: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """Accept clients until :meth:`stop` is called or a signal arrives.
+
+        Listens on ``127.0.0.1:port`` if ``port`` is given, otherwise on the
+        Unix socket ``socket_path`` (default :func:`default_socket_path`),
+        which is only accessible to the current user.  ``ready`` is called
+        with the listening address once clients can connect.
+        """
+        self._stopping = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_runs) if self.max_runs else None
+        path: Optional[Path] = None
+        if port is not None:
+            server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+            address = "127.0.0.1:%d" % server.sockets[0].getsockname()[1]
+        else:
+            path = Path(socket_path) if socket_path else default_socket_path()
+            _claim_socket(path)
+            server = await asyncio.start_unix_server(self._handle, str(path))
+            os.chmod(path, 0o600)
+            address = str(path)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Not supported on this platform or outside the main thread
+                pass
+        try:
+            if ready is not None:
+                ready(address)
+            await self._stopping.wait()
+            server.close()
+            if self._tasks:
+                await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+            # Closing idle connections lets their handlers finish normally
+            # instead of being cancelled mid‑read when the loop shuts down
+            for writer in self._clients.values():
+                writer.close()
+            await asyncio.gather(*list(self._clients), return_exceptions=True)
+        finally:
+            server.close()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError, ValueError):
+                    pass
+            if path is not None:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
+def _claim_socket(path: Path) -> None:
+    # A socket file left behind by a crashed daemon is removed; one that
+    # still accepts connections belongs to a running daemon.
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+    else:
+        raise RuntimeError(f"An oprun server is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def request(
+    message: Dict[str, Any],
+    socket_path: Optional[Union[str, Path]] = None,
+    port: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Send one request to a running daemon and return its reply.
+
+    Raises
+    ------
+    ConnectionError
+        If no daemon is listening at the address.
+    """
+    if port is not None:
+        conn = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+    else:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(timeout)
+        try:
+            conn.connect(str(socket_path or default_socket_path()))
+        except (FileNotFoundError, ConnectionRefusedError) as exc:
+            conn.close()
+            raise ConnectionError(f"No oprun server listening on {socket_path or default_socket_path()}") from exc
+    with conn, conn.makefile("rwb") as stream:
+        stream.write(json.dumps(message).encode("utf-8") + b"\n")
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise ConnectionError("The oprun server closed the connection without replying")
+    return json.loads(line)
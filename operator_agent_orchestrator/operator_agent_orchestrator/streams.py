@@ -0,0 +1,228 @@
+"""Bounded streams between pipelined tasks.
+
+A task marked ``stream: true`` (or ``stream: <buffer size>``) returns an
+iterable, such as a generator or an async generator, instead of a finished
+result.  The orchestrator drains it into a :class:`Stream` and starts the
+task's dependents as soon as the stream is open, so every stage of a
+pipeline works at the same time.  Each dependent reads the items through
+its own :class:`StreamReader`, found in its context under the producer's
+task ID, and sees every item in order.
+
+The buffer is bounded: once the slowest reader is ``maxsize`` items
+behind, the producer blocks until it catches up.  Items are dropped from
+the buffer as soon as every reader has consumed them, so memory use stays
+flat however much data flows through the pipeline.  A reader that is
+closed (its task finished without reading everything) no longer holds the
+producer back.
+
+Readers and producers may be synchronous code running in threads or
+coroutines on the event loop; waiting on the loop never blocks it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncIterable, Callable, Deque, Iterable, List, Optional, Tuple
+
+#: Items buffered per stream when the task does not choose a size.
+DEFAULT_BUFFER = 16
+
+
+class StreamClosedError(RuntimeError):
+    """The stream was cancelled, or its producer failed."""
+
+
+class Stream:
+    """Single‑producer, multi‑reader bounded channel.
+
+    Parameters
+    ----------
+    maxsize:
+        Number of items the producer may run ahead of the slowest reader.
+    readers:
+        Number of readers, created up front in :attr:`readers` so that no
+        item is missed by a reader that starts late.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_BUFFER, readers: int = 1) -> None:
+        if maxsize < 1:
+            raise ValueError("Stream buffer size must be at least 1")
+        self.maxsize = maxsize
+        self._items: Deque[Any] = deque()
+        # Absolute index of _items[0] and of the next item to be produced
+        self._base = 0
+        self._end = 0
+        self._positions: List[Optional[int]] = [0] * readers
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = []
+        self.readers = [StreamReader(self, index) for index in range(readers)]
+
+    @property
+    def produced(self) -> int:
+        """Number of items put so far."""
+        return self._end
+
+    # -- waiting -----------------------------------------------------------
+
+    def _notify(self) -> None:
+        # Called with the lock held
+        self._cond.notify_all()
+        for loop, future in self._waiters:
+            loop.call_soon_threadsafe(_wake, future)
+        self._waiters.clear()
+
+    async def _await(self, ready: Callable[[], bool]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if ready():
+                    return
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            await future
+
+    # -- producer side -----------------------------------------------------
+
+    def _has_room(self) -> bool:
+        active = [pos for pos in self._positions if pos is not None]
+        return self._closed or not active or self._end - min(active) < self.maxsize
+
+    def _append(self, item: Any) -> None:
+        if self._closed:
+            raise StreamClosedError("Stream was closed")
+        if any(pos is not None for pos in self._positions):
+            self._items.append(item)
+        else:
+            # Nobody is left to read it
+            self._base += 1
+        self._end += 1
+        self._notify()
+
+    def put(self, item: Any) -> None:
+        """Add ``item``, blocking while the buffer is full."""
+        with self._cond:
+            self._cond.wait_for(self._has_room)
+            self._append(item)
+
+    async def aput(self, item: Any) -> None:
+        """Add ``item``, waiting on the event loop while the buffer is full."""
+        await self._await(self._has_room)
+        with self._cond:
+            # Only this producer adds items, so the room found is still there
+            self._append(item)
+
+    def fill(self, items: Iterable[Any]) -> int:
+        """Put every item of ``items``, returning how many there were."""
+        for item in items:
+            self.put(item)
+        return self._end
+
+    async def afill(self, items: AsyncIterable[Any]) -> int:
+        """Put every item of the async iterable ``items``."""
+        async for item in items:
+            await self.aput(item)
+        return self._end
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Mark the end of the stream, or its failure with ``error``."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._error = error
+            self._notify()
+
+    def cancel(self) -> None:
+        """Abort the stream: blocked producers and readers raise."""
+        self.close(StreamClosedError("Stream was cancelled"))
+
+    # -- reader side -------------------------------------------------------
+
+    def _trim(self) -> None:
+        active = [pos for pos in self._positions if pos is not None]
+        low = min(active) if active else self._end
+        while self._base < low:
+            self._items.popleft()
+            self._base += 1
+
+    def _take(self, index: int) -> Any:
+        # Called with the lock held once an item or the end is available
+        pos = self._positions[index]
+        if pos is None:
+            raise StopIteration
+        if pos < self._end:
+            item = self._items[pos - self._base]
+            self._positions[index] = pos + 1
+            if pos == self._base:
+                self._trim()
+            self._notify()
+            return item
+        if self._error is not None:
+            raise StreamClosedError(f"Stream failed: {self._error}") from self._error
+        raise StopIteration
+
+    def _readable(self, index: int) -> Callable[[], bool]:
+        def ready() -> bool:
+            pos = self._positions[index]
+            return pos is None or pos < self._end or self._closed
+
+        return ready
+
+    def _release(self, index: int) -> None:
+        with self._cond:
+            if self._positions[index] is None:
+                return
+            self._positions[index] = None
+            self._trim()
+            self._notify()
+
+
+class StreamReader:
+    """One reader's view of a :class:`Stream`.
+
+    Iterate over it with ``for`` in synchronous code or ``async for`` in
+    coroutines.  A reader is a single‑pass iterator: items already read are
+    not seen again.  Reading a stream whose producer failed raises
+    :class:`StreamClosedError`.
+    """
+
+    def __init__(self, stream: Stream, index: int) -> None:
+        self._stream = stream
+        self._index = index
+
+    def __iter__(self) -> "StreamReader":
+        return self
+
+    def __next__(self) -> Any:
+        stream = self._stream
+        with stream._cond:
+            stream._cond.wait_for(stream._readable(self._index))
+            return stream._take(self._index)
+
+    def __aiter__(self) -> "StreamReader":
+        return self
+
+    async def __anext__(self) -> Any:
+        stream = self._stream
+        await stream._await(stream._readable(self._index))
+        with stream._cond:
+            try:
+                return stream._take(self._index)
+            except StopIteration:
+                raise StopAsyncIteration from None
+
+    def close(self) -> None:
+        """Stop reading; the producer no longer waits for this reader."""
+        self._stream._release(self._index)
+
+    def __repr__(self) -> str:
+        return f"<StreamReader {self._index} of {self._stream.produced} items produced>"
+
+
+def _wake(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
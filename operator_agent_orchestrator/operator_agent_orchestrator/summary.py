@@ -0,0 +1,307 @@
+"""Writing run summaries.
+
+Every run writes ``summary.json`` mapping each task ID to its result.
+Results are written as tasks finish, by a background thread, so the
+summary is complete as soon as the last task is and encoding never holds
+up the event loop.  The file is assembled under a temporary name and
+renamed into place when the run ends, so a reader never sees half of it.
+
+Small JSON‑compatible results are stored inline.  Anything else is
+written to its own file under ``results/`` in the run directory and the
+summary holds a reference with a short preview in its place::
+
+    {"$artifact": "results/report", "type": "DataFrame", "bytes": 320000,
+     "shape": [10000, 4], "columns": [...], "preview": [...]}
+
+The file depends on the value:
+
+- DataFrames are stored as memory‑mapped columns (see
+  :class:`~operator_agent_orchestrator.executors.FrameHandle`);
+- NumPy arrays as ``.npy`` files;
+- ``bytes`` as ``.bin`` files;
+- strings longer than ``inline_bytes`` as ``.txt`` files;
+- other JSON values that encode to more than ``inline_bytes`` as ``.json``
+  files (mappings are split up first, so only their large entries move);
+- any other object is pickled to a ``.pkl`` file, or stored as its
+  :func:`str` if it cannot be pickled.
+
+:func:`load_summary` reads a summary back and, with ``resolve=True``,
+loads the referenced files in place of their references.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import queue
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple, Union
+
+from .executors import FrameHandle
+
+#: Summary of a run inside its run directory.
+SUMMARY_FILE = "summary.json"
+
+#: Directory inside a run directory receiving results too large to inline.
+RESULTS_DIR = "results"
+
+#: Key marking a reference to a result stored in its own file.
+ARTIFACT_KEY = "$artifact"
+
+#: Encoded size above which a result is moved out of the summary.
+INLINE_BYTES = 64 * 1024
+
+#: Characters of text, and rows or items of data, kept as a preview.
+PREVIEW_CHARS = 200
+PREVIEW_ROWS = 5
+
+# Nesting depth below which values are no longer split up
+_MAX_DEPTH = 32
+
+_STOP = object()
+
+
+class SummaryWriter:
+    """Stream task results into ``summary.json`` from a background thread.
+
+    Parameters
+    ----------
+    run_dir:
+        Run directory receiving ``summary.json`` and ``results/``.
+    compact:
+        Write the summary without indentation.  Compact output is encoded
+        by the C accelerated JSON encoder and is considerably faster for
+        large summaries.
+    inline_bytes:
+        Results, or entries of mappings, that encode to more than this many
+        bytes are written to their own files.
+    """
+
+    def __init__(self, run_dir: Path, compact: bool = False, inline_bytes: int = INLINE_BYTES) -> None:
+        self.run_dir = Path(run_dir)
+        self.path = self.run_dir / SUMMARY_FILE
+        self.compact = compact
+        self.inline_bytes = inline_bytes
+        self._tmp = self.path.with_name(f".{SUMMARY_FILE}.tmp")
+        self._file = open(self._tmp, "w", encoding="utf-8")
+        self._file.write("{")
+        self._count = 0
+        self._names: Set[str] = set()
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._work, name="oprun-summary", daemon=True)
+        self._thread.start()
+
+    def add(self, task_id: str, result: Any) -> None:
+        """Queue ``result`` of ``task_id`` for writing.
+
+        The result must not be modified afterwards.
+        """
+        self._queue.put((task_id, result))
+
+    def close(self) -> Path:
+        """Write the queued results and move the summary into place."""
+        self._stop()
+        if self._error is not None:
+            self._tmp.unlink(missing_ok=True)
+            raise self._error
+        self._file.write("}\n" if self.compact or not self._count else "\n}\n")
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """Stop writing and discard the partial summary."""
+        if self._closed:
+            return
+        self._stop()
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def _stop(self) -> None:
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    # -- background thread -------------------------------------------------
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._write(*item)
+            except BaseException as exc:  # noqa: BLE001 - re-raised by close()
+                self._error = exc
+
+    def _write(self, task_id: str, result: Any) -> None:
+        entry = self._prepare(result, task_id, 0)
+        key = json.dumps(task_id)
+        if self.compact:
+            text = ("," if self._count else "") + key + ":" + json.dumps(entry, separators=(",", ":"), default=str)
+        else:
+            value = json.dumps(entry, indent=2, default=str).replace("\n", "\n  ")
+            text = ("," if self._count else "") + "\n  " + key + ": " + value
+        self._file.write(text)
+        self._count += 1
+
+    def _prepare(self, value: Any, name: str, depth: int) -> Any:
+        # Return the summary entry for ``value``, writing what does not fit
+        try:
+            encoded: Optional[str] = json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError):
+            encoded = None
+        if encoded is not None and len(encoded) <= self.inline_bytes:
+            return value
+        if isinstance(value, dict) and depth < _MAX_DEPTH:
+            return {str(key): self._prepare(item, f"{name}.{key}", depth + 1) for key, item in value.items()}
+        if encoded is not None:
+            if isinstance(value, str):
+                return self._store_text(name, value)
+            return self._store_json(name, encoded, value)
+        if isinstance(value, (list, tuple)) and depth < _MAX_DEPTH:
+            return [self._prepare(item, f"{name}.{index}", depth + 1) for index, item in enumerate(value)]
+        return self._store_object(name, value)
+
+    def _target(self, name: str, suffix: str) -> Tuple[Path, str]:
+        stem = re.sub(r"[^\w.-]", "_", name).lstrip(".") or "result"
+        candidate, attempt = stem, 1
+        while candidate + suffix in self._names:
+            attempt += 1
+            candidate = f"{stem}-{attempt}"
+        self._names.add(candidate + suffix)
+        directory = self.run_dir / RESULTS_DIR
+        directory.mkdir(exist_ok=True)
+        relative = f"{RESULTS_DIR}/{candidate}{suffix}"
+        return self.run_dir / relative, relative
+
+    def _store_text(self, name: str, text: str) -> Dict[str, Any]:
+        path, relative = self._target(name, ".txt")
+        path.write_text(text, encoding="utf-8")
+        return _reference(relative, "str", path.stat().st_size, preview=_preview(text))
+
+    def _store_json(self, name: str, encoded: str, value: Any) -> Dict[str, Any]:
+        path, relative = self._target(name, ".json")
+        path.write_text(encoded, encoding="utf-8")
+        extra: Dict[str, Any] = {"preview": _preview(encoded)}
+        if isinstance(value, (list, tuple)):
+            extra["length"] = len(value)
+        return _reference(relative, type(value).__name__, len(encoded), **extra)
+
+    def _store_object(self, name: str, value: Any) -> Any:
+        pd = sys.modules.get("pandas")
+        np = sys.modules.get("numpy")
+        if pd is not None and isinstance(value, pd.DataFrame):
+            path, relative = self._target(name, "")
+            handle = FrameHandle.export(value, path)
+            handle.save()
+            try:
+                preview = json.loads(value.head(PREVIEW_ROWS).to_json(orient="records", date_format="iso"))
+            except ValueError:
+                # Duplicate column names cannot be keys of records
+                preview = value.head(PREVIEW_ROWS).to_numpy().tolist()
+            return _reference(
+                relative,
+                "DataFrame",
+                sum(f.stat().st_size for f in path.iterdir()),
+                shape=list(value.shape),
+                columns=[str(col) for col in value.columns],
+                preview=preview,
+            )
+        if np is not None and isinstance(value, np.generic):
+            return value.item()
+        if np is not None and isinstance(value, np.ndarray) and value.dtype != object:
+            path, relative = self._target(name, ".npy")
+            np.save(path, value, allow_pickle=False)
+            return _reference(
+                relative,
+                "ndarray",
+                path.stat().st_size,
+                shape=list(value.shape),
+                dtype=str(value.dtype),
+                preview=value.reshape(-1)[:PREVIEW_ROWS].tolist(),
+            )
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            path, relative = self._target(name, ".bin")
+            path.write_bytes(value)
+            return _reference(relative, "bytes", path.stat().st_size)
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:  # noqa: BLE001 - fall back to the text form
+            text = str(value)
+            return text if len(text) <= self.inline_bytes else self._store_text(name, text)
+        path, relative = self._target(name, ".pkl")
+        path.write_bytes(data)
+        return _reference(relative, type(value).__name__, len(data), preview=_preview(repr(value)))
+
+
+def _reference(relative: str, kind: str, size: int, **extra: Any) -> Dict[str, Any]:
+    return {ARTIFACT_KEY: relative, "type": kind, "bytes": size, **extra}
+
+
+def _preview(text: str) -> str:
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS] + "…"
+
+
+def is_reference(value: Any) -> bool:
+    """Whether ``value`` is a summary entry referring to a stored result."""
+    return isinstance(value, dict) and ARTIFACT_KEY in value
+
+
+def load_result(run_dir: Union[str, Path], reference: Dict[str, Any]) -> Any:
+    """Load the result a summary ``reference`` points to.
+
+    DataFrames and arrays are memory‑mapped rather than read into memory.
+    """
+    path = Path(run_dir) / reference[ARTIFACT_KEY]
+    kind = reference.get("type")
+    if kind == "DataFrame":
+        return FrameHandle.open(path).load()
+    if path.suffix == ".npy":
+        import numpy as np  # type: ignore
+
+        return np.load(path, mmap_mode="r")
+    if path.suffix == ".txt":
+        return path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    if path.suffix == ".bin":
+        return path.read_bytes()
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def load_summary(run_dir: Union[str, Path], resolve: bool = False) -> Dict[str, Any]:
+    """Read the summary of the run in ``run_dir``.
+
+    Parameters
+    ----------
+    run_dir:
+        Directory of a finished run.
+    resolve:
+        Replace references to stored results with the results themselves.
+    """
+    with open(Path(run_dir) / SUMMARY_FILE, "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    if not resolve:
+        return summary
+
+    def walk(value: Any) -> Any:
+        if is_reference(value):
+            return load_result(run_dir, value)
+        if isinstance(value, dict):
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [walk(item) for item in value]
+        return value
+
+    return walk(summary)
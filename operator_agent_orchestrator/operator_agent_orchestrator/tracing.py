@@ -0,0 +1,207 @@
+"""Per‑task tracing for workflow runs.
+
+The orchestrator records one span per task: when it became ready
+(``scheduled``), when it was admitted and started, and when it finished,
+together with where it ran, its CPU time and the change in resident memory
+of the process that ran it.  At the end of a run the spans are written to
+the run directory twice:
+
+``trace.json``
+    The spans as plain JSON, used by ``oprun report``.
+``trace.chrome.json``
+    The same spans in Chrome's ``trace_event`` format.  Open it in
+    ``chrome://tracing`` or https://ui.perfetto.dev to see a timeline.
+
+CPU time is measured with the clock of the thread (or worker process) that
+ran the plugin.  Native async plugins share the event loop thread with
+other tasks, so no CPU time is recorded for them.  Memory deltas are taken
+from the process' resident set size and are only indicative when several
+tasks run concurrently in the same process.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+TRACE_FILE = "trace.json"
+CHROME_TRACE_FILE = "trace.chrome.json"
+
+
+def current_rss() -> Optional[int]:
+    """Return the resident set size of this process in bytes, if known."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class Tracer:
+    """Collect task spans for one workflow run.
+
+    Timestamps are wall‑clock seconds since the epoch, derived from a
+    monotonic clock so that durations are not affected by clock changes.
+    """
+
+    def __init__(self, workflow: str) -> None:
+        self.workflow = workflow
+        self._wall0 = time.time()
+        self._mono0 = time.perf_counter()
+        self.started = self._wall0
+        self.finished: Optional[float] = None
+        self.spans: Dict[str, Dict[str, Any]] = {}
+
+    def now(self) -> float:
+        return self._wall0 + (time.perf_counter() - self._mono0)
+
+    def ready(self, task_id: str, task: Dict[str, Any]) -> None:
+        """Record that ``task_id`` has no unfinished dependencies left."""
+        self.spans[task_id] = {
+            "task": task_id,
+            "plugin": task["plugin"],
+            "executor": task.get("executor"),
+            "depends_on": list(task["depends_on"]) + list(task.get("shards", [])),
+            "scheduled": self.now(),
+        }
+
+    def start(self, task_id: str) -> None:
+        span = self.spans[task_id]
+        span["started"] = self.now()
+        span["queue_wait"] = span["started"] - span["scheduled"]
+
+    def finish(self, task_id: str, status: str, **fields: Any) -> None:
+        span = self.spans[task_id]
+        span["finished"] = self.now()
+        span["duration"] = span["finished"] - span["started"]
+        span["status"] = status
+        span.update(fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "workflow": self.workflow,
+            "started": self.started,
+            "finished": self.finished if self.finished is not None else self.now(),
+            "spans": [span for span in self.spans.values() if "finished" in span],
+        }
+
+    def write(self, run_dir: Path) -> None:
+        """Write ``trace.json`` and ``trace.chrome.json`` into ``run_dir``."""
+        self.finished = self.now()
+        trace = self.to_dict()
+        with open(run_dir / TRACE_FILE, "w", encoding="utf-8") as f:
+            json.dump(trace, f, indent=2, default=str)
+        with open(run_dir / CHROME_TRACE_FILE, "w", encoding="utf-8") as f:
+            json.dump(chrome_trace(trace), f, default=str)
+
+
+def _lanes(spans: List[Dict[str, Any]]) -> Dict[str, int]:
+    # Greedily assign every span the lowest lane that is free when it
+    # starts, so that overlapping spans never share a row in the viewer.
+    lanes: List[float] = []
+    assigned: Dict[str, int] = {}
+    for span in sorted(spans, key=lambda s: s["started"]):
+        for lane, free_at in enumerate(lanes):
+            if free_at <= span["started"]:
+                break
+        else:
+            lane = len(lanes)
+            lanes.append(0.0)
+        lanes[lane] = span["finished"]
+        assigned[span["task"]] = lane
+    return assigned
+
+
+def chrome_trace(trace: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a trace dictionary to Chrome ``trace_event`` format."""
+    origin = trace["started"]
+    spans = trace["spans"]
+    lanes = _lanes(spans)
+    events: List[Dict[str, Any]] = [
+        {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": trace["workflow"]}}
+    ]
+    for lane in sorted(set(lanes.values())):
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": f"slot {lane}"}})
+    for span in spans:
+        events.append(
+            {
+                "name": span["task"],
+                "cat": span["plugin"],
+                "ph": "X",
+                "pid": 1,
+                "tid": lanes[span["task"]],
+                "ts": (span["started"] - origin) * 1e6,
+                "dur": span["duration"] * 1e6,
+                "args": {
+                    key: span.get(key)
+                    for key in ("status", "executor", "worker", "queue_wait", "cpu_seconds", "rss_delta_bytes")
+                },
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the chain of spans that determined the run's wall‑clock time.
+
+    Starting from the task that finished last, repeatedly step to the
+    dependency that finished last, since that is the one the task had to
+    wait for.  The result is ordered from the first task to the last.
+    """
+    by_id = {span["task"]: span for span in spans}
+    if not by_id:
+        return []
+    current: Optional[Dict[str, Any]] = max(spans, key=lambda s: s["finished"])
+    path: List[Dict[str, Any]] = []
+    while current is not None:
+        path.append(current)
+        deps = [by_id[dep] for dep in current.get("depends_on", []) if dep in by_id]
+        current = max(deps, key=lambda s: s["finished"]) if deps else None
+    path.reverse()
+    return path
+
+
+def load_trace(run_dir: Path) -> Dict[str, Any]:
+    with open(Path(run_dir) / TRACE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_report(trace: Dict[str, Any], top: int = 10) -> str:
+    """Render the critical path and the largest time consumers as text."""
+    spans = trace["spans"]
+    wall = trace["finished"] - trace["started"]
+    busy = sum(span["duration"] for span in spans)
+    lines = [
+        f"Workflow: {trace['workflow']}",
+        f"Wall time: {wall:.3f}s  Task time: {busy:.3f}s  Tasks: {len(spans)}",
+        "",
+        "Critical path:",
+    ]
+    path = critical_path(spans)
+    for span in path:
+        lines.append(
+            f"  {span['task']:<30} {span['duration']:>9.3f}s"
+            f"  (waited {span.get('queue_wait', 0.0):.3f}s, {span.get('status')})"
+        )
+    if path:
+        on_path = sum(span["duration"] for span in path)
+        lines.append(f"  {'total':<30} {on_path:>9.3f}s of {wall:.3f}s wall time")
+    lines += ["", f"Top {min(top, len(spans))} tasks by duration:"]
+
+    def cpu(span: Dict[str, Any]) -> str:
+        value = span.get("cpu_seconds")
+        return f"{value:.3f}s" if value is not None else "-"
+
+    ranked: List[Tuple[float, Dict[str, Any]]] = sorted(
+        ((span["duration"], span) for span in spans), key=lambda item: item[0], reverse=True
+    )
+    for duration, span in ranked[:top]:
+        share = 100.0 * duration / busy if busy else 0.0
+        lines.append(
+            f"  {span['task']:<30} {duration:>9.3f}s {share:5.1f}%  cpu {cpu(span):>8}"
+            f"  {span['plugin']} on {span.get('worker', '-')}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,135 @@
+"""Tests for the namespaced artifact store."""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.artifacts import ArtifactStore, ArtifactView
+
+
+class ArtifactStoreTest(unittest.TestCase):
+    """Check lookup, reference counting, views and spilling."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.spill_dir = Path(self._tmpdir.name) / "spill"
+
+    def test_lookup_order_and_release(self) -> None:
+        store = ArtifactStore(self.spill_dir)
+        store.retain("a", 2)
+        store.put("a", "dataframe", "from a")
+        store.put("b", "dataframe", "from b")
+        results = {"a": {"rows": 1}}
+        view = ArtifactView(store, "c", ["a"], results)
+        self.assertEqual(view["dataframe"], "from a")
+        self.assertEqual(view["b/dataframe"], "from b")
+        self.assertEqual(view["a"], {"rows": 1})
+        # Names no dependency published come from the latest publisher
+        self.assertEqual(ArtifactView(store, "d", [], results)["dataframe"], "from b")
+        view["total"] = 3
+        self.assertEqual(store.outputs("c"), {"total": 3})
+        store.release("a")
+        self.assertTrue(store.has("a", "dataframe"))
+        store.release("a")
+        self.assertFalse(store.has("a", "dataframe"))
+        self.assertEqual(view["dataframe"], "from b")
+        with self.assertRaises(KeyError):
+            view["missing"]
+
+    def test_views_are_read_only_and_large_frames_spill(self) -> None:
+        frame = pd.DataFrame({"x": np.arange(10_000, dtype="float64"), "label": ["k"] * 10_000})
+        store = ArtifactStore(self.spill_dir, memory_limit=frame["x"].nbytes // 2)
+        store.put("ingest", "dataframe", frame)
+        self.assertEqual(store.spilled, 1)
+        self.assertEqual(store.in_memory, 0)
+        view = store.get("ingest", "dataframe")
+        pd.testing.assert_frame_equal(view, frame)
+        with self.assertRaises(ValueError):
+            view["x"].to_numpy()[0] = 1.0
+        store.close()
+        self.assertFalse(self.spill_dir.exists())
+
+    def test_in_memory_view_shares_data(self) -> None:
+        frame = pd.DataFrame({"x": np.arange(5, dtype="int64")})
+        store = ArtifactStore(self.spill_dir)
+        store.put("ingest", "dataframe", frame)
+        view = store.get("ingest", "dataframe")
+        self.assertTrue(np.shares_memory(view["x"].to_numpy(), frame["x"].to_numpy()))
+
+    def test_writes_of_superseded_attempts_are_dropped(self) -> None:
+        store = ArtifactStore(self.spill_dir)
+        first = ArtifactView(store, "fetch", [], {}, store.begin_attempt("fetch"))
+        first["partial"] = 1
+        attempt = store.begin_attempt("fetch")
+        second = ArtifactView(store, "fetch", [], {}, attempt)
+        self.assertFalse(store.has("fetch", "partial"))
+        second["value"] = "fresh"
+        first["value"] = "late"
+        del first["value"]
+        self.assertEqual(store.get("fetch", "value"), "fresh")
+        store.end_attempt("fetch", attempt)
+        second["value"] = "after timeout"
+        self.assertEqual(store.get("fetch", "value"), "fresh")
+
+    def test_column_changes_stay_with_their_reader(self) -> None:
+        frame = pd.DataFrame({"x": np.arange(5, dtype="int64"), "y": np.ones(5)})
+        store = ArtifactStore(self.spill_dir)
+        store.put("ingest", "dataframe", frame)
+        first = store.get("ingest", "dataframe")
+        second = store.get("ingest", "dataframe")
+        self.assertIsNot(first, second)
+        self.assertTrue(np.shares_memory(first["x"].to_numpy(), second["x"].to_numpy()))
+        first["x"] += 1
+        first["z"] = 0
+        del first["y"]
+        pd.testing.assert_frame_equal(second, frame)
+        pd.testing.assert_frame_equal(store.get("ingest", "dataframe"), frame)
+
+
+class WorkflowArtifactsTest(unittest.TestCase):
+    """Run workflows with several tasks publishing the same name."""
+
+    def test_parallel_ingests_do_not_overwrite_each_other(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "small.csv").write_text("amount\n1\n2\n")
+            (root / "large.csv").write_text("amount\n10\n20\n30\n")
+            path = root / "workflow.yaml"
+            path.write_text(
+                f"""
+tasks:
+  - id: small
+    plugin: csv_ingest
+    config: {{path: {root / 'small.csv'}}}
+  - id: large
+    plugin: csv_ingest
+    config: {{path: {root / 'large.csv'}, output: frame}}
+  - id: small_stats
+    plugin: metrics
+    depends_on: [small]
+  - id: large_stats
+    plugin: metrics
+    depends_on: [large]
+    config: {{input: large/frame}}
+"""
+            )
+            orchestrator = Orchestrator(
+                log_root=str(root / "logs"), console_level=None, artifact_memory=1
+            )
+            run_dir, results = asyncio.run(orchestrator._run_workflow_async(str(path)))
+            self.assertEqual(results["small_stats"]["amount"]["count"], 2)
+            self.assertEqual(results["large_stats"]["amount"]["count"], 3)
+            self.assertEqual(results["large_stats"]["amount"]["max"], 30)
+            self.assertFalse((run_dir / "spill").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
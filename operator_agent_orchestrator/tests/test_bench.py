@@ -0,0 +1,87 @@
+"""Tests for the benchmark suite behind ``oprun bench``."""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from operator_agent_orchestrator.__main__ import app
+from operator_agent_orchestrator.bench import (
+    SHAPES,
+    generate_dag,
+    import_profile,
+    parse_size,
+    run_benchmarks,
+)
+from operator_agent_orchestrator.orchestrator import topological_order
+
+
+class BenchTest(unittest.TestCase):
+    """Check the DAG generator, a small benchmark run and comparisons."""
+
+    def test_generate_dag(self) -> None:
+        for shape in SHAPES:
+            tasks = generate_dag(shape, 200)
+            self.assertEqual(len(tasks), 200)
+            # Generated tasks are acyclic and listed after their dependencies
+            self.assertEqual(len(topological_order(tasks)), 200)
+            position = {tid: pos for pos, tid in enumerate(tasks)}
+            for tid, task in tasks.items():
+                self.assertTrue(all(position[dep] < position[tid] for dep in task["depends_on"]))
+        self.assertEqual(generate_dag("deep", 3)["t2"]["depends_on"], ["t1"])
+        self.assertEqual(generate_dag("diamond", 10)["t9"]["depends_on"], [f"t{i}" for i in range(1, 9)])
+        self.assertEqual(generate_dag("random", 50, seed=1), generate_dag("random", 50, seed=1))
+        with self.assertRaises(ValueError):
+            generate_dag("star", 10)
+
+    def test_parse_size(self) -> None:
+        self.assertEqual(parse_size("1MB"), 1024**2)
+        self.assertEqual(parse_size("1.5 kb"), 1536)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_run_selected_cases(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            results = run_benchmarks(
+                only=["scheduler/*", "metrics/*"],
+                repeat=2,
+                task_counts=[50],
+                csv_sizes=["64KB"],
+                data_dir=Path(tmpdir),
+            )
+            self.assertTrue((Path(tmpdir) / "bench-64KB.csv").stat().st_size >= 64 * 1024)
+        names = [result["name"] for result in results["results"]]
+        self.assertEqual(
+            names,
+            [f"scheduler/{shape}/50" for shape in SHAPES] + ["metrics/eager/64KB", "metrics/chunked/64KB"],
+        )
+        for result in results["results"]:
+            self.assertEqual(len(result["times"]), 2)
+            self.assertLessEqual(result["min"], result["median"])
+        self.assertIn("python", results["metadata"])
+
+    def test_cli_startup_avoids_heavy_imports(self) -> None:
+        profile = import_profile(["list-plugins"])
+        self.assertGreater(profile["modules"], 0)
+        self.assertIn("click", profile["packages"])
+        self.assertNotIn("pandas", profile["packages"])
+
+    def test_cli_output_and_compare(self) -> None:
+        runner = CliRunner()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            baseline = str(Path(tmpdir) / "base.json")
+            args = ["bench", "--only", "scheduler/deep/*", "--tasks", "20", "--repeat", "1"]
+            first = runner.invoke(app, args + ["--output", baseline])
+            self.assertEqual(first.exit_code, 0, first.output)
+            self.assertIn("scheduler/deep/20", first.output)
+            self.assertEqual(len(json.loads(Path(baseline).read_text())["results"]), 1)
+            second = runner.invoke(app, args + ["--compare", baseline])
+            self.assertEqual(second.exit_code, 0, second.output)
+            self.assertIn("speedup", second.output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Tests for the task result cache."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.cache import TaskCache
+
+
+class _Unwritable:
+    def __reduce__(self) -> tuple:
+        raise OSError("No space left on device")
+
+
+WORKFLOW = """
+name: cached
+cache: true
+tasks:
+  - id: ingest
+    plugin: csv_ingest
+    config:
+      path: {csv}
+  - id: metrics
+    plugin: metrics
+    config:
+      numeric_columns: [value]
+    depends_on: [ingest]
+"""
+
+
+class TaskCacheTest(unittest.TestCase):
+    """Exercise cache hits, invalidation and eviction."""
+
+    def _run(self, orchestrator: Orchestrator, workflow_path: Path) -> tuple:
+        before = set(orchestrator.log_root.glob("*/run.log"))
+        orchestrator.run_workflow(str(workflow_path))
+        (log_path,) = set(orchestrator.log_root.glob("*/run.log")) - before
+        summary = json.loads((log_path.parent / "summary.json").read_text())
+        return log_path.read_text(), summary
+
+    def test_unchanged_tasks_are_skipped(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            csv_path = tmp / "data.csv"
+            csv_path.write_text("value\n1\n2\n3\n")
+            workflow_path = tmp / "workflow.yaml"
+            workflow_path.write_text(WORKFLOW.format(csv=csv_path))
+
+            # Separate log roots so that run directories never collide
+            log, summary = self._run(
+                Orchestrator(log_root=str(tmp / "a"), cache_dir=str(tmp / "cache")), workflow_path
+            )
+            self.assertNotIn("cached result", log)
+            self.assertEqual(summary["metrics"]["value"]["mean"], 2.0)
+
+            log, summary = self._run(
+                Orchestrator(log_root=str(tmp / "b"), cache_dir=str(tmp / "cache")), workflow_path
+            )
+            self.assertIn("Task ingest skipped", log)
+            self.assertIn("Task metrics skipped", log)
+            self.assertEqual(summary["metrics"]["value"]["mean"], 2.0)
+
+            # Changing the input file invalidates the ingest and its dependants
+            csv_path.write_text("value\n10\n20\n30\n40\n")
+            os.utime(csv_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+            log, summary = self._run(
+                Orchestrator(log_root=str(tmp / "c"), cache_dir=str(tmp / "cache")), workflow_path
+            )
+            self.assertNotIn("cached result", log)
+            self.assertEqual(summary["metrics"]["value"]["mean"], 25.0)
+
+            # Bypassing the cache re-executes everything
+            log, _ = self._run(
+                Orchestrator(
+                    log_root=str(tmp / "d"), cache_dir=str(tmp / "cache"), use_cache=False
+                ),
+                workflow_path,
+            )
+            self.assertNotIn("cached result", log)
+
+    def test_lru_eviction(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = TaskCache(tmpdir, max_bytes=10**9)
+            payload = "x" * 1000
+            cache.put("aa01", payload, {})
+            cache.put("bb02", payload, {})
+            old = time.time() - 100
+            for key in ("aa01", "bb02"):
+                os.utime(cache._path(key), (old, old))
+            # Reading an entry marks it as recently used
+            self.assertEqual(cache.get("aa01"), (payload, {}))
+            cache.max_bytes = cache.size() + 100
+            cache.put("cc03", payload, {})
+            self.assertIsNotNone(cache.get("aa01"))
+            self.assertIsNone(cache.get("bb02"))
+            self.assertIsNotNone(cache.get("cc03"))
+            cache.clear()
+            self.assertIsNone(cache.get("aa01"))
+
+    def test_put_tracks_size_without_rescanning(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = TaskCache(tmpdir, max_bytes=10**9)
+            with mock.patch.object(cache, "_entries", wraps=cache._entries) as scan:
+                for i in range(5):
+                    cache.put(f"{i:02d}aa", "x" * 1000, {})
+                cache.put("00aa", "y" * 10, {})
+            # Only the first write scans the store
+            self.assertEqual(scan.call_count, 1)
+            self.assertEqual(cache._size, cache.size())
+            cache.max_bytes = cache._size - 1
+            with mock.patch.object(cache, "_entries", wraps=cache._entries) as scan:
+                cache.put("05aa", "x" * 1000, {})
+            # Crossing the limit starts an eviction
+            self.assertEqual(scan.call_count, 1)
+            self.assertLessEqual(cache.size(), cache.max_bytes)
+            self.assertEqual(cache._size, cache.size())
+
+    def test_failed_put_leaves_no_temporary_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = TaskCache(tmpdir)
+            self.assertFalse(cache.put("aa01", lambda: None, {}))
+            with self.assertRaises(OSError):
+                cache.put("aa01", _Unwritable(), {})
+            self.assertEqual(list(Path(tmpdir).rglob("*.tmp")), [])
+            self.assertIsNone(cache.get("aa01"))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
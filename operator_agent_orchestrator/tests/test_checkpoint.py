@@ -0,0 +1,124 @@
+"""Tests for per-task checkpoints and resuming runs."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.__main__ import app
+from operator_agent_orchestrator.checkpoint import CHECKPOINT_FILE, Checkpoints
+
+
+class CheckpointsTest(unittest.TestCase):
+    """Check the append-only checkpoint file."""
+
+    def test_torn_record_is_discarded(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            checkpoints = Checkpoints(tmpdir)
+            self.assertEqual(checkpoints.load(), {})
+            self.assertTrue(checkpoints.save("a", 1, {}, "fp"))
+            self.assertFalse(checkpoints.save("b", lambda: None, {}))
+            with open(Path(tmpdir) / CHECKPOINT_FILE, "ab") as f:
+                f.write(b"\x80\x05\x95\xff")
+            self.assertEqual(list(checkpoints.load()), ["a"])
+            checkpoints.save("a", 2, {"key": "value"})
+            loaded = checkpoints.load()
+            self.assertEqual(loaded["a"]["result"], 2)
+            self.assertEqual(loaded["a"]["published"], {"key": "value"})
+
+    def test_garbled_record_is_discarded(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            checkpoints = Checkpoints(tmpdir)
+            checkpoints.save("a", 1, {"key": "value"})
+            checkpoints.close()
+            path = Path(tmpdir) / CHECKPOINT_FILE
+            intact = path.stat().st_size
+            with open(path, "ab") as f:
+                # A header announcing more bytes than the file holds
+                f.write(b"\xff" * 12 + b"garbage")
+            self.assertEqual(list(checkpoints.load()), ["a"])
+            self.assertEqual(path.stat().st_size, intact)
+            with open(path, "ab") as f:
+                f.write(b"\x00" * 7 + b"\x05" + b"\x00" * 4 + b"12345")
+            self.assertEqual(list(checkpoints.load()), ["a"])
+            self.assertEqual(path.stat().st_size, intact)
+
+
+class ResumeTest(unittest.TestCase):
+    """Resume runs that failed or were interrupted."""
+
+    def test_resume_runs_only_unfinished_tasks(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            data = tmp / "data.csv"
+            data.write_text("x\n1\n2\n3\n")
+            marker = tmp / "marker"
+            workflow = tmp / "workflow.yaml"
+            workflow.write_text(
+                f"""
+tasks:
+  - {{id: ingest, plugin: csv_ingest, config: {{path: '{data}'}}}}
+  - {{id: stats, plugin: metrics, config: {{numeric_columns: [x]}}, depends_on: [ingest]}}
+  - id: flaky
+    plugin: python_function
+    config: {{function: 'os:remove', args: ['{marker}']}}
+"""
+            )
+            orchestrator = Orchestrator(log_root=str(tmp / "logs"))
+            run_dir, results = asyncio.run(orchestrator._run_workflow_async(str(workflow)))
+            self.assertIn("error", results["flaky"])
+            checkpoints = Checkpoints(run_dir).load()
+            self.assertEqual(sorted(checkpoints), ["ingest", "stats"])
+
+            # Simulate a run killed after ingest finished
+            (run_dir / CHECKPOINT_FILE).unlink()
+            entry = checkpoints["ingest"]
+            Checkpoints(run_dir).save("ingest", entry["result"], entry["published"])
+            # The workflow file may change; the run keeps its compiled plan
+            workflow.write_text("tasks: []\n")
+            marker.touch()
+            result = CliRunner().invoke(app, ["resume", str(run_dir)])
+            self.assertEqual(result.exit_code, 0, result.output)
+            log = (run_dir / "run.log").read_text()
+            self.assertIn("Task ingest restored from checkpoint", log)
+            self.assertNotIn("Running task ingest", log.split("Resuming workflow")[1])
+            summary = json.loads((run_dir / "summary.json").read_text())
+            self.assertEqual(summary["stats"]["x"]["count"], 3)
+            self.assertIsNone(summary["flaky"])
+            self.assertFalse(marker.exists())
+            self.assertEqual(sorted(Checkpoints(run_dir).load()), ["flaky", "ingest", "stats"])
+
+    def test_checkpoints_can_be_turned_off(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            workflow = tmp / "workflow.yaml"
+            workflow.write_text(
+                """
+tasks:
+  - {id: large, plugin: noop}
+  - {id: small, plugin: noop, checkpoint: true}
+checkpoint: false
+"""
+            )
+            orchestrator = Orchestrator(log_root=str(tmp / "logs"))
+            run_dir, _ = asyncio.run(orchestrator._run_workflow_async(str(workflow)))
+            self.assertEqual(list(Checkpoints(run_dir).load()), ["small"])
+            orchestrator = Orchestrator(log_root=str(tmp / "logs"), checkpoint=False)
+            run_dir, _ = asyncio.run(orchestrator._run_workflow_async(str(workflow)))
+            self.assertEqual(Checkpoints(run_dir).load(), {})
+
+    def test_resume_requires_a_run_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = CliRunner().invoke(app, ["resume", tmpdir])
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn("cannot be resumed", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for the columnar sidecar cache of ``csv_ingest``."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from operator_agent_orchestrator.__main__ import app
+from operator_agent_orchestrator.columnar import INCOMPLETE_GRACE, ColumnarCache
+from operator_agent_orchestrator.plugins import CSVIngestPlugin
+
+
+class ColumnarCacheTest(unittest.TestCase):
+    """Check sidecar hits, invalidation, pruning and the CLI."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.tmp = Path(self._tmpdir.name)
+        self.csv = self.tmp / "data.csv"
+        self.csv.write_text("id,label\n" + "\n".join(f"{i},x{i}" for i in range(25)) + "\n")
+        self.cache_dir = self.tmp / "columnar"
+
+    def _ingest(self, **config) -> tuple:
+        context: dict = {}
+        config = dict(path=str(self.csv), columnar_cache=True, columnar_cache_dir=str(self.cache_dir), **config)
+        result = CSVIngestPlugin().run(config, context)
+        return result, context["dataframe"]
+
+    def test_hit_after_miss(self) -> None:
+        first, df = self._ingest()
+        self.assertEqual(first["columnar_cache"], "miss")
+        second, cached = self._ingest()
+        self.assertEqual(second["columnar_cache"], "hit")
+        self.assertEqual(cached["id"].tolist(), df["id"].tolist())
+        self.assertEqual(cached["label"].tolist(), df["label"].tolist())
+        # Different read options use a separate entry
+        third, _ = self._ingest(usecols=["id"])
+        self.assertEqual(third["columnar_cache"], "miss")
+
+    def test_streaming_partitions_come_from_sidecar(self) -> None:
+        self._ingest(chunksize=10)
+        result, partitions = self._ingest(chunksize=10)
+        self.assertEqual(result["columnar_cache"], "hit")
+        self.assertEqual(result["rows"], 25)
+        self.assertEqual(len(partitions.sidecar), 3)
+        self.assertEqual([len(chunk) for chunk in partitions], [10, 10, 5])
+
+    def test_changed_source_is_pruned(self) -> None:
+        self._ingest()
+        cache = ColumnarCache(self.cache_dir)
+        self.assertEqual(cache.prune(), 0)
+        self.csv.write_text("id,label\n1,a\n")
+        os.utime(self.csv, ns=(time.time_ns(), time.time_ns() + 10**9))
+        result, _ = self._ingest()
+        self.assertEqual(result["columnar_cache"], "miss")
+        self.assertEqual(len(cache.entries()), 2)
+        self.assertEqual(cache.prune(), 1)
+        self.assertEqual(cache.prune(remove_all=True), 1)
+        self.assertEqual(cache.entries(), [])
+
+    def test_incomplete_writes_are_kept_during_grace_period(self) -> None:
+        cache = ColumnarCache(self.cache_dir)
+        fresh = self.cache_dir / "fresh.tmp"
+        stale = self.cache_dir / "stale.tmp"
+        for directory in (fresh, stale):
+            directory.mkdir(parents=True)
+            (directory / "0.npy").write_bytes(b"")
+        old = time.time() - INCOMPLETE_GRACE - 60
+        os.utime(stale, (old, old))
+        self.assertEqual(cache.prune(remove_all=True), 0)
+        self.assertTrue(fresh.exists())
+        self.assertFalse(stale.exists())
+
+    def test_cli_warm_and_prune(self) -> None:
+        workflow = self.tmp / "workflow.yaml"
+        workflow.write_text(
+            "tasks:\n"
+            f"  - {{id: ingest, plugin: csv_ingest, config: {{path: '{self.csv}', columnar_cache: true,"
+            f" columnar_cache_dir: '{self.cache_dir}'}}}}\n"
+        )
+        runner = CliRunner()
+        result = runner.invoke(app, ["csv-cache", "warm", str(workflow)])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("ingest: miss (25 rows", result.output)
+        result, _ = self._ingest()
+        self.assertEqual(result["columnar_cache"], "hit")
+        result = runner.invoke(app, ["csv-cache", "prune", "--all", "--cache-dir", str(self.cache_dir)])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Removed 1 entries", result.output)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
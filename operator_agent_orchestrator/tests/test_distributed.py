@@ -0,0 +1,139 @@
+"""Tests for remote execution through the broker."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.distributed import (
+    _HEADER,
+    HELLO_MAX_BYTES,
+    Broker,
+    _recv_frame,
+    _send_frame,
+    run_worker,
+)
+from operator_agent_orchestrator.plugins.noop import NoopPlugin
+from operator_agent_orchestrator.runlog import read_events
+from operator_agent_orchestrator.tracing import load_trace
+
+
+class RemoteExecutionTest(unittest.TestCase):
+    """Run tasks on worker processes connected to the broker."""
+
+    def test_remote_tasks_share_context_and_logs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            data = tmp / "data.csv"
+            data.write_text("x\n1\n2\n3\n")
+            workflow = tmp / "workflow.yaml"
+            workflow.write_text(
+                f"""
+executor: remote
+tasks:
+  - {{id: ingest, plugin: csv_ingest, config: {{path: '{data}'}}}}
+  - {{id: stats, plugin: metrics, config: {{numeric_columns: [x]}}, depends_on: [ingest]}}
+  - id: say
+    plugin: python_function
+    config: {{function: 'logging:warning', args: ['hello from a worker']}}
+"""
+            )
+            started = []
+            orchestrator = Orchestrator(
+                log_root=str(tmp / "logs"),
+                workers=2,
+                console_level=None,
+                on_broker_start=lambda address, token: started.append((address, token)),
+            )
+            try:
+                run_dir, results = asyncio.run(orchestrator._run_workflow_async(str(workflow)))
+                broker = orchestrator.executors.broker
+            finally:
+                orchestrator.close()
+            self.assertEqual(started, [(broker.address, broker.token)])
+            self.assertEqual(results["stats"]["x"]["mean"], 2.0)
+            spans = {span["task"]: span for span in load_trace(run_dir)["spans"]}
+            self.assertTrue(spans["stats"]["worker"].startswith("remote "))
+            logs = [e for e in read_events(run_dir) if e.get("event") == "worker_log"]
+            self.assertEqual([e["task"] for e in logs], ["say"])
+            self.assertIn("hello from a worker", logs[0]["message"])
+
+
+class BrokerTest(unittest.TestCase):
+    """Check worker authentication and reassignment of lost tasks."""
+
+    def test_tasks_of_silent_worker_are_reassigned(self) -> None:
+        broker = Broker(heartbeat_timeout=0.5)
+        host, _, port = broker.start().rpartition(":")
+        try:
+            # A worker that accepts a task and then never answers
+            silent = socket.create_connection((host, int(port)))
+            _send_frame(silent, json.dumps({"token": broker.token, "worker": "silent"}).encode("utf-8"))
+            self.assertTrue(json.loads(_recv_frame(silent))["ok"])
+            self.assertTrue(broker.wait_for_workers(1, timeout=5))
+            messages = []
+            future = broker.submit(NoopPlugin, {}, {}, lambda level, message: messages.append(message))
+            _recv_frame(silent)
+            worker = threading.Thread(
+                target=run_worker, args=(broker.address, broker.token), kwargs={"name": "healthy"}, daemon=True
+            )
+            worker.start()
+            result, published, stats = future.result(timeout=10)
+            self.assertIsNone(result)
+            self.assertEqual(stats["worker"], "remote healthy")
+            self.assertEqual(messages, ["Worker silent lost; reassigning task"])
+            silent.close()
+        finally:
+            broker.shutdown()
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+
+    def test_invalid_token_is_rejected(self) -> None:
+        broker = Broker()
+        broker.start()
+        try:
+            with self.assertRaisesRegex(ConnectionError, "invalid token"):
+                run_worker(broker.address, "wrong", connect_timeout=5)
+        finally:
+            broker.shutdown()
+
+    def test_malformed_hello_is_rejected(self) -> None:
+        broker = Broker()
+        host, _, port = broker.start().rpartition(":")
+        errors = []
+        hook = threading.excepthook
+        threading.excepthook = errors.append
+        try:
+            for hello in ([broker.token], {"token": "t\u00f6ken"}, {"token": 5}, {"token": broker.token, "slots": [2]}):
+                with socket.create_connection((host, int(port)), timeout=5) as sock:
+                    _send_frame(sock, json.dumps(hello).encode("utf-8"))
+                    if "slots" not in hello:
+                        self.assertEqual(json.loads(_recv_frame(sock)), {"ok": False, "error": "invalid token"})
+                    self.assertEqual(sock.recv(1), b"")
+            self.assertEqual(broker.workers(), [])
+        finally:
+            threading.excepthook = hook
+            broker.shutdown()
+        self.assertEqual(errors, [])
+
+    def test_oversized_hello_is_rejected_before_reading(self) -> None:
+        broker = Broker()
+        host, _, port = broker.start().rpartition(":")
+        try:
+            # Only the header is sent; a broker waiting for the body would hang
+            with socket.create_connection((host, int(port)), timeout=5) as sock:
+                sock.sendall(_HEADER.pack(HELLO_MAX_BYTES + 1))
+                self.assertEqual(sock.recv(1), b"")
+            self.assertEqual(broker.workers(), [])
+        finally:
+            broker.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Tests for the thread, process and inline executors."""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.executors import FrameExporter, FrameHandle
+
+
+WORKFLOW = """
+name: executors
+executor: process
+tasks:
+  - id: ingest
+    plugin: csv_ingest
+    executor: inline
+    config:
+      path: {csv}
+  - id: metrics
+    plugin: metrics
+    config:
+      numeric_columns: [value]
+    depends_on: [ingest]
+  - id: greet
+    plugin: python_function
+    executor: thread
+    config:
+      function: operator_agent_orchestrator.examples.plugin_example:greet
+      args: [worker]
+"""
+
+
+class ExecutorTest(unittest.TestCase):
+    """Run plugins on every executor and check DataFrame handoff."""
+
+    def test_mixed_executors(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            csv_path = tmp / "data.csv"
+            csv_path.write_text("name,value\na,1\nb,2\nc,6\n")
+            workflow_path = tmp / "workflow.yaml"
+            workflow_path.write_text(WORKFLOW.format(csv=csv_path))
+            orchestrator = Orchestrator(log_root=str(tmp / "logs"), process_workers=1)
+            try:
+                orchestrator.run_workflow(str(workflow_path))
+            finally:
+                orchestrator.close()
+            (summary_path,) = (tmp / "logs").rglob("summary.json")
+            summary = json.loads(summary_path.read_text())
+            self.assertEqual(summary["metrics"]["value"]["mean"], 3.0)
+            self.assertEqual(summary["greet"], "Hello, worker!")
+
+    def test_crashed_worker_only_fails_its_task(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            crash = tmp / "crash.yaml"
+            crash.write_text(
+                "tasks:\n"
+                "  - {id: crash, plugin: python_function, executor: process,"
+                " config: {function: 'os:_exit', args: [3]}}\n"
+            )
+            later = tmp / "later.yaml"
+            later.write_text(
+                "tasks:\n"
+                "  - {id: pid, plugin: python_function, executor: process, config: {function: 'os:getpid'}}\n"
+            )
+            orchestrator = Orchestrator(log_root=str(tmp / "logs"), process_workers=1, console_level=None)
+            try:
+                result = orchestrator.run_workflow(str(crash))
+                self.assertIn("terminated abruptly", result.results["crash"]["error"])
+                # The next task gets a fresh pool instead of the broken one
+                result = orchestrator.run_workflow(str(later))
+                self.assertTrue(result.ok)
+                self.assertIsInstance(result.results["pid"], int)
+            finally:
+                orchestrator.close()
+
+    def test_unknown_executor_rejected(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            workflow_path = Path(tmpdir) / "workflow.yaml"
+            workflow_path.write_text(
+                "tasks:\n  - id: a\n    plugin: shell\n    executor: gpu\n    config: {command: 'true'}\n"
+            )
+            orchestrator = Orchestrator(log_root=str(Path(tmpdir) / "logs"))
+            with self.assertRaises(ValueError):
+                orchestrator.run_workflow(str(workflow_path))
+
+    def test_frame_handle_is_memory_mapped(self) -> None:
+        df = pd.DataFrame({"x": np.arange(5.0), "label": list("abcde")}, index=list("vwxyz"))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handle = FrameExporter(Path(tmpdir)).wrap(df)
+            self.assertIsInstance(handle, FrameHandle)
+            loaded = handle.load()
+            pd.testing.assert_frame_equal(loaded, df)
+            base = loaded["x"].to_numpy()
+            while not isinstance(base, np.memmap) and base.base is not None:
+                base = base.base
+            self.assertIsInstance(base, np.memmap)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,163 @@
+"""Tests for the run history and duration‑aware scheduling."""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.history import (
+    HISTORY_FILE,
+    RunHistory,
+    critical_path_priorities,
+    straggler_thresholds,
+)
+from operator_agent_orchestrator.orchestrator import _dispatch, _Limits
+from operator_agent_orchestrator.tracing import load_trace
+
+
+def span(task: str, duration: float, status: str = "ok", started: float = 0.0) -> dict:
+    return {"task": task, "plugin": "noop", "status": status, "started": started, "duration": duration}
+
+
+class RunHistoryTest(unittest.TestCase):
+    """Check recording, estimates and aggregates."""
+
+    def test_estimates_use_recent_successful_runs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = RunHistory(Path(tmpdir) / HISTORY_FILE)
+            self.addCleanup(history.close)
+            for i, duration in enumerate([9.0, 1.0, 2.0, 3.0, 4.0, 5.0]):
+                run_dir = Path(tmpdir) / f"run{i}"
+                history.start_run("demo", run_dir)
+                spans = [
+                    span("load", duration, started=i),
+                    span("map[0]", 2 * duration, started=i),
+                    span("flaky", 100.0, status="error", started=i),
+                ]
+                trace = {"workflow": "demo", "started": i, "finished": i + 1, "spans": spans}
+                history.finish_run(run_dir, trace, "failed")
+            history.start_run("demo", Path(tmpdir) / "crashed")
+
+            # The oldest run (9.0) is outside the last five
+            self.assertEqual(history.estimates("demo"), {"load": 3.0, "map[0]": 6.0})
+            self.assertEqual(history.estimates("other"), {})
+            runs = history.runs(workflow="demo", limit=3)
+            self.assertEqual([run["status"] for run in runs], ["running", "failed", "failed"])
+            self.assertEqual(runs[1]["failed"], 1)
+            stats = {entry["task"]: entry for entry in history.task_stats("demo")}
+            self.assertEqual(stats["load"]["runs"], 6)
+            self.assertEqual(stats["load"]["max_seconds"], 9.0)
+            self.assertEqual(stats["map"]["median_seconds"], 7.0)
+            self.assertEqual(stats["flaky"]["failures"], 6)
+            self.assertIsNone(stats["flaky"]["mean_seconds"])
+
+    def test_old_runs_are_pruned(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = RunHistory(Path(tmpdir) / HISTORY_FILE, keep_runs=3)
+            self.addCleanup(history.close)
+            for workflow in ("demo", "other"):
+                for i in range(5):
+                    run_dir = Path(tmpdir) / f"{workflow}{i}"
+                    history.start_run(workflow, run_dir)
+                    spans = [span("load", i, started=i)]
+                    trace = {"workflow": workflow, "started": i, "finished": i + 1, "spans": spans}
+                    history.finish_run(run_dir, trace, "ok")
+            names = [Path(run["run_dir"]).name for run in history.runs(workflow="demo")]
+            self.assertEqual(names, ["demo4", "demo3", "demo2"])
+            self.assertEqual(history.task_stats("other")[0]["runs"], 3)
+            self.assertEqual(history.durations("demo", runs=2), {"load": [4.0, 3.0]})
+            with self.assertRaises(ValueError):
+                RunHistory(Path(tmpdir) / HISTORY_FILE, keep_runs=0)
+
+    def test_runs_are_keyed_by_directory_and_workflow_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = RunHistory(Path(tmpdir) / HISTORY_FILE)
+            self.addCleanup(history.close)
+            # Two unnamed workflows from different files, logged to two
+            # log directories whose run directories have the same name
+            for root, key, duration in (("a", "/flows/a.yaml", 1.0), ("b", "/flows/b.yaml", 8.0)):
+                run_dir = Path(tmpdir) / root / "workflow_20250101T000000Z"
+                self.assertEqual(history.start_run("unnamed-workflow", run_dir, key), key)
+                spans = [span("ingest", duration)]
+                trace = {"workflow": "unnamed-workflow", "started": 0, "finished": 1, "spans": spans}
+                history.finish_run(run_dir, trace, "ok")
+            self.assertEqual(len(history.runs()), 2)
+            self.assertEqual(history.estimates("/flows/a.yaml"), {"ingest": 1.0})
+            self.assertEqual(history.estimates("/flows/b.yaml"), {"ingest": 8.0})
+            # A resumed run keeps its key
+            self.assertEqual(history.start_run("unnamed-workflow", run_dir), "/flows/b.yaml")
+
+    def test_priorities_follow_longest_remaining_path(self) -> None:
+        tasks = {
+            "a": {"depends_on": []},
+            "b": {"depends_on": ["a"]},
+            "c": {"depends_on": []},
+            "d": {"depends_on": ["b", "c"]},
+        }
+        priorities = critical_path_priorities(tasks, {"a": 1.0, "b": 5.0, "c": 2.0, "d": 1.0})
+        self.assertEqual(priorities, {"d": 1.0, "c": 3.0, "b": 6.0, "a": 7.0})
+        # Without history every task counts the same, so chains go first
+        self.assertEqual(critical_path_priorities(tasks, {})["a"], 3.0)
+
+    def test_straggler_thresholds_pool_shards(self) -> None:
+        durations = {
+            "load": [1.0, 2.0, 3.0, 4.0, 5.0],
+            "map": [0.1, 0.1, 0.1],
+            "map[0]": [1.0, 3.0],
+            "map[1]": [2.0],
+            "new": [1.0, 1.0],
+        }
+        thresholds = straggler_thresholds(durations, {"load": 50.0, "map": 75.0, "new": 95.0, "other": 95.0})
+        # The map task's own (reduce) durations are replaced by its shards'
+        self.assertEqual(thresholds, {"load": 3.0, "map": 2.5})
+        self.assertEqual(straggler_thresholds(durations, {"load": 90.0}), {"load": 4.6})
+
+    def test_dispatch_starts_highest_priority_first(self) -> None:
+        tasks = {tid: {"plugin": "noop", "depends_on": [], "resources": {}} for tid in "abcd"}
+        order = []
+
+        async def run_task(task_id: str) -> None:
+            order.append(task_id)
+
+        priorities = {"a": 1.0, "b": 3.0, "c": 2.0}
+        asyncio.run(_dispatch(tasks, run_task, _Limits(max_parallel=1), priorities=priorities))
+        self.assertEqual(order, ["b", "c", "a", "d"])
+
+
+class HistorySchedulingTest(unittest.TestCase):
+    """Run a workflow twice and check that the second run uses the first."""
+
+    def test_slow_task_starts_first_once_known(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text(
+                """
+name: chains
+max_parallel: 1
+tasks:
+  - {id: a1, plugin: shell, config: {command: 'sleep 0.01'}}
+  - {id: a2, plugin: shell, depends_on: [a1], config: {command: 'sleep 0.01'}}
+  - {id: a3, plugin: shell, depends_on: [a2], config: {command: 'sleep 0.01'}}
+  - {id: slow, plugin: shell, config: {command: 'sleep 0.3'}}
+"""
+            )
+            orchestrator = Orchestrator(log_root=str(Path(tmpdir) / "logs"), console_level=None)
+            self.addCleanup(orchestrator.close)
+            starts = []
+            for _ in range(2):
+                run_dir, _ = asyncio.run(orchestrator._run_workflow_async(str(path)))
+                spans = {span["task"]: span["started"] for span in load_trace(run_dir)["spans"]}
+                starts.append(spans)
+            # The longest chain by task count goes first without history,
+            # the slowest one once durations are known
+            self.assertLess(starts[0]["a1"], starts[0]["slow"])
+            self.assertLess(starts[1]["slow"], starts[1]["a1"])
+            runs = orchestrator.history.runs(workflow="chains")
+            self.assertEqual([run["status"] for run in runs], ["ok", "ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
 
-from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator import Orchestrator, RunResult
+from operator_agent_orchestrator.orchestrator import _dispatch, _Limits, load_workflow
+from operator_agent_orchestrator.plugin_base import Plugin
+from operator_agent_orchestrator.plugins import PLUGINS
+from operator_agent_orchestrator.tracing import load_trace
 
 import importlib.resources as resources
 
@@ -66,5 +74,488 @@ class OrchestratorTest(unittest.TestCase):
             self.assertEqual(summary["announce"]["returncode"], 0)
 
 
+class SchedulerTest(unittest.TestCase):
+    """Test workflow validation and dependency ordering."""
+
+    def _write(self, tmpdir: str, text: str) -> str:
+        path = Path(tmpdir) / "workflow.yaml"
+        path.write_text(text)
+        return str(path)
+
+    def test_tasks_are_ordered_by_dependencies(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write(
+                tmpdir,
+                """
+tasks:
+  - {id: c, plugin: shell, config: {command: "true"}, depends_on: [b, a]}
+  - {id: b, plugin: shell, config: {command: "true"}, depends_on: [a, a]}
+  - {id: a, plugin: shell, config: {command: "true"}}
+  - {id: d, plugin: shell, config: {command: "true"}}
+""",
+            )
+            workflow = load_workflow(path)
+            self.assertEqual(list(workflow["tasks"]), ["a", "d", "b", "c"])
+            self.assertEqual(workflow["tasks"]["b"]["depends_on"], ["a"])
+
+    def test_unknown_dependency_fails_fast(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write(
+                tmpdir,
+                "tasks:\n  - {id: a, plugin: shell, config: {command: 'true'}, depends_on: [missing]}\n",
+            )
+            with self.assertRaisesRegex(ValueError, "unknown task 'missing'"):
+                Orchestrator(log_root=str(Path(tmpdir) / "logs")).run_workflow(path)
+            self.assertEqual(list((Path(tmpdir) / "logs").glob("workflow_*")), [])
+
+    def test_cycle_fails_fast(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write(
+                tmpdir,
+                """
+tasks:
+  - {id: start, plugin: shell, config: {command: "true"}}
+  - {id: a, plugin: shell, config: {command: "true"}, depends_on: [start, c]}
+  - {id: b, plugin: shell, config: {command: "true"}, depends_on: [a]}
+  - {id: c, plugin: shell, config: {command: "true"}, depends_on: [b]}
+""",
+            )
+            with self.assertRaisesRegex(ValueError, "cycle detected: a -> b -> c -> a"):
+                load_workflow(path)
+
+    def test_wide_and_deep_graph_runs_every_task(self) -> None:
+        lines = ["tasks:"]
+        for i in range(100):
+            deps = [f"t{i - 1}"] if i % 10 else []
+            lines.append(
+                f"  - {{id: t{i}, plugin: python_function, executor: inline, depends_on: {deps},"
+                f" config: {{function: 'operator_agent_orchestrator.examples.plugin_example:sum_numbers',"
+                f" args: [[{i}]]}}}}"
+            )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write(tmpdir, "\n".join(lines) + "\n")
+            Orchestrator(log_root=str(Path(tmpdir) / "logs")).run_workflow(path)
+            (summary_path,) = (Path(tmpdir) / "logs").rglob("summary.json")
+            summary = json.loads(summary_path.read_text())
+            self.assertEqual(summary, {f"t{i}": float(i) for i in range(100)})
+
+
+class ConcurrencyLimitTest(unittest.TestCase):
+    """Test that dispatch honours parallelism and resource limits."""
+
+    def _peak(self, tasks: dict, limits: _Limits) -> dict:
+        peaks = {"all": 0, "shell": 0, "db_conn": 0.0}
+        current = {"all": 0, "shell": 0, "db_conn": 0.0}
+
+        async def run_task(task_id: str) -> None:
+            task = tasks[task_id]
+            deltas = {
+                "all": 1,
+                "shell": int(task["plugin"] == "shell"),
+                "db_conn": task["resources"].get("db_conn", 0.0),
+            }
+            for key, delta in deltas.items():
+                current[key] += delta
+                peaks[key] = max(peaks[key], current[key])
+            await asyncio.sleep(0.001)
+            for key, delta in deltas.items():
+                current[key] -= delta
+
+        asyncio.run(_dispatch(tasks, run_task, limits))
+        return peaks
+
+    def _tasks(self, count: int) -> dict:
+        return {
+            f"t{i}": {
+                "plugin": "shell" if i % 2 else "python_function",
+                "depends_on": [],
+                "resources": {"db_conn": 1.0} if i % 3 == 0 else {},
+            }
+            for i in range(count)
+        }
+
+    def test_max_parallel(self) -> None:
+        peaks = self._peak(self._tasks(30), _Limits(max_parallel=4))
+        self.assertEqual(peaks["all"], 4)
+
+    def test_plugin_limit_and_resources(self) -> None:
+        limits = _Limits(plugin_limits={"shell": 2}, capacities={"db_conn": 3})
+        peaks = self._peak(self._tasks(30), limits)
+        self.assertEqual(peaks["shell"], 2)
+        self.assertEqual(peaks["db_conn"], 3)
+        self.assertEqual(limits.running, 0)
+        self.assertEqual(limits.in_use, {"db_conn": 0.0})
+
+    def test_freed_resource_admits_every_task_that_fits(self) -> None:
+        tasks = {"big": {"plugin": "noop", "depends_on": [], "resources": {"db_conn": 4.0}}}
+        for i in range(4):
+            tasks[f"small{i}"] = {"plugin": "noop", "depends_on": [], "resources": {"db_conn": 1.0}}
+        current = peak = 0
+
+        async def run_task(task_id: str) -> None:
+            nonlocal current, peak
+            if task_id != "big":
+                current += 1
+                peak = max(peak, current)
+            await asyncio.sleep(0.01)
+            if task_id != "big":
+                current -= 1
+
+        limits = _Limits(capacities={"db_conn": 4})
+        asyncio.run(_dispatch(tasks, run_task, limits, priorities={"big": 1.0}))
+        self.assertEqual(peak, 4)
+
+    def test_blocked_tasks_are_not_rescanned(self) -> None:
+        # Regression: every completion used to re-examine each blocked task
+        checks = 0
+
+        class CountingLimits(_Limits):
+            def _plugin_limit(self, plugin_name: str) -> object:
+                nonlocal checks
+                checks += 1
+                return super()._plugin_limit(plugin_name)
+
+        count = 8000
+        tasks = {f"t{i}": {"plugin": "noop", "depends_on": [], "resources": {}} for i in range(count)}
+
+        async def run_task(task_id: str) -> None:
+            pass
+
+        asyncio.run(_dispatch(tasks, run_task, CountingLimits(plugin_limits={"noop": 1})))
+        self.assertLess(checks, 3 * count)
+
+    def test_oversized_request_rejected(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text(
+                """
+max_parallel: 2
+resources: {memory_gb: 4}
+tasks:
+  - {id: big, plugin: shell, config: {command: "true"}, resources: {memory_gb: 8}}
+"""
+            )
+            orchestrator = Orchestrator(log_root=str(Path(tmpdir) / "logs"))
+            with self.assertRaisesRegex(ValueError, "requests 8 memory_gb"):
+                orchestrator.run_workflow(str(path))
+            # Host capacities given to the orchestrator take precedence
+            Orchestrator(
+                log_root=str(Path(tmpdir) / "logs"), resources={"memory_gb": 16}
+            ).run_workflow(str(path))
+
+
+class MapTaskTest(unittest.TestCase):
+    """Test ``foreach`` expansion into shards and the ``reduce`` step."""
+
+    def _run(self, tmpdir: str, text: str) -> tuple:
+        path = Path(tmpdir) / "workflow.yaml"
+        path.write_text(text)
+        run_dir, results = asyncio.run(
+            Orchestrator(log_root=str(Path(tmpdir) / "logs"))._run_workflow_async(str(path))
+        )
+        return run_dir, results
+
+    def test_items_are_reduced(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            run_dir, results = self._run(
+                tmpdir,
+                """
+max_parallel: 2
+tasks:
+  - id: lengths
+    plugin: python_function
+    foreach: {items: [a, bb, ccc]}
+    config: {function: 'builtins:len', args: ['{item}']}
+    reduce:
+      plugin: python_function
+      config: {function: 'builtins:sum', args: ['{results}']}
+  - id: after
+    plugin: python_function
+    config: {function: 'builtins:abs', args: [-1]}
+    depends_on: [lengths]
+""",
+            )
+            self.assertEqual(results, {"lengths": 6, "after": 1})
+            trace = json.loads((run_dir / "trace.json").read_text())
+            spans = {span["task"]: span for span in trace["spans"]}
+            self.assertEqual(spans["lengths"]["depends_on"], ["lengths[0]", "lengths[1]", "lengths[2]"])
+            self.assertLess(spans["lengths[2]"]["finished"], spans["lengths"]["started"])
+
+    def test_glob_and_partitions(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, rows in (("a", 3), ("b", 5)):
+                lines = ["x"] + [str(i) for i in range(rows)]
+                (Path(tmpdir) / f"{name}.csv").write_text("\n".join(lines) + "\n")
+            _, results = self._run(
+                tmpdir,
+                f"""
+tasks:
+  - id: files
+    plugin: csv_ingest
+    foreach: {{glob: '{tmpdir}/*.csv'}}
+    config: {{path: '{{item}}'}}
+  - id: chunked
+    plugin: csv_ingest
+    config: {{path: '{tmpdir}/b.csv', chunksize: 2}}
+  - id: stats
+    plugin: metrics
+    foreach: {{partitions: chunked}}
+    config: {{numeric_columns: [x]}}
+""",
+            )
+            self.assertEqual([shard["rows"] for shard in results["files"]], [3, 5])
+            # Each shard summarises its own partition of rows 0..4
+            self.assertEqual([shard["x"]["count"] for shard in results["stats"]], [2, 2, 1])
+            self.assertEqual([shard["x"]["min"] for shard in results["stats"]], [0, 2, 4])
+
+    def test_failures(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            _, results = self._run(
+                tmpdir,
+                """
+tasks:
+  - id: parse
+    plugin: python_function
+    foreach: [1, x]
+    config: {function: 'builtins:int', args: ['{item}']}
+    reduce: {plugin: python_function, config: {function: 'builtins:sum', args: ['{results}']}}
+  - id: none
+    plugin: noop
+  - id: nothing
+    plugin: noop
+    foreach: {partitions: none}
+""",
+            )
+            self.assertEqual(results["parse"]["error"], "Shards failed: parse[1]")
+            self.assertIn("did not produce partitions", results["nothing"]["error"])
+            path = Path(tmpdir) / "bad.yaml"
+            path.write_text("tasks:\n  - {id: a, plugin: noop, reduce: {plugin: noop}}\n")
+            with self.assertRaisesRegex(ValueError, "no 'foreach'"):
+                load_workflow(str(path))
+            path.write_text("tasks:\n  - {id: a, plugin: noop, foreach: {items: [], glob: '*'}}\n")
+            with self.assertRaisesRegex(ValueError, "exactly one of"):
+                load_workflow(str(path))
+
+
+class AsyncApiTest(unittest.TestCase):
+    """Run workflows from an event loop, singly and in batches."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.root = Path(self._tmpdir.name)
+        self.orchestrator = Orchestrator(log_root=str(self.root / "logs"), console_level=None, history=False)
+        self.addCleanup(self.orchestrator.close)
+
+    def _workflow(self, name: str, tasks: int, command: str = "sleep 0.05") -> str:
+        lines = ["tasks:"]
+        for i in range(tasks):
+            lines.append(f"  - {{id: t{i}, plugin: shell, config: {{command: '{command}'}}}}")
+        path = self.root / f"{name}.yaml"
+        path.write_text("\n".join(lines) + "\n")
+        return str(path)
+
+    def test_runs_share_the_callers_loop(self) -> None:
+        good = self._workflow("good", 2, "echo hi")
+        bad = self._workflow("bad", 1, "exit 1")
+
+        async def main() -> list:
+            return await asyncio.gather(
+                self.orchestrator.run_workflow_async(good), self.orchestrator.run_workflow_async(bad)
+            )
+
+        first, second = asyncio.run(main())
+        self.assertIsInstance(first, RunResult)
+        self.assertTrue(first.ok)
+        self.assertEqual(first.results["t0"]["stdout"], "hi")
+        self.assertTrue((first.run_dir / "summary.json").exists())
+        # The shell plugin reports a non-zero exit code without failing
+        self.assertEqual(second.results["t0"]["returncode"], 1)
+        self.assertGreater(first.duration, 0)
+
+    def test_batch_shares_slots_fairly(self) -> None:
+        paths = [self._workflow(name, 4) for name in ("a", "b", "c")]
+        paths.append(str(self.root / "missing.yaml"))
+        results = self.orchestrator.run_workflows(paths, max_parallel=2)
+        self.assertEqual([result.status for result in results], ["ok", "ok", "ok", "aborted"])
+        self.assertIsNone(results[3].run_dir)
+        spans = {
+            Path(result.workflow).stem: load_trace(result.run_dir)["spans"] for result in results[:3]
+        }
+        events = sorted(
+            [(span["started"], 1) for run in spans.values() for span in run]
+            + [(span["finished"], -1) for run in spans.values() for span in run]
+        )
+        running = peak = 0
+        for _, delta in events:
+            running += delta
+            peak = max(peak, running)
+        self.assertEqual(peak, 2)
+        # Served in turns, the last run starts before the first one ends
+        first_c = min(span["started"] for span in spans["c"])
+        last_a = max(span["started"] for span in spans["a"])
+        self.assertLess(first_c, last_a)
+        with self.assertRaisesRegex(ValueError, "max_parallel"):
+            self.orchestrator.run_workflows(paths, max_parallel=0)
+
+
+class FailureHandlingTest(unittest.TestCase):
+    """Test timeouts, retries, skipped dependents, fail-fast and speculation."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.root = Path(self._tmpdir.name)
+        self.orchestrator = Orchestrator(log_root=str(self.root / "logs"), console_level=None)
+        self.addCleanup(self.orchestrator.close)
+
+    def _write(self, text: str) -> str:
+        path = self.root / "workflow.yaml"
+        path.write_text(text)
+        return str(path)
+
+    def test_timeouts_retries_and_skipped_dependents(self) -> None:
+        marker = self.root / "tried"
+        path = self._write(
+            f"""
+tasks:
+  - id: hung
+    plugin: shell
+    timeout: 0.2
+    config: {{command: 'sleep 5'}}
+  - id: after_hung
+    plugin: noop
+    depends_on: [hung]
+  - id: last
+    plugin: noop
+    depends_on: [after_hung]
+  - id: flaky
+    plugin: shell
+    timeout: 0.5
+    retries: 2
+    retry_delay: 0
+    config: {{command: 'test -f {marker} && echo ok && exit 0; touch {marker}; sleep 5'}}
+  - id: after_flaky
+    plugin: noop
+    depends_on: [flaky]
+"""
+        )
+        result = self.orchestrator.run_workflow(path)
+        self.assertLess(result.duration, 4)
+        self.assertEqual(result.results["hung"], {"error": "Task hung timed out after 0.2s"})
+        self.assertEqual(result.results["after_hung"]["error"], "Skipped because hung failed")
+        self.assertEqual(result.results["last"]["error"], "Skipped because after_hung failed")
+        self.assertEqual(result.results["flaky"]["stdout"], "ok")
+        self.assertEqual(sorted(result.failed), ["after_hung", "hung", "last"])
+        spans = {span["task"]: span for span in load_trace(result.run_dir)["spans"]}
+        self.assertEqual(spans["flaky"]["attempts"], 2)
+        self.assertEqual(spans["last"]["status"], "skipped")
+
+    def test_abandoned_thread_is_counted_and_its_writes_dropped(self) -> None:
+        class AttemptPlugin(Plugin):
+            # The first attempt of "flaky" outlives its timeout, then
+            # publishes a stale value
+            name = "attempts"
+            events: List[Tuple[str, float]] = []
+            lock = threading.Lock()
+
+            def run(self, config: Dict[str, Any], context: Dict[str, Any]) -> Any:
+                role = config["role"]
+                with self.lock:
+                    self.events.append((role, time.monotonic()))
+                    attempt = sum(1 for name, _ in self.events if name == role)
+                if role == "flaky" and attempt == 1:
+                    time.sleep(0.6)
+                    context["value"] = "late"
+                    with self.lock:
+                        self.events.append(("late", time.monotonic()))
+                    return None
+                if role == "read":
+                    return context["value"]
+                context["value"] = role
+                return None
+
+        PLUGINS["attempts"] = AttemptPlugin
+        self.addCleanup(PLUGINS.__delitem__, "attempts")
+        path = self._write(
+            """
+executor: thread
+plugin_limits: {attempts: 1}
+tasks:
+  - {id: flaky, plugin: attempts, timeout: 0.2, retries: 1, retry_delay: 0, config: {role: flaky}}
+  - {id: other, plugin: attempts, config: {role: other}}
+  - {id: read, plugin: attempts, depends_on: [flaky], config: {role: read}}
+"""
+        )
+        result = self.orchestrator.run_workflow(path)
+        self.assertTrue(result.ok, result.results)
+        self.assertEqual(result.results["read"], "flaky")
+        started = dict(reversed(AttemptPlugin.events))
+        # The timed-out thread held the plugin's only slot until it returned
+        self.assertGreaterEqual(started["other"], started["late"])
+        self.assertGreaterEqual(started["read"], started["late"])
+
+    def test_fail_fast_cancels_running_and_pending_tasks(self) -> None:
+        path = self._write(
+            """
+tasks:
+  - {id: slow, plugin: shell, config: {command: 'sleep 5'}}
+  - {id: after, plugin: noop, depends_on: [slow]}
+  - id: broken
+    plugin: python_function
+    fail_fast: true
+    config: {function: 'no_such_module:main'}
+"""
+        )
+        result = self.orchestrator.run_workflow(path)
+        self.assertLess(result.duration, 4)
+        self.assertEqual(result.status, "failed")
+        self.assertEqual(result.results["slow"], {"error": "Cancelled because broken failed"})
+        self.assertEqual(result.results["after"], {"error": "Cancelled because broken failed"})
+        spans = {span["task"]: span for span in load_trace(result.run_dir)["spans"]}
+        self.assertEqual(spans["slow"]["status"], "cancelled")
+        self.assertNotIn("after", spans)
+        summary = json.loads((result.run_dir / "summary.json").read_text())
+        self.assertEqual(set(summary), {"slow", "after", "broken"})
+
+    def test_straggler_is_speculated_on(self) -> None:
+        marker = self.root / "warm"
+        marker.touch()
+        path = self._write(
+            f"""
+name: stragglers
+tasks:
+  - id: fetch
+    plugin: shell
+    speculate: 50
+    config: {{command: 'test -f {marker} && sleep 0.05 && exit 0; touch {marker}; sleep 5'}}
+"""
+        )
+        for _ in range(3):
+            self.assertTrue(self.orchestrator.run_workflow(path).ok)
+        marker.unlink()
+        result = self.orchestrator.run_workflow(path)
+        self.assertTrue(result.ok)
+        self.assertLess(result.duration, 4)
+        (span,) = load_trace(result.run_dir)["spans"]
+        self.assertTrue(span["speculated"])
+
+    def test_invalid_options(self) -> None:
+        cases = [
+            ("timeout: 0", "'timeout' for task 'a'"),
+            ("retries: -1", "'retries' for task 'a'"),
+            ("retry_delay: fast", "'retry_delay' for task 'a'"),
+            ("speculate: 100", "'speculate' for task 'a'"),
+            ("stream: true\n    retries: 1", "cannot be retried"),
+        ]
+        for option, message in cases:
+            path = self._write(f"tasks:\n  - id: a\n    plugin: noop\n    {option}\n")
+            with self.subTest(option=option), self.assertRaisesRegex(ValueError, message):
+                load_workflow(path)
+        # A workflow default does not apply to streaming tasks
+        path = self._write("retries: 2\ntasks:\n  - {id: a, plugin: noop, stream: true}\n")
+        self.assertEqual(load_workflow(path)["tasks"]["a"]["retries"], 0)
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
\ No newline at end of file
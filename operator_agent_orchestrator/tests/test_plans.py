@@ -0,0 +1,69 @@
+"""Tests for compiled workflow plans and the plan cache."""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from click.testing import CliRunner
+
+from operator_agent_orchestrator.__main__ import app
+from operator_agent_orchestrator.orchestrator import load_workflow
+from operator_agent_orchestrator.plans import PlanCache, plan_key, read_plan
+
+WORKFLOW = """
+tasks:
+  - {id: b, plugin: noop, depends_on: [a]}
+  - {id: a, plugin: noop}
+"""
+
+
+class PlanCacheTest(unittest.TestCase):
+    """Check that plans are reused only for identical workflow files."""
+
+    def test_cache_hit_and_invalidation(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text(WORKFLOW)
+            plans = PlanCache(Path(tmpdir) / "plans")
+            first = load_workflow(str(path), plan_cache=plans)
+            self.assertEqual(list(first["tasks"]), ["a", "b"])
+            self.assertIsNotNone(plans.get(plan_key(path.read_bytes())))
+            with mock.patch("operator_agent_orchestrator.orchestrator.parse_yaml") as parse:
+                self.assertEqual(load_workflow(str(path), plan_cache=plans), first)
+            parse.assert_not_called()
+            # Editing the file changes the key
+            path.write_text(WORKFLOW + "  - {id: c, plugin: noop}\n")
+            self.assertEqual(list(load_workflow(str(path), plan_cache=plans)["tasks"]), ["a", "c", "b"])
+            # Corrupt plans are discarded
+            key = plan_key(path.read_bytes())
+            (Path(tmpdir) / "plans" / f"{key}.plan").write_bytes(b"garbage")
+            self.assertIsNone(plans.get(key))
+            self.assertEqual(len(load_workflow(str(path), plan_cache=plans)["tasks"]), 3)
+
+    def test_compile_and_run_plan(self) -> None:
+        runner = CliRunner()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text(WORKFLOW)
+            result = runner.invoke(app, ["compile", str(path)])
+            self.assertEqual(result.exit_code, 0, result.output)
+            plan = Path(tmpdir) / "workflow.plan"
+            self.assertIn("Compiled 2 tasks", result.output)
+            self.assertEqual(read_plan(plan), load_workflow(str(path)))
+            logs = Path(tmpdir) / "logs"
+            result = runner.invoke(app, ["run", str(plan), "--log-dir", str(logs)])
+            self.assertEqual(result.exit_code, 0, result.output)
+            (summary,) = logs.rglob("summary.json")
+            self.assertEqual(json.loads(summary.read_text()), {"a": None, "b": None})
+            path.write_text("tasks:\n  - {id: a, plugin: nope}\n")
+            result = runner.invoke(app, ["compile", str(path)])
+            self.assertEqual(result.exit_code, 1)
+            self.assertIn("Unknown plugin 'nope'", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,302 @@
+"""Tests for the built‑in plugins."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.plugin_base import Plugin, supports_async
+from operator_agent_orchestrator import plugins as plugins_module
+from operator_agent_orchestrator.plugins import (
+    PLUGINS,
+    CSVIngestPlugin,
+    MetricsPlugin,
+    PluginRegistry,
+    ShellPlugin,
+)
+import pandas as pd
+
+from operator_agent_orchestrator.plugins.csv_ingest import CSVPartitions, partition_offsets
+
+
+class ShellPluginTest(unittest.TestCase):
+    """Test the asyncio based shell plugin."""
+
+    def test_sync_and_async_entry_points(self) -> None:
+        self.assertTrue(supports_async(ShellPlugin()))
+        self.assertFalse(supports_async(MetricsPlugin()))
+        self.assertFalse(supports_async(Plugin()))
+        result = ShellPlugin().run({"command": "echo out; echo err >&2; exit 3"}, {})
+        self.assertEqual(result, {"stdout": "out", "stderr": "err", "returncode": 3})
+
+    def test_concurrent_commands_use_no_threads(self) -> None:
+        count = 20
+        lines = ["tasks:"]
+        for i in range(count):
+            lines.append(f"  - {{id: s{i}, plugin: shell, config: {{command: 'sleep 0.3; echo {i}'}}}}")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text("\n".join(lines) + "\n")
+            orchestrator = Orchestrator(log_root=str(Path(tmpdir) / "logs"))
+            start = time.monotonic()
+            with mock.patch.object(asyncio, "to_thread", side_effect=AssertionError("thread used")):
+                orchestrator.run_workflow(str(path))
+            elapsed = time.monotonic() - start
+            (summary_path,) = (Path(tmpdir) / "logs").rglob("summary.json")
+            summary = json.loads(summary_path.read_text())
+            self.assertEqual([summary[f"s{i}"]["stdout"] for i in range(count)], [str(i) for i in range(count)])
+            # Serial execution would take count * 0.3 seconds
+            self.assertLess(elapsed, count * 0.3 / 2)
+
+    def test_output_is_streamed_to_log_and_tail_is_bounded(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text(
+                """
+tasks:
+  - id: chatty
+    plugin: shell
+    config:
+      command: 'for i in $(seq 1 2000); do echo "line $i"; done; echo "$GREETING" >&2'
+      env: {GREETING: hello}
+      log_file: '{run_dir}/tasks/{task}.log'
+      max_output_bytes: 100
+"""
+            )
+            orchestrator = Orchestrator(log_root=str(Path(tmpdir) / "logs"), console_level=None)
+            run_dir, results = asyncio.run(orchestrator._run_workflow_async(str(path)))
+            result = results["chatty"]
+            self.assertEqual(result["stdout"].splitlines()[-1], "line 2000")
+            self.assertLessEqual(len(result["stdout"]), 100)
+            self.assertEqual(result["stderr"], "hello")
+            self.assertTrue(result["truncated"])
+            self.assertEqual(result["output_bytes"]["stderr"], 6)
+            log = (run_dir / "tasks" / "chatty.log").read_text().splitlines()
+            self.assertEqual(len(log), 2001)
+            self.assertEqual(result["log_file"], str(run_dir / "tasks" / "chatty.log"))
+
+    def test_timeout_kills_process_group(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            marker = Path(tmpdir) / "marker"
+            start = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                ShellPlugin().run({"command": f"(sleep 1; touch {marker}) & sleep 5", "timeout": 0.2}, {})
+            self.assertLess(time.monotonic() - start, 2)
+            time.sleep(1.2)
+            self.assertFalse(marker.exists())
+
+
+class CSVIngestPluginTest(unittest.TestCase):
+    """Test column pushdown and streaming ingestion."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.path = Path(self._tmpdir.name) / "data.csv"
+        rows = [f"{i},{i * 0.5},{'north' if i % 2 else 'south'},ignored" for i in range(25)]
+        self.path.write_text("id,amount,region,notes\n" + "\n".join(rows) + "\n")
+
+    def test_column_and_dtype_pushdown(self) -> None:
+        context: dict = {}
+        result = CSVIngestPlugin().run(
+            {
+                "path": str(self.path),
+                "usecols": ["id", "amount", "region"],
+                "dtype": {"amount": "float32"},
+                "categorical": ["region"],
+            },
+            context,
+        )
+        self.assertEqual(result["rows"], 25)
+        self.assertEqual(result["columns"], ["id", "amount", "region"])
+        self.assertEqual(result["dtypes"]["amount"], "float32")
+        self.assertEqual(result["dtypes"]["region"], "category")
+        self.assertGreater(result["peak_memory_bytes"], 0)
+        self.assertIn("rows_per_second", result)
+        self.assertEqual(list(context["dataframe"].columns), ["id", "amount", "region"])
+
+    def test_streaming_publishes_partitions(self) -> None:
+        context: dict = {}
+        result = CSVIngestPlugin().run(
+            {"path": str(self.path), "usecols": ["id", "amount"], "chunksize": 10}, context
+        )
+        self.assertEqual(result["rows"], 25)
+        self.assertEqual(result["partitions"], 3)
+        partitions = context["dataframe"]
+        self.assertIsInstance(partitions, CSVPartitions)
+        sizes = [len(chunk) for chunk in partitions]
+        self.assertEqual(sizes, [10, 10, 5])
+        # The handle can be iterated more than once
+        self.assertEqual(sum(len(chunk) for chunk in partitions), 25)
+        metrics = MetricsPlugin().run({"numeric_columns": ["amount"]}, context)
+        self.assertEqual(metrics["amount"]["count"], 25)
+        self.assertEqual(metrics["amount"]["max"], 12.0)
+
+    def test_partitions_are_read_from_their_offsets(self) -> None:
+        path = Path(self._tmpdir.name) / "quoted.csv"
+        rows = [f'{i},"line {i}\nwith ""quotes"", and commas"' for i in range(23)]
+        rows.insert(7, "")
+        path.write_bytes(("id,text\r\n" + "\r\n".join(rows)).encode())
+        expected = pd.read_csv(path)
+        for block_bytes in (5, 64, 1 << 20):
+            offsets, counted = partition_offsets(str(path), 5, block_bytes=block_bytes)
+            self.assertEqual(counted, 23)
+            self.assertEqual(len(offsets), 5)
+        context: dict = {}
+        CSVIngestPlugin().run({"path": str(path), "chunksize": 5}, context)
+        partitions = context["dataframe"]
+        self.assertEqual(partitions.offsets, offsets)
+        for index in range(len(partitions)):
+            part = partitions.partition(index)
+            pd.testing.assert_frame_equal(
+                part, expected.iloc[index * 5 : (index + 1) * 5].reset_index(drop=True)
+            )
+        # Without offsets the rows before a partition are skipped instead
+        fallback = CSVPartitions(str(self.path), 10, {}, columns=[], rows=25)
+        pd.testing.assert_frame_equal(
+            fallback.partition(2), pd.read_csv(self.path).iloc[20:].reset_index(drop=True)
+        )
+
+    def test_partitions_cover_every_row_once(self) -> None:
+        files = {
+            "blank.csv": "a,b\n1,2\n  \n3,4\n\n5,6\n7,8\n",
+            "multiline.csv": 'a,b\n1,"x\ny"\n2,z\n3,"\n"\n4,w\n',
+        }
+        for name, text in files.items():
+            with self.subTest(name):
+                path = Path(self._tmpdir.name) / name
+                path.write_text(text)
+                expected = pd.read_csv(path)
+                context: dict = {}
+                CSVIngestPlugin().run({"path": str(path), "chunksize": 2}, context)
+                partitions = context["dataframe"]
+                parts = [partitions.partition(index) for index in range(len(partitions))]
+                pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), expected)
+                # Skipping by parsed rows agrees with the recorded offsets
+                partitions.offsets = None
+                parts = [partitions.partition(index) for index in range(len(partitions))]
+                pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), expected)
+
+    def test_header_only_file_has_one_empty_partition(self) -> None:
+        path = Path(self._tmpdir.name) / "empty.csv"
+        path.write_text("id,amount\n")
+        context: dict = {}
+        result = CSVIngestPlugin().run({"path": str(path), "chunksize": 10}, context)
+        self.assertEqual(result["rows"], 0)
+        partitions = context["dataframe"]
+        self.assertEqual(len(partitions), 1)
+        part = partitions.partition(0)
+        self.assertEqual(list(part.columns), ["id", "amount"])
+        self.assertEqual(len(part), 0)
+
+
+class MetricsPluginTest(unittest.TestCase):
+    """Test the vectorised and streaming metrics engines."""
+
+    def setUp(self) -> None:
+        import numpy as np
+        import pandas as pd
+
+        rng = np.random.default_rng(7)
+        self.df = pd.DataFrame(
+            {
+                "team": rng.choice(["red", "blue"], 5000),
+                "latency": rng.exponential(20.0, 5000),
+                "size": rng.integers(0, 300, 5000),
+            }
+        )
+        self.df.loc[::11, "latency"] = float("nan")
+
+    def _partitions(self, size: int = 700) -> list:
+        return [self.df.iloc[i : i + size] for i in range(0, len(self.df), size)]
+
+    def test_exact_metrics_match_pandas(self) -> None:
+        result = MetricsPlugin().run({"quantiles": [0.9]}, {"dataframe": self.df})
+        self.assertEqual(set(result), {"latency", "size"})
+        latency = self.df["latency"].dropna()
+        self.assertEqual(result["latency"]["count"], len(latency))
+        self.assertAlmostEqual(result["latency"]["mean"], latency.mean())
+        self.assertAlmostEqual(result["latency"]["median"], latency.median())
+        self.assertAlmostEqual(result["latency"]["std"], latency.std())
+        self.assertAlmostEqual(result["latency"]["p90"], latency.quantile(0.9))
+        with self.assertRaisesRegex(ValueError, "not numeric"):
+            MetricsPlugin().run({"numeric_columns": ["team"]}, {"dataframe": self.df})
+
+    def test_boolean_and_non_numeric_frames(self) -> None:
+        self.assertEqual(MetricsPlugin().run({}, {"dataframe": self.df[["team"]]}), {})
+        flags = self.df.assign(slow=self.df["latency"] > 20.0)
+        result = MetricsPlugin().run({"numeric_columns": ["slow"], "distinct": True}, {"dataframe": flags})
+        slow = flags["slow"].astype("float64")
+        self.assertEqual(result["slow"]["count"], len(slow))
+        self.assertAlmostEqual(result["slow"]["mean"], slow.mean())
+        self.assertAlmostEqual(result["slow"]["std"], slow.std())
+        self.assertEqual((result["slow"]["min"], result["slow"]["max"]), (0.0, 1.0))
+        self.assertEqual(result["slow"]["distinct"], 2)
+        grouped = MetricsPlugin().run({"numeric_columns": ["slow"], "group_by": "team"}, {"dataframe": flags})
+        self.assertEqual(len(grouped["groups"]), 2)
+
+    def test_streaming_matches_in_memory(self) -> None:
+        config = {"quantiles": [0.1, 0.9], "distinct": True, "group_by": "team"}
+        exact = MetricsPlugin().run(config, {"dataframe": self.df})
+        streamed = MetricsPlugin().run(config, {"dataframe": self._partitions()})
+        self.assertEqual(exact["group_by"], ["team"])
+        self.assertEqual([g["key"] for g in exact["groups"]], [{"team": "blue"}, {"team": "red"}])
+        self.assertEqual([g["key"] for g in streamed["groups"]], [g["key"] for g in exact["groups"]])
+        for ours, theirs in zip(streamed["groups"], exact["groups"]):
+            for col in ("latency", "size"):
+                a, b = ours["metrics"][col], theirs["metrics"][col]
+                self.assertEqual(a["count"], b["count"])
+                for stat in ("mean", "std", "min", "max"):
+                    self.assertAlmostEqual(a[stat], b[stat], places=6)
+                spread = b["p90"] - b["p10"]
+                for stat in ("median", "p10", "p90"):
+                    self.assertLess(abs(a[stat] - b[stat]), 0.02 * spread)
+                self.assertLess(abs(a["distinct"] - b["distinct"]), 0.03 * b["distinct"])
+
+
+class PluginRegistryTest(unittest.TestCase):
+    """Test lazy loading and discovery of plugins."""
+
+    def test_builtins_are_loaded_on_lookup(self) -> None:
+        registry = PluginRegistry({"metrics": "operator_agent_orchestrator.plugins.metrics:MetricsPlugin"})
+        with mock.patch.object(plugins_module, "_entry_points", return_value=iter([])) as scan:
+            self.assertIn("metrics", registry)
+            scan.assert_not_called()
+            self.assertEqual(registry._classes, {})
+            self.assertIs(registry["metrics"], PLUGINS["metrics"])
+            self.assertNotIn("missing", registry)
+            scan.assert_called_once()
+        self.assertIs(plugins_module.ShellPlugin, PLUGINS["shell"])
+
+    def test_entry_points_and_registration(self) -> None:
+        entry_point = mock.Mock(value="operator_agent_orchestrator.plugins.noop:NoopPlugin", dist=None)
+        entry_point.name = "third_party"
+        shadowing = mock.Mock(value="nowhere:Nothing", dist=None)
+        shadowing.name = "shell"
+        registry = PluginRegistry({"shell": "operator_agent_orchestrator.plugins.shell:ShellPlugin"})
+        with mock.patch.object(plugins_module, "_entry_points", return_value=iter([entry_point, shadowing])):
+            self.assertEqual(sorted(registry), ["shell", "third_party"])
+        self.assertEqual(registry.spec("third_party").source, "entry point")
+        self.assertEqual(registry["third_party"].name, "noop")
+        self.assertIs(registry["shell"], ShellPlugin)
+
+        class GreetPlugin(Plugin):
+            name = "greet"
+
+        registry["greet"] = GreetPlugin
+        self.assertIs(registry["greet"], GreetPlugin)
+        self.assertEqual(registry.spec("greet").source, "registered")
+        del registry["greet"]
+        self.assertNotIn("greet", registry)
+        with self.assertRaises(KeyError):
+            registry["greet"]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
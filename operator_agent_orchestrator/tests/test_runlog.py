@@ -0,0 +1,65 @@
+"""Tests for the per-run logging pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.runlog import LOG_FILE, RunLog, read_events
+
+
+class RunLogTest(unittest.TestCase):
+    """Check structured events, verbosity and handler cleanup."""
+
+    def test_structured_events(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text(
+                "tasks:\n"
+                "  - {id: a, plugin: noop}\n"
+                "  - {id: b, plugin: python_function, config: {function: 'no_such_module:main'}}\n"
+            )
+            orchestrator = Orchestrator(log_root=str(Path(tmpdir) / "logs"), console_level=None)
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                run_dir, _ = asyncio.run(orchestrator._run_workflow_async(str(path)))
+            self.assertEqual(stderr.getvalue(), "")
+            events = read_events(run_dir)
+            self.assertEqual(events[0]["event"], "run_start")
+            self.assertEqual(events[-1]["event"], "run_finish")
+            finished = [event["task"] for event in events if event.get("event") == "task_finish"]
+            self.assertEqual(finished, ["a"])
+            (error,) = [event for event in events if event["level"] == "ERROR"]
+            self.assertEqual(error["task"], "b")
+            self.assertIn("Traceback", error["exception"])
+            self.assertNotIn("Traceback", error["message"])
+            self.assertIn("Task b failed", (run_dir / LOG_FILE).read_text())
+            # Per-run loggers are not registered globally
+            self.assertNotIn(f"orchestrator.{run_dir.name}", logging.Logger.manager.loggerDict)
+
+    def test_levels_and_close(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                run_log = RunLog(Path(tmpdir), level=logging.WARNING, console_level=logging.ERROR)
+            run_log.logger.info("hidden", extra={"event": "x"})
+            run_log.logger.warning("kept", extra={"event": "y", "task": "t"})
+            run_log.logger.error("shown")
+            handlers = list(run_log._handlers)
+            run_log.close()
+            self.assertEqual(stderr.getvalue(), "shown\n")
+            events = read_events(Path(tmpdir))
+            self.assertEqual([event["message"] for event in events], ["kept", "shown"])
+            self.assertEqual(events[0]["task"], "t")
+            self.assertEqual(run_log.logger.handlers, [])
+            self.assertTrue(all(getattr(h, "stream", None) is None for h in handlers[:2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
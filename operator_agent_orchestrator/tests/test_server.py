@@ -0,0 +1,133 @@
+"""Tests for the ``oprun serve`` daemon and its client."""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator import orchestrator as orchestrator_module
+from operator_agent_orchestrator.server import WorkflowServer, request
+from operator_agent_orchestrator.tracing import load_trace
+
+
+class WorkflowServerTest(unittest.TestCase):
+    """Submit workflows to a daemon running in a background thread."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.tmp = Path(self._tmpdir.name)
+        self.socket = str(self.tmp / "oprun.sock")
+        self.orchestrator = Orchestrator(log_root=str(self.tmp / "logs"))
+        self.addCleanup(self.orchestrator.close)
+        self.server = WorkflowServer(self.orchestrator, max_runs=2, max_parallel=2)
+        ready = threading.Event()
+        self.thread = threading.Thread(
+            target=lambda: asyncio.run(self.server.serve(socket_path=self.socket, ready=lambda _: ready.set()))
+        )
+        self.thread.start()
+        self.addCleanup(self._stop)
+        self.assertTrue(ready.wait(10))
+
+    def _stop(self) -> None:
+        if self.thread.is_alive():
+            request({"op": "shutdown"}, socket_path=self.socket)
+            self.thread.join(10)
+
+    def _workflow(self, name: str, command: str) -> str:
+        path = self.tmp / f"{name}.yaml"
+        path.write_text(
+            f"name: {name}\n"
+            "tasks:\n"
+            "  - id: step\n"
+            "    plugin: shell\n"
+            f"    config: {{command: '{command}'}}\n"
+            "  - id: total\n"
+            "    plugin: python_function\n"
+            "    config: {function: 'builtins:sum', args: [[1, 2]]}\n"
+            "    depends_on: [step]\n"
+        )
+        return str(path)
+
+    def test_submit_and_wait(self) -> None:
+        workflow = self._workflow("hello", "echo hi")
+        response = request({"op": "submit", "workflow": workflow, "wait": True}, socket_path=self.socket)
+        self.assertTrue(response["ok"], response)
+        run = response["run"]
+        self.assertEqual(run["status"], "succeeded")
+        self.assertTrue((Path(run["run_dir"]) / "summary.json").exists())
+        status = request({"op": "status", "run_id": run["id"]}, socket_path=self.socket)
+        self.assertEqual(status["run"]["status"], "succeeded")
+
+    def test_concurrent_runs_of_one_workflow(self) -> None:
+        workflow = self._workflow("slow", "sleep 0.3")
+        ids = [
+            request({"op": "submit", "workflow": workflow}, socket_path=self.socket)["run"]["id"]
+            for _ in range(3)
+        ]
+        listed = request({"op": "status"}, socket_path=self.socket)["runs"]
+        # At most two runs are admitted at once
+        self.assertLessEqual(sum(run["status"] == "running" for run in listed), 2)
+        runs = [request({"op": "wait", "run_id": rid}, socket_path=self.socket)["run"] for rid in ids]
+        self.assertEqual({run["status"] for run in runs}, {"succeeded"})
+        self.assertEqual(len({run["run_dir"] for run in runs}), 3)
+
+    def test_runs_share_task_slots(self) -> None:
+        path = self.tmp / "wide.yaml"
+        path.write_text(
+            "tasks:\n"
+            + "".join(
+                f"  - id: t{i}\n    plugin: shell\n    config: {{command: 'sleep 0.1'}}\n" for i in range(3)
+            )
+        )
+        # The run uses the workflow loaded when it was submitted
+        with mock.patch.object(orchestrator_module, "load_workflow", side_effect=AssertionError("loaded twice")):
+            ids = [
+                request({"op": "submit", "workflow": str(path)}, socket_path=self.socket)["run"]["id"]
+                for _ in range(2)
+            ]
+            runs = [request({"op": "wait", "run_id": rid}, socket_path=self.socket)["run"] for rid in ids]
+        self.assertEqual([run["status"] for run in runs], ["succeeded", "succeeded"])
+        spans = [span for run in runs for span in load_trace(run["run_dir"])["spans"]]
+        events = sorted([(span["started"], 1) for span in spans] + [(span["finished"], -1) for span in spans])
+        running = peak = 0
+        for _, delta in events:
+            running += delta
+            peak = max(peak, running)
+        self.assertEqual(peak, 2)
+
+    def test_errors_are_reported(self) -> None:
+        bad = self.tmp / "bad.yaml"
+        bad.write_text("tasks:\n  - id: a\n    plugin: nope\n")
+        response = request({"op": "submit", "workflow": str(bad)}, socket_path=self.socket)
+        self.assertFalse(response["ok"])
+        self.assertIn("Unknown plugin", response["error"])
+        response = request({"op": "status", "run_id": "missing"}, socket_path=self.socket)
+        self.assertEqual(response, {"ok": False, "error": "Unknown run 'missing'"})
+        failing = self.tmp / "failing.yaml"
+        failing.write_text(
+            "tasks:\n"
+            "  - id: broken\n"
+            "    plugin: python_function\n"
+            "    config: {function: 'no_such_module:main'}\n"
+        )
+        run = request({"op": "submit", "workflow": str(failing), "wait": True}, socket_path=self.socket)["run"]
+        self.assertEqual(run["status"], "failed")
+        self.assertEqual(run["error"], "Tasks failed: broken")
+
+    def test_shutdown_removes_socket(self) -> None:
+        self.assertEqual(request({"op": "shutdown"}, socket_path=self.socket), {"ok": True})
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(Path(self.socket).exists())
+        with self.assertRaises(ConnectionError):
+            request({"op": "status"}, socket_path=self.socket)
+
+
+if __name__ == "__main__":
+    unittest.main()
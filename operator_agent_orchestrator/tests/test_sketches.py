@@ -0,0 +1,52 @@
+"""Tests for the mergeable metric summaries."""
+
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from operator_agent_orchestrator.sketches import ColumnSummary, DistinctSketch, QuantileSketch
+
+
+class SketchTest(unittest.TestCase):
+    """Summaries merged from shards must agree with a single pass."""
+
+    def setUp(self) -> None:
+        self.values = np.random.default_rng(3).lognormal(0.0, 1.0, 50_000)
+
+    def test_merge_matches_single_pass(self) -> None:
+        whole = ColumnSummary(quantiles=[0.99], distinct=True)
+        whole.update(self.values)
+        merged = ColumnSummary(quantiles=[0.99], distinct=True)
+        for shard in np.array_split(self.values, 7):
+            part = ColumnSummary(quantiles=[0.99], distinct=True)
+            part.update(shard)
+            merged.merge(part)
+        a, b = whole.result(), merged.result()
+        self.assertEqual(a["count"], b["count"])
+        self.assertAlmostEqual(a["mean"], b["mean"])
+        self.assertAlmostEqual(a["std"], b["std"])
+        self.assertEqual(a["distinct"], b["distinct"])
+        self.assertAlmostEqual(a["p99"], b["p99"], delta=0.02 * a["p99"])
+
+    def test_quantile_accuracy(self) -> None:
+        sketch = QuantileSketch()
+        for shard in np.array_split(self.values, 10):
+            sketch.update(shard)
+        self.assertLess(len(sketch.means), 200)
+        for q in (0.01, 0.5, 0.99):
+            exact = np.quantile(self.values, q)
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=0.01 * exact + 1e-3)
+
+    def test_distinct_accuracy(self) -> None:
+        sketch = DistinctSketch()
+        sketch.update(np.arange(100_000) % 40_000)
+        self.assertAlmostEqual(sketch.estimate(), 40_000, delta=800)
+        small = DistinctSketch()
+        small.update(["a", "b", "a", None])
+        self.assertEqual(small.estimate(), 2)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
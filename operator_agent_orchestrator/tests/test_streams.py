@@ -0,0 +1,114 @@
+"""Tests for bounded streams between pipelined tasks."""
+
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.orchestrator import compile_workflow
+from operator_agent_orchestrator.streams import Stream, StreamClosedError
+from operator_agent_orchestrator.tracing import load_trace
+
+
+class StreamTest(unittest.TestCase):
+    """Check buffering, backpressure and failure of a stream."""
+
+    def test_producer_waits_for_slowest_reader(self) -> None:
+        stream = Stream(maxsize=3, readers=2)
+        fast, slow = stream.readers
+        buffered = []
+
+        def produce() -> None:
+            for i in range(20):
+                stream.put(i)
+                buffered.append(len(stream._items))
+            stream.close()
+
+        async def read_async() -> list:
+            return [item async for item in fast]
+
+        fast_items = []
+        producer = threading.Thread(target=produce)
+        reader = threading.Thread(target=lambda: fast_items.extend(asyncio.run(read_async())))
+        producer.start()
+        reader.start()
+        slow_items = []
+        for item in slow:
+            slow_items.append(item)
+            time.sleep(0.001)
+        producer.join()
+        reader.join()
+        self.assertEqual(fast_items, list(range(20)))
+        self.assertEqual(slow_items, list(range(20)))
+        self.assertLessEqual(max(buffered), 3)
+        self.assertEqual(len(stream._items), 0)
+
+    def test_closed_reader_no_longer_blocks_and_failure_propagates(self) -> None:
+        stream = Stream(maxsize=1, readers=2)
+        first, second = stream.readers
+        second.close()
+        stream.put("a")
+        self.assertEqual(next(first), "a")
+        stream.put("b")
+        stream.close(ValueError("boom"))
+        self.assertEqual(next(first), "b")
+        with self.assertRaisesRegex(StreamClosedError, "boom"):
+            next(first)
+        self.assertEqual(list(second), [])
+
+
+class PipelineTest(unittest.TestCase):
+    """Run chains of streaming tasks through the orchestrator."""
+
+    def test_stages_overlap(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text(
+                """
+max_parallel: 1
+tasks:
+  - id: numbers
+    plugin: python_function
+    stream: 4
+    config: {function: 'builtins:range', args: [1, 101]}
+  - id: running_total
+    plugin: python_function
+    stream: 2
+    depends_on: [numbers]
+    config: {function: 'itertools:accumulate', inputs: {iterable: numbers}}
+  - id: mean
+    plugin: python_function
+    depends_on: [running_total]
+    config: {function: 'statistics:fmean', inputs: {data: running_total}}
+"""
+            )
+            orchestrator = Orchestrator(log_root=str(Path(tmpdir) / "logs"), console_level=None)
+            run_dir, results = asyncio.run(orchestrator._run_workflow_async(str(path)))
+            self.assertEqual(results["mean"], 1717.0)
+            self.assertEqual(results["numbers"], {"items": 100})
+            spans = {span["task"]: span for span in load_trace(run_dir)["spans"]}
+            # Every stage started before the stage feeding it had finished
+            self.assertLess(spans["running_total"]["started"], spans["numbers"]["finished"])
+            self.assertLess(spans["mean"]["started"], spans["running_total"]["finished"])
+
+    def test_readers_must_run_in_threads(self) -> None:
+        definition = {
+            "tasks": [
+                {"id": "source", "plugin": "python_function", "stream": True},
+                {"id": "sink", "plugin": "noop", "executor": "process", "depends_on": ["source"]},
+            ]
+        }
+        with self.assertRaisesRegex(ValueError, "reads the stream of 'source'"):
+            compile_workflow(definition)
+        definition["tasks"][0]["executor"] = "process"
+        with self.assertRaisesRegex(ValueError, "must use the thread or inline executor"):
+            compile_workflow(definition)
+
+
+if __name__ == "__main__":
+    unittest.main()
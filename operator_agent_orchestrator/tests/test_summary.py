@@ -0,0 +1,115 @@
+"""Tests for writing run summaries."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.summary import SUMMARY_FILE, SummaryWriter, is_reference, load_summary
+
+
+def make_frame() -> pd.DataFrame:
+    return pd.DataFrame({"x": np.arange(50_000), "label": ["a", "b"] * 25_000})
+
+
+class SummaryWriterTest(unittest.TestCase):
+    """Check inlining, stored results and the two encodings."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.run_dir = Path(self._tmpdir.name)
+
+    def _write(self, results: dict, **options) -> dict:
+        writer = SummaryWriter(self.run_dir, inline_bytes=1000, **options)
+        for task_id, result in results.items():
+            writer.add(task_id, result)
+        writer.close()
+        return load_summary(self.run_dir)
+
+    def test_large_and_binary_results_are_stored_separately(self) -> None:
+        frame = make_frame()
+        results = {
+            "small": {"rows": 3, "mean": 1.5},
+            "shell": {"stdout": "x" * 5000, "returncode": 0},
+            "frame": frame,
+            "array": np.arange(10_000, dtype="float32"),
+            "numbers": list(range(1000)),
+            "blob": b"\x00\x01",
+            "count": np.int64(7),
+        }
+        summary = self._write(results)
+        self.assertEqual(summary["small"], {"rows": 3, "mean": 1.5})
+        self.assertEqual(summary["shell"]["returncode"], 0)
+        self.assertEqual(summary["shell"]["stdout"]["type"], "str")
+        self.assertEqual(len(summary["shell"]["stdout"]["preview"]), 201)
+        self.assertEqual(summary["frame"]["shape"], [50_000, 2])
+        self.assertEqual(summary["frame"]["preview"][1], {"x": 1, "label": "b"})
+        self.assertEqual(summary["numbers"]["length"], 1000)
+        self.assertEqual(summary["count"], 7)
+        self.assertTrue(all(is_reference(summary[key]) for key in ("frame", "array", "numbers", "blob")))
+        # The summary itself stays small
+        self.assertLess((self.run_dir / SUMMARY_FILE).stat().st_size, 5000)
+
+        resolved = load_summary(self.run_dir, resolve=True)
+        self.assertTrue(resolved["frame"].equals(frame))
+        np.testing.assert_array_equal(resolved["array"], results["array"])
+        self.assertEqual(resolved["shell"]["stdout"], "x" * 5000)
+        self.assertEqual(resolved["numbers"], list(range(1000)))
+        self.assertEqual(resolved["blob"], b"\x00\x01")
+
+    def test_compact_matches_indented(self) -> None:
+        results = {"a": {"b": [1, 2.5, None]}, "c": "text", "d": {}}
+        indented = self._write(results)
+        text = (self.run_dir / SUMMARY_FILE).read_text()
+        self.assertIn('\n  "a": {\n    "b": [', text)
+        compact = self._write(results, compact=True)
+        self.assertEqual(indented, compact)
+        self.assertNotIn("\n", (self.run_dir / SUMMARY_FILE).read_text().strip())
+        self.assertEqual(self._write({}), {})
+
+    def test_abort_leaves_no_summary(self) -> None:
+        writer = SummaryWriter(self.run_dir)
+        writer.add("a", 1)
+        writer.abort()
+        self.assertEqual(list(self.run_dir.iterdir()), [])
+
+
+class WorkflowSummaryTest(unittest.TestCase):
+    """Run a workflow returning an array."""
+
+    def test_array_result_is_referenced(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "workflow.yaml"
+            path.write_text(
+                """
+tasks:
+  - id: numbers
+    plugin: python_function
+    config: {function: 'numpy:arange', args: [100000]}
+  - id: total
+    plugin: python_function
+    depends_on: [numbers]
+    config: {function: 'numpy:sum', inputs: {a: numbers}}
+"""
+            )
+            orchestrator = Orchestrator(
+                log_root=str(Path(tmpdir) / "logs"), console_level=None, compact_summary=True
+            )
+            run_dir, results = asyncio.run(orchestrator._run_workflow_async(str(path)))
+            summary = json.loads((run_dir / SUMMARY_FILE).read_text())
+            self.assertEqual(summary["numbers"]["type"], "ndarray")
+            self.assertEqual(summary["numbers"]["shape"], [100000])
+            self.assertEqual(summary["total"], 4999950000)
+            np.testing.assert_array_equal(load_summary(run_dir, resolve=True)["numbers"], results["numbers"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Tests for per‑task tracing, profiling and ``oprun report``."""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from operator_agent_orchestrator import Orchestrator
+from operator_agent_orchestrator.__main__ import app
+from operator_agent_orchestrator.tracing import CHROME_TRACE_FILE, TRACE_FILE, critical_path
+
+
+def _span(task: str, started: float, finished: float, depends_on=()) -> dict:
+    return {
+        "task": task,
+        "plugin": "shell",
+        "depends_on": list(depends_on),
+        "scheduled": started,
+        "started": started,
+        "finished": finished,
+        "duration": finished - started,
+        "status": "ok",
+    }
+
+
+class TracingTest(unittest.TestCase):
+    """Check the trace files written by a run and the report built on them."""
+
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.tmp = Path(self._tmpdir.name)
+        self.workflow = self.tmp / "workflow.yaml"
+        self.workflow.write_text(
+            "name: traced\n"
+            "tasks:\n"
+            "  - id: fast\n"
+            "    plugin: shell\n"
+            "    config: {command: 'true'}\n"
+            "  - id: slow\n"
+            "    plugin: shell\n"
+            "    config: {command: 'sleep 0.2'}\n"
+            "  - id: sum\n"
+            "    plugin: python_function\n"
+            "    executor: thread\n"
+            "    config: {function: 'builtins:sum', args: [[1, 2, 3]]}\n"
+            "    depends_on: [fast, slow]\n"
+        )
+
+    def _run(self, **options) -> Path:
+        orchestrator = Orchestrator(log_root=str(self.tmp / "logs"), **options)
+        try:
+            orchestrator.run_workflow(str(self.workflow))
+        finally:
+            orchestrator.close()
+        (run_dir,) = [p.parent for p in (self.tmp / "logs").rglob(TRACE_FILE)]
+        return run_dir
+
+    def test_trace_files(self) -> None:
+        run_dir = self._run()
+        trace = json.loads((run_dir / TRACE_FILE).read_text())
+        spans = {span["task"]: span for span in trace["spans"]}
+        self.assertEqual(set(spans), {"fast", "slow", "sum"})
+        for span in spans.values():
+            self.assertLessEqual(span["scheduled"], span["started"])
+            self.assertLessEqual(span["started"], span["finished"])
+        self.assertEqual(spans["slow"]["worker"], "event loop")
+        self.assertIsNone(spans["slow"]["cpu_seconds"])
+        self.assertTrue(spans["sum"]["worker"].startswith("thread "))
+        self.assertGreaterEqual(spans["sum"]["cpu_seconds"], 0.0)
+        # The dependant only became ready once the slow branch finished
+        self.assertGreaterEqual(spans["sum"]["scheduled"], spans["slow"]["finished"])
+        self.assertEqual([s["task"] for s in critical_path(trace["spans"])], ["slow", "sum"])
+
+        chrome = json.loads((run_dir / CHROME_TRACE_FILE).read_text())
+        complete = [e for e in chrome["traceEvents"] if e["ph"] == "X"]
+        self.assertEqual(len(complete), 3)
+        # fast and slow overlap, so they are drawn on different rows
+        lanes = {e["name"]: e["tid"] for e in complete}
+        self.assertNotEqual(lanes["fast"], lanes["slow"])
+
+    def test_profile_and_report(self) -> None:
+        run_dir = self._run(profile=True)
+        self.assertTrue((run_dir / "profiles" / "sum.prof").exists())
+        result = CliRunner().invoke(app, ["report", str(run_dir), "--top", "2"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Critical path:", result.output)
+        path_section = result.output.split("Critical path:")[1].split("Top")[0]
+        self.assertIn("slow", path_section)
+        self.assertNotIn("fast", path_section)
+        self.assertIn("Top 2 tasks by duration:", result.output)
+
+    def test_critical_path_follows_latest_dependency(self) -> None:
+        spans = [
+            _span("a", 0.0, 1.0),
+            _span("b", 0.0, 3.0),
+            _span("c", 3.0, 4.0, depends_on=["a", "b"]),
+            _span("d", 0.5, 2.0, depends_on=["a"]),
+        ]
+        self.assertEqual([s["task"] for s in critical_path(spans)], ["b", "c"])
+        self.assertEqual(critical_path([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()